@@ -0,0 +1,71 @@
+# ai/embeddings.py - Text embeddings fitted on the platform's own corpus
+#
+# TF-IDF over words and bigrams, optionally reduced with truncated SVD
+# (latent semantic analysis) to a few hundred dense dimensions. Vectors are
+# float32 and L2-normalised, so a dot product is the cosine similarity.
+# Fitting is the expensive step; transform() of new texts against a fitted
+# model is cheap, so the model is refitted on a schedule
+# (services/embeddings.py) and reused in between.
+#
+# NumPy and scikit-learn are imported on first use, not at startup.
+
+
+class EmbeddingEngine:
+    def __init__(self, dimensions=128, max_features=50000, min_df=2):
+        self.dimensions = dimensions  # 0 = keep the sparse TF-IDF vectors
+        self.max_features = max_features
+        self.min_df = min_df
+        self.vectorizer = None
+        self.svd = None
+
+    @property
+    def fitted(self):
+        return self.vectorizer is not None
+
+    @property
+    def sparse(self):
+        return self.svd is None
+
+    @property
+    def output_dimensions(self):
+        return len(self.vectorizer.vocabulary_) if self.sparse else self.svd.n_components
+
+    def fit(self, texts):
+        """Fit on a corpus; raises ValueError if it has no usable terms"""
+        import numpy as np
+        from sklearn.decomposition import TruncatedSVD
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        vectorizer = TfidfVectorizer(
+            ngram_range=(1, 2),
+            sublinear_tf=True,
+            stop_words="english",
+            max_features=self.max_features,
+            # Small corpora (development data) keep their rare terms
+            min_df=self.min_df if len(texts) >= 100 * self.min_df else 1,
+            dtype=np.float32
+        )
+        matrix = vectorizer.fit_transform(texts)
+        svd = None
+        if self.dimensions and matrix.shape[1] > self.dimensions:
+            svd = TruncatedSVD(n_components=self.dimensions, algorithm="randomized", random_state=0)
+            svd.fit(matrix)
+        self.vectorizer, self.svd = vectorizer, svd
+        return self
+
+    def transform(self, texts):
+        """float32 vectors, one row per text (a CSR matrix when sparse)"""
+        import numpy as np
+
+        matrix = self.vectorizer.transform(texts)
+        if self.svd is None:
+            return matrix
+        dense = self.svd.transform(matrix).astype(np.float32)
+        norms = np.linalg.norm(dense, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return dense / norms
+
+    def nbytes(self, vectors):
+        if self.sparse:
+            return vectors.data.nbytes + vectors.indices.nbytes + vectors.indptr.nbytes
+        return vectors.nbytes
@@ -1,53 +1,139 @@
 # ai/gemini.py - Improved version with concise responses
 
-import google.generativeai as genai
-import os
+import json
 
-# Configure Gemini API
-genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-model = genai.GenerativeModel('gemini-flash-lite-latest')
+# Model calls go through the configured backend (Gemini or the local fake)
+from ai.llm import llm
 
-def analyze_post(content):
-    """Analyze a single post for sentiment and key points"""
-    prompt = f"""Analyze this community post and extract:
-1. Sentiment (positive/negative/neutral)
-2. Key point (one sentence summary)
+SENTIMENTS = ('positive', 'negative', 'neutral')
+EMOTIONS = ('angry', 'sad', 'happy', 'frustrated', 'satisfied', 'neutral')
 
-Post: "{content}"
+# One schema for every text analysis, so a single round trip returns all fields
+ENRICHMENT_SCHEMA = {
+    "sentiment": "positive | negative | neutral",
+    "score": "number from -1 to 1",
+    "confidence": "number from 0 to 1",
+    "emotion": " | ".join(EMOTIONS),
+    "key_point": "one sentence summary",
+    "tags": ["2-5 lowercase tags, single words or short phrases"]
+}
 
-Respond in this exact format:
-Sentiment: [positive/negative/neutral]
-Key Point: [one sentence]"""
-    
+NEUTRAL_ENRICHMENT = {
+    'sentiment': 'neutral',
+    'score': 0.0,
+    'confidence': 0.0,
+    'emotion': 'neutral',
+    'key_points': '',
+    'tags': []
+}
+
+
+def _parse_json(text):
+    return json.loads(text.strip().replace('```json', '').replace('```', '').strip())
+
+
+def _clean_enrichment(data):
+    """Normalize one model answer to the enrichment fields; raises on bad input"""
+    sentiment = str(data.get('sentiment', '')).strip().lower()
+    if sentiment not in SENTIMENTS:
+        raise ValueError(f"unexpected sentiment {sentiment!r}")
+    emotion = str(data.get('emotion', 'neutral')).strip().lower()
+    tags = data.get('tags') or []
+    return {
+        'sentiment': sentiment,
+        'score': max(-1.0, min(1.0, float(data.get('score', 0)))),
+        'confidence': max(0.0, min(1.0, float(data.get('confidence', 0.5)))),
+        'emotion': emotion if emotion in EMOTIONS else 'neutral',
+        'key_points': str(data.get('key_point', '')).strip(),
+        'tags': [str(tag).strip().lower() for tag in tags if str(tag).strip()][:5]
+    }
+
+
+def enrichment_prompt(content, title=None):
+    context = f'Topic: "{title}"\n' if title else ''
+    return f"""Analyze this community post. Respond with ONLY a JSON object matching this schema:
+{json.dumps(ENRICHMENT_SCHEMA, indent=2)}
+
+{context}Post: "{content}"
+
+Respond with ONLY the JSON, no other text."""
+
+
+def request_enrichment(content, title=None):
+    """One enrichment call; raises if the model fails or answers badly"""
+    return _clean_enrichment(_parse_json(llm.generate(enrichment_prompt(content, title))))
+
+
+async def request_enrichment_async(content, title=None):
+    """request_enrichment() for the ASGI routes"""
+    return _clean_enrichment(_parse_json(await llm.agenerate(enrichment_prompt(content, title))))
+
+
+def enrich_post(content, title=None):
+    """Sentiment, score, confidence, emotion, key point and tags in one call
+    (neutral if the model fails)"""
     try:
-        response = model.generate_content(prompt)
-        text = response.text.strip()
-        
-        # Parse response
-        lines = text.split('\n')
-        sentiment = 'neutral'
-        key_points = ''
-        
-        for line in lines:
-            if line.startswith('Sentiment:'):
-                sentiment = line.split(':', 1)[1].strip().lower()
-            elif line.startswith('Key Point:'):
-                key_points = line.split(':', 1)[1].strip()
-        
-        return {
-            'sentiment': sentiment,
-            'key_points': key_points
-        }
+        return request_enrichment(content, title)
     except Exception as e:
-        print(f"Error analyzing post: {e}")
-        return {
-            'sentiment': 'neutral',
-            'key_points': ''
-        }
+        print(f"Error enriching post: {e}")
+        return dict(NEUTRAL_ENRICHMENT, tags=[])
 
 
-def moderator_reasoning(distilled_points, sentiment_score, tags):
-    """Generate concise moderation recommendations"""
+async def enrich_post_async(content, title=None):
+    """enrich_post() for the ASGI routes"""
+    try:
+        return await request_enrichment_async(content, title)
+    except Exception as e:
+        print(f"Error enriching post: {e}")
+        return dict(NEUTRAL_ENRICHMENT, tags=[])
+
+
+def analyze_post(content):
+    """Analyze a single post for sentiment and key points"""
+    enrichment = enrich_post(content)
+    return {
+        'sentiment': enrichment['sentiment'],
+        'key_points': enrichment['key_points']
+    }
+
+
+def analyze_posts_batch(contents):
+    """Enrich several posts in one request (used by the offline import pass).
+
+    Returns one enrichment per post, in order; a post whose answer could not
+    be parsed gets None so the caller can leave it pending and retry later.
+    """
+    numbered = "\n".join(
+        f'{i}. "{" ".join(content.split())}"' for i, content in enumerate(contents, 1)
+    )
+    schema = dict({"index": "post number"}, **ENRICHMENT_SCHEMA)
+    prompt = f"""Analyze each numbered community post. Respond with ONLY a JSON array
+containing one object per post, each matching this schema:
+{json.dumps(schema, indent=2)}
+
+Posts:
+{numbered}
+
+Respond with ONLY the JSON array, no other text."""
+
+    results = [None] * len(contents)
+    try:
+        answers = _parse_json(llm.generate(prompt))
+    except Exception as e:
+        print(f"Error analyzing post batch: {e}")
+        return results
+
+    for answer in answers if isinstance(answers, list) else []:
+        try:
+            index = int(answer.get('index')) - 1
+            if 0 <= index < len(contents):
+                results[index] = _clean_enrichment(answer)
+        except Exception:
+            continue
+    return results
+
+def _moderation_request(distilled_points, sentiment_score, tags):
+    """Prompt for moderator_reasoning plus the text shown if the model fails"""
     
     # Parse tags
     tags_list = tags.split(',') if tags else []
@@ -89,12 +175,7 @@ Provide a brief analysis in this format:
 
 Keep it concise and actionable. Focus on what moderators need to know and do."""
 
-    try:
-        response = model.generate_content(prompt)
-        return response.text.strip()
-    except Exception as e:
-        print(f"Error generating moderation reasoning: {e}")
-        return f"""### Summary
+    fallback = f"""### Summary
 Unable to generate AI analysis at this time.
 
 ### Current Status
@@ -105,4 +186,25 @@ Unable to generate AI analysis at this time.
 ### Recommended Actions
 1. Review topic manually
 2. Monitor for updates
-3. Engage with community if needed"""
\ No newline at end of file
+3. Engage with community if needed"""
+    return prompt, fallback
+
+
+def moderator_reasoning(distilled_points, sentiment_score, tags):
+    """Generate concise moderation recommendations"""
+    prompt, fallback = _moderation_request(distilled_points, sentiment_score, tags)
+    try:
+        return llm.generate(prompt)
+    except Exception as e:
+        print(f"Error generating moderation reasoning: {e}")
+        return fallback
+
+
+async def moderator_reasoning_async(distilled_points, sentiment_score, tags):
+    """moderator_reasoning() for the ASGI routes"""
+    prompt, fallback = _moderation_request(distilled_points, sentiment_score, tags)
+    try:
+        return await llm.agenerate(prompt)
+    except Exception as e:
+        print(f"Error generating moderation reasoning: {e}")
+        return fallback
\ No newline at end of file
@@ -0,0 +1,345 @@
+# ai/llm.py - Pluggable LLM backends
+#
+# Everything that talks to a model goes through `llm.generate(prompt)`. The
+# backend is chosen by LLM_BACKEND:
+#   gemini - Google Gemini (configured on first use, not at import)
+#   fake   - local stand-in with configurable latency, error rate and canned
+#            or recorded responses, for load tests without network access
+# With LLM_RECORD_PATH set, real responses are appended to a JSONL file that
+# the fake backend can replay (FAKE_LLM_RESPONSES).
+#
+# `await llm.agenerate(prompt)` is the asyncio variant used by the ASGI entry
+# point: waiting on the model does not hold a thread, and at most
+# LLM_ASYNC_CONCURRENCY calls are in flight per worker.
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+
+
+class LLMError(Exception):
+    """The backend failed to produce a response"""
+
+
+class LLMTimeout(LLMError):
+    """The backend did not answer within LLM_TIMEOUT"""
+
+
+def prompt_key(prompt):
+    return hashlib.sha1(prompt.encode("utf-8")).hexdigest()
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token) when the backend reports none"""
+    return -(-len(text) // 4)
+
+
+class LLMResult:
+    """A response plus token usage, when the backend reports it"""
+
+    def __init__(self, text, prompt_tokens=None, output_tokens=None):
+        self.text = text
+        self.prompt_tokens = prompt_tokens
+        self.output_tokens = output_tokens
+
+
+class LLMBackend:
+    name = "base"
+
+    def generate(self, prompt):
+        """Return the model's response to ``prompt`` as text or an LLMResult"""
+        raise NotImplementedError
+
+    async def agenerate(self, prompt):
+        """Async generate(); backends without a native async client use a thread"""
+        return await asyncio.get_running_loop().run_in_executor(None, self.generate, prompt)
+
+
+class GeminiBackend(LLMBackend):
+    name = "gemini"
+
+    def __init__(self, model_name="gemini-flash-lite-latest", api_key=None, timeout=None):
+        self.model_name = model_name
+        self.api_key = api_key
+        self.timeout = timeout
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _get_model(self):
+        with self._lock:
+            if self._model is None:
+                import google.generativeai as genai
+                genai.configure(api_key=self.api_key or os.getenv("GEMINI_API_KEY"))
+                self._model = genai.GenerativeModel(self.model_name)
+            return self._model
+
+    def _request_options(self):
+        return {"request_options": {"timeout": self.timeout}} if self.timeout else {}
+
+    def generate(self, prompt):
+        response = self._get_model().generate_content(prompt, **self._request_options())
+        return self._result(response)
+
+    async def agenerate(self, prompt):
+        if self._model is None:
+            # First use imports and configures the client; keep that off the loop
+            await asyncio.get_running_loop().run_in_executor(None, self._get_model)
+        generate_async = getattr(self._model, "generate_content_async", None)
+        if generate_async is None:
+            return await super().agenerate(prompt)
+        return self._result(await generate_async(prompt, **self._request_options()))
+
+    @staticmethod
+    def _result(response):
+        usage = getattr(response, "usage_metadata", None)  # newer client versions only
+        return LLMResult(
+            response.text,
+            getattr(usage, "prompt_token_count", None),
+            getattr(usage, "candidates_token_count", None)
+        )
+
+
+# ==================== FAKE BACKEND ====================
+
+def parse_latency(spec, rng):
+    """Latency sampler (seconds) from a spec in milliseconds:
+
+        fixed:200 | uniform:50:400 | normal:300:80 | lognormal:300:0.5 | exp:300
+
+    lognormal takes the median and sigma; exp takes the mean.
+    """
+    kind, *args = spec.split(":")
+    args = [float(a) for a in args]
+    if kind == "fixed":
+        sample = lambda: args[0]
+    elif kind == "uniform":
+        sample = lambda: rng.uniform(args[0], args[1])
+    elif kind == "normal":
+        sample = lambda: rng.gauss(args[0], args[1])
+    elif kind == "lognormal":
+        sample = lambda: rng.lognormvariate(math.log(args[0]), args[1])
+    elif kind == "exp":
+        sample = lambda: rng.expovariate(1 / args[0])
+    else:
+        raise ValueError(f"unknown latency distribution {kind!r}")
+    return lambda: max(sample(), 0.0) / 1000
+
+
+_NUMBERED_POST_RE = re.compile(r'^\d+\. "', re.MULTILINE)
+
+
+def _pick(options, key):
+    return options[int(key[:8], 16) % len(options)]
+
+
+def canned_response(prompt):
+    """Deterministic, parseable answer for each prompt shape the app sends"""
+    key = prompt_key(prompt)
+    sentiment = _pick(["positive", "negative", "neutral"], key)
+    score = {"positive": 0.6, "negative": -0.6, "neutral": 0.0}[sentiment]
+    emotion = {"positive": "satisfied", "negative": "frustrated", "neutral": "neutral"}[sentiment]
+    enrichment = {
+        "sentiment": sentiment,
+        "score": score,
+        "confidence": 0.8,
+        "emotion": emotion,
+        "key_point": "Canned key point from the fake LLM backend.",
+        "tags": ["general", "campus"]
+    }
+
+    if '"index"' in prompt and "JSON array" in prompt:
+        count = len(_NUMBERED_POST_RE.findall(prompt.split("Posts:", 1)[-1]))
+        return json.dumps([dict(enrichment, index=i) for i in range(1, count + 1)])
+    if '"key_point"' in prompt:
+        return json.dumps(enrichment)
+    if '"action_plan"' in prompt:
+        return json.dumps({
+            "resources_needed": ["Department contact", "Meeting room"],
+            "stakeholders": [{"name": "Department Head", "role": "Responsible authority",
+                              "contact": "Check college directory", "impact": "high"}],
+            "action_plan": [{"step": "Identify responsible department", "time_estimate": "30 minutes",
+                             "priority": "high", "resources": ["College directory"],
+                             "expected_outcome": "Clear ownership of issue"}],
+            "quick_actions": ["Acknowledge the issue publicly"],
+            "budget_implications": "None expected",
+            "timeline": "1 week"
+        })
+    if "### Summary" in prompt:
+        return ("### Summary\nCanned analysis from the fake LLM backend.\n\n"
+                "### Key Concerns\n- No major concerns\n\n"
+                "### Recommended Actions\n1. Review topic\n2. Monitor for updates\n3. Engage with community")
+    return "Canned summary from the fake LLM backend."
+
+
+class FakeBackend(LLMBackend):
+    """Local stand-in: sleeps for a sampled latency, fails at ``error_rate``,
+    answers from recorded responses (by prompt hash) or canned ones"""
+    name = "fake"
+
+    def __init__(self, latency="fixed:0", error_rate=0.0, timeout=None, responses_path=None, seed=None):
+        self._rng = random.Random(seed)
+        self._sample_latency = parse_latency(latency, self._rng)
+        self.error_rate = error_rate
+        self.timeout = timeout
+        self.recorded = {}
+        if responses_path and os.path.exists(responses_path):
+            with open(responses_path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        self.recorded[record["prompt_sha1"]] = record["response"]
+
+    def generate(self, prompt):
+        latency = self._sample_latency()
+        time.sleep(min(latency, self.timeout or latency))
+        return self._answer(prompt, latency)
+
+    async def agenerate(self, prompt):
+        latency = self._sample_latency()
+        await asyncio.sleep(min(latency, self.timeout or latency))
+        return self._answer(prompt, latency)
+
+    def _answer(self, prompt, latency):
+        if self.timeout and latency > self.timeout:
+            raise LLMTimeout(f"fake backend timed out after {self.timeout}s")
+        if self._rng.random() < self.error_rate:
+            raise LLMError("fake backend error")
+        return self.recorded.get(prompt_key(prompt)) or canned_response(prompt)
+
+
+class RecordingBackend(LLMBackend):
+    """Wrap a backend and append every prompt/response pair to a JSONL file"""
+
+    def __init__(self, inner, path):
+        self.inner = inner
+        self.name = inner.name
+        self.path = path
+        self._lock = threading.Lock()
+
+    def generate(self, prompt):
+        return self._record(prompt, self.inner.generate(prompt))
+
+    async def agenerate(self, prompt):
+        return self._record(prompt, await self.inner.agenerate(prompt))
+
+    def _record(self, prompt, response):
+        text = response.text if isinstance(response, LLMResult) else response
+        line = json.dumps({"prompt_sha1": prompt_key(prompt), "prompt": prompt, "response": text})
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+        return response
+
+
+# ==================== PROCESS-WIDE CLIENT ====================
+
+class _LLM:
+    """Process-wide entry point; the backend is chosen by init_app.
+
+    Listeners are called after every call as
+    ``listener(backend_name, seconds, error, prompt_tokens, output_tokens)``
+    (token counts are estimated when the backend reports none).
+    """
+
+    def __init__(self):
+        self.backend = GeminiBackend()
+        self.max_concurrency = 256
+        self._slots = None  # asyncio.Semaphore, bound to the loop that created it
+        self.listeners = []
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.seconds = 0.0
+
+    def add_listener(self, listener):
+        if listener not in self.listeners:
+            self.listeners.append(listener)
+
+    def generate(self, prompt):
+        """Text response for ``prompt``, stripped; raises on backend errors"""
+        started = time.perf_counter()
+        result = error = None
+        try:
+            result = self.backend.generate(prompt)
+            if not isinstance(result, LLMResult):
+                result = LLMResult(result)
+            return result.text.strip()
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._record(prompt, result, error, time.perf_counter() - started)
+
+    async def agenerate(self, prompt):
+        """Async generate(), capped at ``max_concurrency`` calls in flight"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        async with self._slots:
+            started = time.perf_counter()
+            result = error = None
+            try:
+                result = await self.backend.agenerate(prompt)
+                if not isinstance(result, LLMResult):
+                    result = LLMResult(result)
+                return result.text.strip()
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                self._record(prompt, result, error, time.perf_counter() - started)
+
+    def _record(self, prompt, result, error, seconds):
+        with self._lock:
+            self.calls += 1
+            self.errors += error is not None
+            self.seconds += seconds
+
+        prompt_tokens = output_tokens = 0
+        if result is not None:
+            prompt_tokens = result.prompt_tokens or estimate_tokens(prompt)
+            output_tokens = result.output_tokens or estimate_tokens(result.text)
+        for listener in self.listeners:
+            try:
+                listener(self.backend.name, seconds, error, prompt_tokens, output_tokens)
+            except Exception as e:
+                print(f"Error in LLM listener: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {"backend": self.backend.name, "calls": self.calls,
+                    "errors": self.errors, "seconds": round(self.seconds, 3)}
+
+
+llm = _LLM()
+
+
+def create_backend(config):
+    name = config.get("LLM_BACKEND", "gemini")
+    timeout = config.get("LLM_TIMEOUT")
+    if name == "gemini":
+        backend = GeminiBackend(config.get("GEMINI_MODEL", "gemini-flash-lite-latest"), timeout=timeout)
+    elif name == "fake":
+        backend = FakeBackend(
+            latency=config.get("FAKE_LLM_LATENCY", "fixed:0"),
+            error_rate=config.get("FAKE_LLM_ERROR_RATE", 0.0),
+            timeout=timeout,
+            responses_path=config.get("FAKE_LLM_RESPONSES"),
+            seed=config.get("FAKE_LLM_SEED")
+        )
+    else:
+        raise ValueError(f"unknown LLM_BACKEND {name!r} (expected gemini or fake)")
+
+    if config.get("LLM_RECORD_PATH"):
+        backend = RecordingBackend(backend, config["LLM_RECORD_PATH"])
+    return backend
+
+
+def init_app(app):
+    llm.backend = create_backend(app.config)
+    llm.max_concurrency = app.config.get("LLM_ASYNC_CONCURRENCY", 256)
+    llm._slots = None
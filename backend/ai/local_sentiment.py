@@ -0,0 +1,236 @@
+# ai/local_sentiment.py - Fast local sentiment with a confidence estimate
+#
+# Two models share one interface:
+#   - a lexicon scorer (negation, intensifiers, "but" contrast), always available
+#   - an optional TF-IDF + logistic regression model trained on posts the LLM
+#     already labeled (flask --app app data train-sentiment)
+# Both return a confidence in [0, 1] so callers can escalate unclear texts.
+
+import math
+import os
+import pickle
+import re
+import threading
+
+# Word weights, roughly -4 (very negative) to +4 (very positive)
+LEXICON = {
+    # positive
+    "good": 2, "great": 3, "excellent": 3.5, "amazing": 3.5, "awesome": 3.5,
+    "wonderful": 3.5, "best": 3, "nice": 2, "love": 3, "happy": 3, "glad": 2.5,
+    "thanks": 2.5, "thank": 2.5, "appreciate": 2.5, "appreciated": 2.5,
+    "helpful": 2.5, "fixed": 2.5, "resolved": 2.5, "improved": 2.5, "clean": 2,
+    "safe": 1.5, "quick": 1.5, "fast": 1.5, "satisfied": 2.5, "working": 1,
+    "smooth": 2, "friendly": 2, "well": 1,
+    # negative
+    "bad": -2.5, "worst": -3.5, "terrible": -3.5, "awful": -3.5, "horrible": -3.5,
+    "pathetic": -3.5, "disgusting": -3.5, "useless": -3, "poor": -2.5,
+    "broken": -2.5, "dirty": -2.5, "filthy": -3, "unsafe": -3, "dangerous": -3,
+    "leak": -2, "leaking": -2, "pothole": -2, "potholes": -2, "smell": -1.5,
+    "stinks": -2.5, "overflowing": -2.5, "flooded": -2.5, "outage": -2.5,
+    "delay": -1.5, "delayed": -2, "slow": -1.5, "ignored": -2.5, "rude": -3,
+    "corrupt": -3, "hate": -3, "angry": -3, "furious": -3.5, "frustrated": -2.5,
+    "frustrating": -2.5, "disappointed": -2.5, "disappointing": -2.5, "sad": -2,
+    "upset": -2.5, "unacceptable": -3, "problem": -1.5, "problems": -1.5,
+    "issue": -1, "issues": -1, "complaint": -1.5, "waste": -2, "stolen": -2.5,
+    "crowded": -1.5, "noisy": -1.5, "fail": -2.5, "failed": -2.5,
+}
+
+EMOTIONS = {
+    "angry": {"angry", "furious", "pathetic", "disgusting", "hate", "rude", "corrupt", "unacceptable"},
+    "frustrated": {"frustrated", "frustrating", "ignored", "useless", "delay", "delayed", "slow", "again", "still"},
+    "sad": {"sad", "disappointed", "disappointing", "upset", "unfortunately"},
+    "happy": {"happy", "glad", "love", "great", "amazing", "awesome", "wonderful", "excellent"},
+    "satisfied": {"thanks", "thank", "appreciate", "appreciated", "fixed", "resolved", "improved", "satisfied", "helpful"},
+}
+
+# Local tags use the same categories as the decision-support resource map
+TAG_KEYWORDS = {
+    "facilities": {"building", "classroom", "hostel", "toilet", "washroom", "water", "leak", "leaking",
+                   "electricity", "power", "fan", "ac", "lift", "repair", "maintenance", "cleaning"},
+    "food": {"canteen", "cafeteria", "mess", "food", "meal", "menu", "lunch", "dinner", "breakfast"},
+    "it": {"wifi", "internet", "network", "portal", "website", "login", "computer", "lab", "printer"},
+    "academic": {"exam", "exams", "class", "classes", "lecture", "faculty", "syllabus", "grades",
+                 "marks", "attendance", "timetable", "assignment"},
+    "transport": {"bus", "buses", "transport", "parking", "shuttle", "route", "traffic"},
+    "hr": {"staff", "harassment", "counseling", "scholarship", "fees", "warden"},
+}
+
+NEGATORS = {"not", "no", "never", "nothing", "nobody", "hardly", "without", "cannot"}
+INTENSIFIERS = {"very": 1.3, "really": 1.3, "extremely": 1.5, "so": 1.2, "totally": 1.3,
+                "completely": 1.4, "absolutely": 1.4, "too": 1.2}
+NEGATION_SCOPE = 3
+
+_TOKEN_RE = re.compile(r"[a-z]+(?:'[a-z]+)?")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(text.lower())
+
+
+def key_point(text, max_length=160):
+    """Extractive key point: the first sentence, trimmed"""
+    sentence = _SENTENCE_RE.split(" ".join(text.split()), 1)[0]
+    return sentence if len(sentence) <= max_length else sentence[:max_length - 3].rstrip() + "..."
+
+
+def keyword_tags(text, limit=5):
+    """Tags whose keywords appear in the text, most matches first"""
+    tokens = set(tokenize(text))
+    matches = [(len(tokens & words), tag) for tag, words in TAG_KEYWORDS.items()]
+    return [tag for hits, tag in sorted(matches, reverse=True) if hits][:limit]
+
+
+def _label(score):
+    if score > 0.05:
+        return "positive"
+    if score < -0.05:
+        return "negative"
+    return "neutral"
+
+
+def _emotion(tokens, sentiment):
+    counts = {emotion: sum(token in words for token in tokens) for emotion, words in EMOTIONS.items()}
+    emotion, hits = max(counts.items(), key=lambda item: item[1])
+    if hits == 0:
+        return {"positive": "satisfied", "negative": "frustrated"}.get(sentiment, "neutral")
+    return emotion
+
+
+class LocalSentimentAnalyzer:
+    """Microsecond-scale sentiment: lexicon by default, trained model if loaded"""
+
+    def __init__(self):
+        self.model = None  # sklearn pipeline from train(), if any
+        self.model_path = None  # loaded on first analyze(); see use_model()
+        self._load_lock = threading.Lock()
+
+    # ==================== LEXICON ====================
+
+    def _lexicon_scores(self, tokens):
+        """(positive weight, negative weight, sentiment words, saw contrast)"""
+        positive = negative = 0.0
+        hits = 0
+        contrast = False
+        negate_left = 0
+        boost = 1.0
+        clause_weight = 1.0
+
+        for token in tokens:
+            if token == "but":
+                # What follows "but" usually carries the writer's point
+                contrast = True
+                positive *= 0.5
+                negative *= 0.5
+                clause_weight = 1.5
+                negate_left = 0
+                continue
+            if token in NEGATORS or token.endswith("n't"):
+                negate_left = NEGATION_SCOPE
+                continue
+            if token in INTENSIFIERS:
+                boost = INTENSIFIERS[token]
+                continue
+
+            weight = LEXICON.get(token)
+            if weight is not None:
+                weight *= boost * clause_weight
+                if negate_left:
+                    weight *= -0.75
+                if weight > 0:
+                    positive += weight
+                else:
+                    negative -= weight
+                hits += 1
+            boost = 1.0
+            negate_left = max(negate_left - 1, 0)
+
+        return positive, negative, hits, contrast
+
+    def _analyze_lexicon(self, text):
+        tokens = tokenize(text)
+        positive, negative, hits, contrast = self._lexicon_scores(tokens)
+        total = positive - negative
+        # Same normalisation as VADER's compound score
+        score = total / math.sqrt(total * total + 15) if total else 0.0
+
+        if hits == 0:
+            confidence = 0.0
+        else:
+            agreement = abs(positive - negative) / (positive + negative)
+            strength = 1 - math.exp(-(positive + negative) / 1.5)
+            # A few sentiment words say little about a long post
+            length_penalty = 1 / (1 + max(len(tokens) - 25, 0) / 50)
+            confidence = agreement * strength * length_penalty * (0.8 if contrast else 1.0)
+
+        sentiment = _label(score)
+        return {
+            "sentiment": sentiment,
+            "score": round(score, 3),
+            "confidence": round(confidence, 3),
+            "emotion": _emotion(tokens, sentiment)
+        }
+
+    # ==================== TRAINED MODEL ====================
+
+    def _analyze_model(self, text):
+        probabilities = dict(zip(self.model.classes_, self.model.predict_proba([text])[0]))
+        sentiment = str(max(probabilities, key=probabilities.get))
+        score = probabilities.get("positive", 0.0) - probabilities.get("negative", 0.0)
+        return {
+            "sentiment": sentiment,
+            "score": round(float(score), 3),
+            "confidence": round(float(probabilities[sentiment]), 3),
+            "emotion": _emotion(tokenize(text), sentiment)
+        }
+
+    def train(self, texts, labels):
+        """Fit a TF-IDF + logistic regression model on labeled texts"""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.pipeline import make_pipeline
+
+        model = make_pipeline(
+            TfidfVectorizer(ngram_range=(1, 2), min_df=2, sublinear_tf=True),
+            LogisticRegression(max_iter=1000, class_weight="balanced")
+        )
+        model.fit(texts, labels)
+        self.model = model
+        self.model_path = None  # don't let a pending load replace it
+        return model
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            pickle.dump(self.model, f)
+
+    def load(self, path):
+        """Load a trained model if ``path`` exists; returns whether one was loaded"""
+        if not path or not os.path.exists(path):
+            return False
+        with open(path, "rb") as f:
+            self.model = pickle.load(f)
+        return True
+
+    def use_model(self, path):
+        """Load the model at ``path`` on first analyze() instead of now
+        (unpickling it imports scikit-learn, which is slow to import)"""
+        self.model_path = path
+
+    def _load_pending_model(self):
+        with self._load_lock:
+            path, self.model_path = self.model_path, None
+            if path and self.load(path):
+                print(f"Loaded local sentiment model from {path}")
+
+    # ==================== PUBLIC ====================
+
+    def analyze(self, text):
+        """Returns {sentiment, score (-1..1), confidence (0..1), emotion}"""
+        if self.model_path is not None:
+            self._load_pending_model()
+        if self.model is not None:
+            return self._analyze_model(text)
+        return self._analyze_lexicon(text)
+
+
+local_sentiment = LocalSentimentAnalyzer()
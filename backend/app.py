@@ -1,13 +1,16 @@
 from flask import Flask, send_from_directory, jsonify
-from flask_jwt_extended import JWTManager
 from flask_cors import CORS
-from config import Config
+from config import get_config
 from database import db
 from routes.auth import auth
 from routes.topics import topics
 from routes.posts import posts
 from routes.moderation import moderation
 from routes.ai_endpoints import ai_routes  # Make sure AI routes are imported
+from services import counters, poll_tally, events, responses, passwords, sentiment, metrics, query_profiler, sqlite_profile, read_replica, trending, archive, retention, stakeholders, resource_catalog, embeddings, schema
+from services.auth_tokens import CachingJWTManager
+from ai import llm
+import commands
 from dotenv import load_dotenv
 import traceback
 import os
@@ -15,92 +18,165 @@ import os
 # Load environment variables from .env file
 load_dotenv()
 
-app = Flask(__name__, static_folder='static')
-app.config.from_object(Config)
-
-# ==================== FIX: Configure CORS properly ====================
-# Remove duplicate CORS calls, use this single configuration:
-CORS(app, 
-     resources={r"/*": {"origins": "*"}},
-     supports_credentials=True,
-     allow_headers=["Content-Type", "Authorization", "Access-Control-Allow-Credentials"],
-     methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
-
-db.init_app(app)
-
-# Configure JWT
-jwt = JWTManager(app)
-
-# Handle JWT errors
-@jwt.expired_token_loader
-def expired_token_callback(jwt_header, jwt_payload):
-    return jsonify({'error': 'Token has expired'}), 401
-
-@jwt.invalid_token_loader
-def invalid_token_callback(error):
-    return jsonify({'error': 'Invalid token', 'message': str(error)}), 422
-
-@jwt.unauthorized_loader
-def missing_token_callback(error):
-    return jsonify({'error': 'Missing token', 'message': str(error)}), 401
-
-# Global error handler
-@app.errorhandler(Exception)
-def handle_error(e):
-    app.logger.error(f"Error: {str(e)}")
-    app.logger.error(traceback.format_exc())
-    return jsonify({'error': str(e)}), 500
-
-# ==================== Register Blueprints ====================
-app.register_blueprint(auth, url_prefix="/auth")
-app.register_blueprint(topics, url_prefix="/api")
-app.register_blueprint(posts, url_prefix="/api")
-app.register_blueprint(moderation, url_prefix="/api")
-
-# ==================== CRITICAL: Register AI routes ====================
-# Make sure AI routes are registered
-try:
-    app.register_blueprint(ai_routes, url_prefix="/api")
-    print("  AI routes registered successfully")
-except Exception as e:
-    print(f"    Warning: Failed to register AI routes: {e}")
-    # Create a dummy AI blueprint if it doesn't exist
-    from flask import Blueprint
-    ai_dummy = Blueprint("ai", __name__)
-    @ai_dummy.route("/ai/sentiment-timeline/<int:topic_id>")
-    def dummy_sentiment(topic_id):
-        return jsonify({"timeline": [], "error": "AI routes not fully configured"})
-    app.register_blueprint(ai_dummy, url_prefix="/api")
-
-@app.route('/')
-def index():
-    return send_from_directory('static', 'index.html')
-
-@app.route('/health')
-def health():
-    """Health check endpoint"""
-    gemini_configured = bool(os.getenv('GEMINI_API_KEY'))
-    return jsonify({
-        'status': 'healthy',
-        'gemini_api_configured': gemini_configured,
-        'endpoints': {
-            'auth': ['/auth/login', '/auth/register', '/auth/me'],
-            'topics': ['/api/topics', '/api/topics/<id>'],
-            'ai': ['/api/ai/sentiment-timeline/<id>', '/api/ai/summary/<id>', '/api/ai/similar/<id>', '/api/ai/predictions/<id>']
-        }
-    })
-
-# ==================== Add OPTIONS handler for preflight requests ====================
-@app.after_request
-def after_request(response):
-    response.headers.add('Access-Control-Allow-Origin', '*')
-    response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
-    response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
-    response.headers.add('Access-Control-Allow-Credentials', 'true')
-    return response
-
-with app.app_context():
-    db.create_all()
+
+def create_app(config_name=None):
+    """Build the app for a config profile (APP_CONFIG: development,
+    production or testing; defaults to development).
+
+    Nothing here touches the AI stack: NumPy, scikit-learn, the trained
+    sentiment model and the Gemini client load on first use. The schema is
+    only created here when CREATE_SCHEMA is set (development and testing);
+    otherwise run `flask --app app init-db` once per deploy.
+    """
+    app = Flask(__name__, static_folder='static')
+    app.config.from_object(get_config(config_name))
+
+    # LLM backend (LLM_BACKEND=gemini|fake)
+    llm.init_app(app)
+    # orjson-backed JSON and Accept-Encoding negotiated compression
+    responses.init_app(app)
+    # Password hashing process pool
+    passwords.init_app(app)
+
+    # ==================== FIX: Configure CORS properly ====================
+    # Remove duplicate CORS calls, use this single configuration:
+    CORS(app,
+         resources={r"/*": {"origins": "*"}},
+         supports_credentials=True,
+         allow_headers=["Content-Type", "Authorization", "Access-Control-Allow-Credentials"],
+         methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
+
+    db.init_app(app)
+    # WAL, pragmas and serialized writes when the database is a SQLite file
+    sqlite_profile.init_app(app)
+    # Trending settings (and SQLite math functions for the hot score UPDATEs)
+    trending.init_app(app)
+    # Read-your-writes tracking for @use_replica views (DATABASE_REPLICA_URL)
+    read_replica.init_app(app)
+    # Prometheus metrics at /metrics (request, SQL, LLM, cache and pool stats)
+    metrics.init_app(app)
+    # Sampled per-request SQL profiling (N+1 and slow-query logging)
+    query_profiler.init_app(app)
+
+    # Configure JWT (verified tokens are cached, see services/auth_tokens.py)
+    jwt = CachingJWTManager(app)
+
+    # Handle JWT errors
+    @jwt.expired_token_loader
+    def expired_token_callback(jwt_header, jwt_payload):
+        return jsonify({'error': 'Token has expired'}), 401
+
+    @jwt.invalid_token_loader
+    def invalid_token_callback(error):
+        return jsonify({'error': 'Invalid token', 'message': str(error)}), 422
+
+    @jwt.unauthorized_loader
+    def missing_token_callback(error):
+        return jsonify({'error': 'Missing token', 'message': str(error)}), 401
+
+    # Global error handler
+    @app.errorhandler(Exception)
+    def handle_error(e):
+        app.logger.error(f"Error: {str(e)}")
+        app.logger.error(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+
+    register_blueprints(app)
+
+    @app.route('/')
+    def index():
+        return send_from_directory('static', 'index.html')
+
+    @app.route('/health')
+    def health():
+        """Health check endpoint"""
+        gemini_configured = bool(os.getenv('GEMINI_API_KEY'))
+        return jsonify({
+            'status': 'healthy',
+            'gemini_api_configured': gemini_configured,
+            'llm_backend': app.config['LLM_BACKEND'],
+            'endpoints': {
+                'auth': ['/auth/login', '/auth/register', '/auth/me'],
+                'metrics': ['/metrics'],
+                'topics': ['/api/topics', '/api/topics/trending', '/api/topics/<id>'],
+                'ai': ['/api/ai/sentiment-timeline/<id>', '/api/ai/summary/<id>', '/api/ai/similar/<id>', '/api/ai/predictions/<id>']
+            }
+        })
+
+    # ==================== Add OPTIONS handler for preflight requests ====================
+    @app.after_request
+    def after_request(response):
+        response.headers.add('Access-Control-Allow-Origin', '*')
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
+        response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
+        response.headers.add('Access-Control-Allow-Credentials', 'true')
+        return response
+
+    if app.config['CREATE_SCHEMA']:
+        with app.app_context():
+            schema.upgrade_schema()
+            resource_catalog.seed_default_catalog()
+
+    # Background folding of sharded topic counters (no-op in atomic mode)
+    counters.init_app(app)
+    # Buffered poll vote counts
+    poll_tally.init_app(app)
+    # Live topic events (in-process, or via EVENT_BROKER_URL across workers)
+    events.init_app(app)
+    # Periodic move of cold topics to the archive tables (ARCHIVE_INTERVAL)
+    archive.init_app(app)
+    # Summary pruning and sentiment history downsampling (RETENTION_INTERVAL)
+    retention.init_app(app)
+    # Local-first sentiment (the trained model loads on first use)
+    sentiment.init_app(app)
+    # Stakeholder lexicon (STAKEHOLDER_LEXICON_PATH)
+    stakeholders.init_app(app)
+    # Resource catalog router cache (RESOURCE_CATALOG_TTL)
+    resource_catalog.init_app(app)
+    # Topic embedding refits (EMBEDDING_REFIT_INTERVAL)
+    embeddings.init_app(app)
+    # CLI: flask --app app init-db | replica-sync | data import|analyze|recompute|archive|retention|export|train-sentiment
+    commands.init_app(app)
+
+    return app
+
+
+def register_blueprints(app):
+    app.register_blueprint(auth, url_prefix="/auth")
+    app.register_blueprint(topics, url_prefix="/api")
+    app.register_blueprint(posts, url_prefix="/api")
+    app.register_blueprint(moderation, url_prefix="/api")
+
+    # ==================== CRITICAL: Register AI routes ====================
+    # Make sure AI routes are registered
+    try:
+        app.register_blueprint(ai_routes, url_prefix="/api")
+        print("  AI routes registered successfully")
+    except Exception as e:
+        print(f"    Warning: Failed to register AI routes: {e}")
+        # Create a dummy AI blueprint if it doesn't exist
+        from flask import Blueprint
+        ai_dummy = Blueprint("ai", __name__)
+        @ai_dummy.route("/ai/sentiment-timeline/<int:topic_id>")
+        def dummy_sentiment(topic_id):
+            return jsonify({"timeline": [], "error": "AI routes not fully configured"})
+        app.register_blueprint(ai_dummy, url_prefix="/api")
+
+
+_app = None
+
+
+def __getattr__(name):
+    # `app:app` (gunicorn), `flask --app app` and `from app import app` keep
+    # working, but the app is only built when asked for - importing
+    # create_app alone (tests, scripts) builds nothing
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == '__main__':
     # Check for API key
@@ -108,7 +184,7 @@ if __name__ == '__main__':
         print("\n    WARNING: GEMINI_API_KEY not set!")
         print("Please set it in your .env file or environment variables.")
         print("Get your API key from: https://aistudio.google.com/app/apikey\n")
-    
+
     print("\n" + "="*60)
     print("  Redressal Backend Starting...")
     print("="*60)
@@ -117,5 +193,5 @@ if __name__ == '__main__':
     print(f"  Health check: http://localhost:5000/health")
     print(f"  AI Endpoints: http://localhost:5000/api/ai/sentiment-timeline/1")
     print("="*60 + "\n")
-    
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+
+    create_app().run(debug=True, host='0.0.0.0', port=5000)
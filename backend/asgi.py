@@ -0,0 +1,13 @@
+# asgi.py - ASGI entry point (async serving mode)
+#
+#   uvicorn asgi:app --workers 2
+#   gunicorn asgi:app -k uvicorn.workers.UvicornWorker
+#
+# LLM-bound routes (routes/ai_async.py) run natively async; everything else
+# is the regular Flask app behind a bounded thread pool (services/asgi.py).
+
+from app import create_app
+from routes.ai_async import async_routes
+from services.asgi import AsgiApp
+
+app = AsgiApp(create_app(), async_routes)
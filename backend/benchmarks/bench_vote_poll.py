@@ -0,0 +1,157 @@
+# benchmarks/bench_vote_poll.py - Sustained poll voting throughput on one node
+#
+# Usage (from backend/):
+#   python benchmarks/bench_vote_poll.py --votes 20000 --processes 4 --threads 4
+#
+# --processes forks that many worker processes (like gunicorn workers),
+# each running --threads concurrent voters. Requests are built up front and
+# handed to the WSGI app directly, as a server would after parsing them, so
+# the timing covers the server side (routing, auth, the vote) and not the
+# test client's request building, which a real load generator does elsewhere.
+# Runs against a throwaway SQLite database unless DATABASE_URL is set.
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from werkzeug.test import EnvironBuilder
+
+from common import percentile
+
+
+def vote_environ(token, option_id):
+    """WSGI environ of one POST /api/poll/vote request"""
+    builder = EnvironBuilder(path="/api/poll/vote", method="POST", json={"option_id": option_id},
+                             headers={"Authorization": f"Bearer {token}"})
+    try:
+        return builder.get_environ()
+    finally:
+        builder.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--votes", type=int, default=20000, help="total votes to cast")
+    parser.add_argument("--polls", type=int, default=20, help="number of polls")
+    parser.add_argument("--options", type=int, default=4, help="options per poll")
+    parser.add_argument("--processes", type=int, default=1, help="worker processes")
+    parser.add_argument("--threads", type=int, default=8, help="concurrent voters per process")
+    parser.add_argument("--target", type=float, default=1000, help="required votes/sec")
+    args = parser.parse_args()
+
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+
+    from app import app
+    from database import db
+    from flask_jwt_extended import create_access_token
+    from models import PollOption, Topic, User
+    from services.poll_tally import poll_tally
+
+    users_needed = -(-args.votes // args.polls)
+
+    with app.app_context():
+        db.session.execute(db.insert(User), [
+            {"email": f"bench{i}@example.com", "password": "x", "role": "user"}
+            for i in range(users_needed)
+        ])
+        user_ids = [row.id for row in db.session.query(User.id).order_by(User.id).limit(users_needed)]
+
+        option_ids = []
+        for p in range(args.polls):
+            topic = Topic(title=f"Bench poll {p}", created_by=user_ids[0], has_poll=True,
+                          poll_question="Which option?")
+            db.session.add(topic)
+            db.session.flush()
+            options = [PollOption(topic_id=topic.id, option_text=f"Option {o}") for o in range(args.options)]
+            db.session.add_all(options)
+            db.session.flush()
+            option_ids.append([o.id for o in options])
+        db.session.commit()
+
+        tokens = {uid: create_access_token(identity=str(uid)) for uid in user_ids}
+
+    # Every (user, poll) pair votes once, spread over the poll's options
+    work = []
+    for i in range(args.votes):
+        uid = user_ids[i // args.polls]
+        options = option_ids[i % args.polls]
+        work.append(vote_environ(tokens[uid], options[(i // args.polls) % len(options)]))
+
+    def run_worker(chunk, results):
+        """Cast a share of the votes from one process; report latencies and failures"""
+        with app.app_context():
+            db.engine.dispose()  # never share pooled connections across fork
+
+        latencies, failures = [], []
+        lock = threading.Lock()
+
+        def voter(votes):
+            local, failed = [], []
+            for environ in votes:
+                statuses = []
+                started = time.perf_counter()
+                body = app(environ, lambda status, headers, exc_info=None: statuses.append(status))
+                b"".join(body)
+                body.close()
+                local.append(time.perf_counter() - started)
+                status = int(statuses[-1].split()[0])
+                if status != 200:
+                    failed.append(status)
+            with lock:
+                latencies.extend(local)
+                failures.extend(failed)
+
+        threads = [threading.Thread(target=voter, args=(chunk[t::args.threads],))
+                   for t in range(args.threads)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        with app.app_context():
+            poll_tally.flush()
+        results.put((latencies, failures))
+
+    ctx = multiprocessing.get_context("fork")
+    results = ctx.Queue()
+    workers = [ctx.Process(target=run_worker, args=(work[p::args.processes], results))
+               for p in range(args.processes)]
+
+    started = time.perf_counter()
+    for w in workers:
+        w.start()
+    latencies, failures = [], []
+    for _ in workers:
+        worker_latencies, worker_failures = results.get()
+        latencies.extend(worker_latencies)
+        failures.extend(worker_failures)
+    elapsed = time.perf_counter() - started
+    for w in workers:
+        w.join()
+
+    with app.app_context():
+        poll_tally.flush()
+        stored = db.session.query(db.func.sum(PollOption.vote_count)).scalar() or 0
+
+    latencies.sort()
+    rate = len(latencies) / elapsed
+    print(f"votes:        {len(latencies)} in {elapsed:.2f}s "
+          f"({args.processes} processes x {args.threads} threads)")
+    print(f"throughput:   {rate:,.0f} votes/sec (target {args.target:,.0f})")
+    print(f"latency ms:   p50={percentile(latencies, 50) * 1000:.2f} "
+          f"p95={percentile(latencies, 95) * 1000:.2f} p99={percentile(latencies, 99) * 1000:.2f}")
+    print(f"failures:     {len(failures)}")
+    print(f"stored tally: {stored} (expected {args.votes - len(failures)})")
+
+    ok = rate >= args.target and not failures and stored == args.votes
+    print("PASS" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
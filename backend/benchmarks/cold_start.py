@@ -0,0 +1,79 @@
+# benchmarks/cold_start.py - Worker cold-start time against a budget
+#
+# Usage (from backend/):
+#   python benchmarks/cold_start.py --runs 5 --budget-ms 800
+#
+# Each run is a fresh interpreter that imports app.py and calls
+# create_app(), the same work a new gunicorn worker does before serving.
+# Reports median/max import and build time and fails (exit status 1) if the
+# median total exceeds the budget or if a heavy module that should load
+# lazily was imported during startup.
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from common import BACKEND_DIR, use_fake_llm
+
+# Must not be imported until a request needs them
+LAZY_MODULES = ["numpy", "sklearn", "scipy", "google.generativeai"]
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app({profile!r})
+built = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "create_app_ms": (built - imported) * 1000,
+    "loaded": [m for m in {lazy!r} if m in sys.modules],
+}}))
+"""
+
+
+def measure(profile, runs):
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "cold.db"))
+    code = PROBE.format(profile=profile, lazy=LAZY_MODULES)
+    samples = []
+    for _ in range(runs):
+        output = subprocess.check_output([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env, text=True)
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure worker cold-start time")
+    parser.add_argument("--profile", default="development", help="APP_CONFIG profile to build")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=800,
+                        help="fail if the median import + create_app time exceeds this")
+    args = parser.parse_args()
+
+    use_fake_llm()
+    samples = measure(args.profile, args.runs)
+    totals = sorted(s["import_ms"] + s["create_app_ms"] for s in samples)
+    median = statistics.median(totals)
+    print(f"import      median {statistics.median(s['import_ms'] for s in samples):8.1f} ms")
+    print(f"create_app  median {statistics.median(s['create_app_ms'] for s in samples):8.1f} ms")
+    print(f"total       median {median:8.1f} ms  max {totals[-1]:8.1f} ms  (budget {args.budget_ms:.0f} ms)")
+
+    failed = False
+    loaded = sorted({m for s in samples for m in s["loaded"]})
+    if loaded:
+        print(f"FAIL: loaded at startup: {', '.join(loaded)}")
+        failed = True
+    if median > args.budget_ms:
+        print("FAIL: over budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+# benchmarks/compare.py - Flag regressions between two benchmark runs
+#
+# Usage (from backend/):
+#   python benchmarks/compare.py benchmarks/baselines/sqlite-2k-topics.json results.json --threshold 0.2
+#
+# A scenario regresses when p95 or p99 latency grows, or throughput drops, by
+# more than the threshold, or when it starts returning errors. Exit status 1
+# means at least one regression.
+
+import argparse
+import json
+import sys
+
+# metric -> +1 if higher is worse, -1 if lower is worse
+METRICS = {"p95_ms": 1, "p99_ms": 1, "throughput_rps": -1}
+
+
+def compare(baseline, current, threshold=0.2):
+    report = {"regressions": [], "improvements": [], "missing": [], "rows": []}
+    for name, before in baseline["scenarios"].items():
+        after = current["scenarios"].get(name)
+        if after is None:
+            report["missing"].append(name)
+            continue
+        for metric, direction in METRICS.items():
+            old, new = before.get(metric, 0), after.get(metric, 0)
+            change = (new - old) / old if old else 0.0
+            row = {"scenario": name, "metric": metric, "baseline": old, "current": new,
+                   "change": round(change, 4)}
+            report["rows"].append(row)
+            if change * direction > threshold:
+                report["regressions"].append(row)
+            elif change * direction < -threshold:
+                report["improvements"].append(row)
+        if after.get("errors", 0) > before.get("errors", 0):
+            report["regressions"].append({"scenario": name, "metric": "errors",
+                                          "baseline": before.get("errors", 0),
+                                          "current": after["errors"], "change": None})
+    return report
+
+
+def print_report(report):
+    print(f"{'scenario':24s} {'metric':15s} {'baseline':>10s} {'current':>10s} {'change':>8s}")
+    flagged = {(r["scenario"], r["metric"]) for r in report["regressions"]}
+    for row in report["rows"]:
+        mark = "  REGRESSION" if (row["scenario"], row["metric"]) in flagged else ""
+        print(f"{row['scenario']:24s} {row['metric']:15s} {row['baseline']:10.2f} "
+              f"{row['current']:10.2f} {row['change']:+8.1%}{mark}")
+    for row in report["regressions"]:
+        if row["metric"] == "errors":
+            print(f"{row['scenario']:24s} errors          {row['baseline']:10d} {row['current']:10d}  REGRESSION")
+    for name in report["missing"]:
+        print(f"{name:24s} missing from the current run")
+    print(f"{len(report['regressions'])} regressions, {len(report['improvements'])} improvements")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    report = compare(baseline, current, args.threshold)
+    print_report(report)
+    return 1 if report["regressions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
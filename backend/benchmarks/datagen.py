@@ -0,0 +1,198 @@
+# benchmarks/datagen.py - Synthetic grievance datasets for benchmarking
+#
+# Usage (from backend/):
+#   DATABASE_URL=sqlite:////tmp/bench.db python benchmarks/datagen.py --topics 10000 --posts 1000000
+#
+# Rows are bulk-inserted (no per-post analysis), then topic aggregates are
+# rebuilt with the same set-based pass as `flask data recompute`. The same
+# --seed always produces the same dataset.
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from common import use_fake_llm
+
+BATCH_SIZE = 5000
+
+# (tag, subjects, places) - tags match the local tagger's categories
+CATEGORIES = [
+    ("facilities", ["water cooler", "washroom", "ceiling fan", "lift", "AC", "power supply", "roof"],
+     ["block A", "the hostel", "the library", "the main building", "lab 3"]),
+    ("food", ["canteen food", "mess menu", "lunch queue", "cafeteria hygiene", "food prices"],
+     ["the canteen", "the mess", "the food court", "the night canteen"]),
+    ("it", ["wifi", "student portal", "lab computers", "printer", "exam registration site"],
+     ["the hostel", "the library", "the CS lab", "campus"]),
+    ("academic", ["exam schedule", "attendance policy", "syllabus coverage", "grading", "timetable"],
+     ["the ECE department", "first year", "the math department", "the final semester"]),
+    ("transport", ["bus timings", "parking", "shuttle service", "bus route"],
+     ["the north gate", "the city route", "the staff parking", "the evening shift"]),
+    ("hr", ["scholarship delays", "fee refunds", "counseling access", "warden behaviour"],
+     ["the admin office", "the accounts section", "the hostel office"]),
+]
+
+OPENERS = {
+    "negative": ["The {s} in {p} is terrible again.", "Still no fix for the {s} in {p}, this is unacceptable.",
+                 "Worst experience with the {s} at {p}.", "The {s} in {p} has been broken for a week."],
+    "positive": ["Thanks for fixing the {s} in {p}!", "The {s} at {p} is much better now, great work.",
+                 "Really happy with the new {s} in {p}."],
+    "neutral": ["Is there an update on the {s} in {p}?", "Who handles the {s} for {p}?",
+                "Posting about the {s} in {p} for the record."],
+}
+DETAILS = ["Many students have raised this.", "It affects classes every day.", "Please look into it soon.",
+           "This came up in the last student council meeting.", "Photos attached in the group.", ""]
+EMOTIONS = {"negative": ["frustrated", "angry", "sad"], "positive": ["satisfied", "happy"], "neutral": ["neutral"]}
+SCORES = {"negative": -0.6, "positive": 0.6, "neutral": 0.0}
+
+
+def batched(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def generate(args):
+    from app import app
+    from database import db
+    from models import PollOption, PollVote, Post, SentimentHistory, Topic, User
+    from services.bulk_io import recompute_topic_aggregates
+    from services.moderation_queue import priority_rank
+    from services.poll_tally import recount_vote_tallies
+
+    rng = random.Random(args.seed)
+    now = datetime.utcnow()
+    span = timedelta(days=args.days)
+
+    def insert(model, rows):
+        count = 0
+        for batch in batched(rows):
+            db.session.execute(db.insert(model), batch)
+            db.session.commit()
+            count += len(batch)
+        return count
+
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+
+        first_user = (db.session.query(db.func.max(User.id)).scalar() or 0) + 1
+        insert(User, ({"email": f"datagen{first_user + i}@example.com", "password": "x",
+                       "role": "moderator" if i == 0 else "user"} for i in range(args.users)))
+        user_ids = list(range(first_user, first_user + args.users))
+
+        first_topic = (db.session.query(db.func.max(Topic.id)).scalar() or 0) + 1
+        topics = []
+        for i in range(args.topics):
+            tag, subjects, places = rng.choice(CATEGORIES)
+            subject, place = rng.choice(subjects), rng.choice(places)
+            priority = rng.choices(["low", "normal", "high", "critical"], [2, 6, 2, 0.5])[0]
+            has_poll = rng.random() < args.poll_fraction
+            topics.append({
+                "id": first_topic + i,
+                "title": f"{subject.capitalize()} in {place}"[:255],
+                "tags": ",".join(sorted({tag, rng.choice(CATEGORIES)[0]})),
+                "created_by": rng.choice(user_ids),
+                "created_at": now - span * rng.random(),
+                "status": rng.choices(["active", "resolved", "archived"], [7, 2, 1])[0],
+                "priority": priority,
+                "priority_rank": priority_rank(priority),
+                "risk_score": 0.0,
+                "has_poll": has_poll,
+                "poll_question": f"How should we handle the {subject}?" if has_poll else None,
+                "_subject": subject, "_place": place, "_tag": tag,
+            })
+        insert(Topic, ({k: v for k, v in t.items() if not k.startswith("_")} for t in topics))
+
+        def posts():
+            # Skewed: a few hot topics get most of the posts
+            weights = [1 / (rank + 1) ** 0.8 for rank in range(len(topics))]
+            for topic in rng.choices(topics, weights, k=args.posts):
+                sentiment = rng.choices(["negative", "neutral", "positive"], [5, 3, 2])[0]
+                opener = rng.choice(OPENERS[sentiment]).format(s=topic["_subject"], p=topic["_place"])
+                content = f"{opener} {rng.choice(DETAILS)}".strip()
+                yield {
+                    "topic_id": topic["id"],
+                    "author_id": rng.choice(user_ids),
+                    "content": content,
+                    "key_points": opener,
+                    "sentiment": sentiment,
+                    "sentiment_score": SCORES[sentiment],
+                    "sentiment_confidence": round(rng.uniform(0.6, 0.99), 2),
+                    "emotion": rng.choice(EMOTIONS[sentiment]),
+                    "tags": topic["_tag"],
+                    "created_at": topic["created_at"] + (now - topic["created_at"]) * rng.random(),
+                }
+        post_count = insert(Post, posts())
+
+        poll_topics = [t for t in topics if t["has_poll"]]
+        option_rows = [{"topic_id": t["id"], "option_text": f"Option {o + 1}", "vote_count": 0}
+                       for t in poll_topics for o in range(args.poll_options)]
+        insert(PollOption, option_rows)
+        options_by_topic = {}
+        for option_id, topic_id in db.session.query(PollOption.id, PollOption.topic_id).filter(
+                PollOption.topic_id >= first_topic):
+            options_by_topic.setdefault(topic_id, []).append(option_id)
+
+        def votes():
+            for topic in poll_topics:
+                options = options_by_topic.get(topic["id"], [])
+                for user_id in rng.sample(user_ids, min(args.votes_per_poll, len(user_ids))):
+                    yield {"option_id": rng.choice(options), "topic_id": topic["id"], "user_id": user_id}
+        vote_count = insert(PollVote, votes())
+        recount_vote_tallies()
+
+        def history():
+            for topic in topics:
+                score = 0
+                for step in range(args.history):
+                    score += rng.choice([-1, -1, 0, 1])
+                    yield {
+                        "topic_id": topic["id"],
+                        "sentiment_score": score,
+                        "timestamp": topic["created_at"] + (now - topic["created_at"]) * (step + 1) / args.history,
+                    }
+        history_count = insert(SentimentHistory, history())
+
+        recompute_topic_aggregates()
+        elapsed = time.perf_counter() - started
+
+    print(f"users:   {args.users}")
+    print(f"topics:  {args.topics} ({len(poll_topics)} with polls)")
+    print(f"posts:   {post_count}")
+    print(f"votes:   {vote_count}")
+    print(f"history: {history_count} (+1 point per topic from the recompute)")
+    print(f"done in {elapsed:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic benchmark dataset")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--topics", type=int, default=10000)
+    parser.add_argument("--posts", type=int, default=1000000)
+    parser.add_argument("--poll-fraction", type=float, default=0.1, help="share of topics with a poll")
+    parser.add_argument("--poll-options", type=int, default=4)
+    parser.add_argument("--votes-per-poll", type=int, default=50)
+    parser.add_argument("--history", type=int, default=20, help="sentiment history points per topic")
+    parser.add_argument("--days", type=int, default=365, help="spread timestamps over this many days")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+        print(f"DATABASE_URL={os.environ['DATABASE_URL']}")
+    use_fake_llm()
+    generate(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+# benchmarks/run.py - End-to-end benchmark of the hot endpoints
+#
+# Usage (from backend/):
+#   DATABASE_URL=sqlite:////tmp/bench.db python benchmarks/datagen.py --topics 10000 --posts 1000000
+#   DATABASE_URL=sqlite:////tmp/bench.db python benchmarks/run.py --output results.json \
+#       --baseline benchmarks/baselines/sqlite-2k-topics.json
+#
+# Each scenario drives the app through the Flask test client from --threads
+# concurrent clients, against the fake LLM backend (LLM_BACKEND=fake unless
+# set). Results are written as JSON; with --baseline the run is compared and
+# the exit status is 1 on regressions (see compare.py).
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+import warnings
+from datetime import datetime
+
+from common import BACKEND_DIR, summarize, use_fake_llm
+
+SEARCH_QUERIES = ["wifi not working in hostel", "canteen food quality", "bus timings",
+                  "exam schedule clash", "broken washroom", "scholarship delay"]
+POST_TEXTS = ["The water cooler is broken again, please fix it.", "Thanks, the wifi works great now!",
+              "Is there any update on this?", "Same problem in our block, it is terrible.",
+              "The new timetable is much better.", "Still waiting for a response from the office."]
+
+
+class Context:
+    """Ids and tokens the scenarios draw from"""
+
+    def __init__(self, app, args):
+        from database import db
+        from flask_jwt_extended import create_access_token
+        from models import PollOption, Topic, User
+
+        rng = random.Random(args.seed)
+        with app.app_context():
+            self.topic_ids = [row.id for row in db.session.query(Topic.id)]
+            if not self.topic_ids:
+                raise SystemExit("No topics in the database; run benchmarks/datagen.py first")
+            moderator = User.query.filter(User.role.in_(["moderator", "admin"])).first() or User.query.first()
+            self.token = create_access_token(identity=str(moderator.id),
+                                             additional_claims={"role": moderator.role})
+
+            # Fresh voters so every vote is a first vote on its poll
+            self.option_ids = {}
+            for option_id, topic_id in db.session.query(PollOption.id, PollOption.topic_id):
+                self.option_ids.setdefault(topic_id, []).append(option_id)
+            self.poll_ids = sorted(self.option_ids)
+            total_votes = args.requests + args.warmup
+            voters_needed = -(-total_votes // max(len(self.poll_ids), 1)) if self.poll_ids else 0
+            tag = f"{int(time.time())}-{rng.randrange(10 ** 6)}"
+            db.session.execute(db.insert(User), [
+                {"email": f"voter-{tag}-{i}@example.com", "password": "x", "role": "user"}
+                for i in range(voters_needed)
+            ])
+            db.session.commit()
+            voter_ids = [row.id for row in db.session.query(User.id)
+                         .filter(User.email.like(f"voter-{tag}-%")).order_by(User.id)]
+            self.votes = [
+                (create_access_token(identity=str(voter_ids[i // len(self.poll_ids)])),
+                 rng.choice(self.option_ids[self.poll_ids[i % len(self.poll_ids)]]))
+                for i in range(min(total_votes, voters_needed * len(self.poll_ids)))
+            ]
+        self._vote_index = 0
+        self._lock = threading.Lock()
+
+    def next_vote(self):
+        with self._lock:
+            vote = self.votes[self._vote_index % len(self.votes)]
+            self._vote_index += 1
+            return vote
+
+
+# name -> request(client, rng, headers); each call issues one request
+def scenarios(ctx):
+    topic = lambda rng: rng.choice(ctx.topic_ids)
+    return {
+        "list_topics": lambda c, rng, h: c.get("/api/topics", headers=h),
+        "get_topic": lambda c, rng, h: c.get(f"/api/topics/{topic(rng)}", headers=h),
+        "add_post": lambda c, rng, h: c.post("/api/posts", headers=h, json={
+            "topic_id": topic(rng), "content": rng.choice(POST_TEXTS)}),
+        "vote_poll": lambda c, rng, h: _vote(c, ctx),
+        "ai_similar": lambda c, rng, h: c.get(f"/api/ai/similar/{topic(rng)}", headers=h),
+        "ai_search": lambda c, rng, h: c.post("/api/ai/search", headers=h, json={
+            "query": rng.choice(SEARCH_QUERIES)}),
+        "ai_analytics_overview": lambda c, rng, h: c.get("/api/ai/analytics/overview?period=30d", headers=h),
+        "ai_sentiment_timeline": lambda c, rng, h: c.get(f"/api/ai/sentiment-timeline/{topic(rng)}", headers=h),
+    }
+
+
+def _vote(client, ctx):
+    token, option_id = ctx.next_vote()
+    return client.post("/api/poll/vote", json={"option_id": option_id},
+                       headers={"Authorization": f"Bearer {token}"})
+
+
+def run_scenario(app, name, request, ctx, args):
+    headers = {"Authorization": f"Bearer {ctx.token}", "Accept-Encoding": "gzip"}
+    latencies, errors = [], []
+    lock = threading.Lock()
+    per_thread = [args.requests // args.threads + (t < args.requests % args.threads)
+                  for t in range(args.threads)]
+
+    def client_loop(count, seed, record):
+        client = app.test_client()
+        rng = random.Random(seed)
+        local, failed = [], 0
+        for _ in range(count):
+            started = time.perf_counter()
+            response = request(client, rng, headers)
+            response.get_data()  # drain streamed bodies
+            local.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                failed += 1
+        if record:
+            with lock:
+                latencies.extend(local)
+                errors.append(failed)
+
+    # Warm-up (caches, connection pool) is not recorded
+    client_loop(args.warmup, args.seed, record=False)
+
+    threads = [threading.Thread(target=client_loop, args=(count, args.seed + t + 1, True))
+               for t, count in enumerate(per_thread)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return summarize(latencies, sum(errors), time.perf_counter() - started)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def dataset_sizes(app):
+    from database import db
+    from models import PollVote, Post, SentimentHistory, Topic
+    with app.app_context():
+        return {model.__tablename__: db.session.query(db.func.count()).select_from(model).scalar()
+                for model in (Topic, Post, PollVote, SentimentHistory)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the hot endpoints")
+    parser.add_argument("--scenarios", help="comma-separated subset (default: all)")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--threads", type=int, default=4, help="concurrent clients")
+    parser.add_argument("--warmup", type=int, default=5, help="unrecorded requests per scenario")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="compare against this results JSON")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative change counted as a regression (default 0.2 = 20%%)")
+    parser.add_argument("--label", default="", help="free-form note stored with the results")
+    args = parser.parse_args()
+
+    if "DATABASE_URL" not in os.environ:
+        raise SystemExit("Set DATABASE_URL to a database filled by benchmarks/datagen.py")
+    use_fake_llm()
+    # The dev JWT secret is short; don't repeat PyJWT's warning on every request
+    warnings.filterwarnings("ignore", message="The HMAC key")
+
+    from app import app
+    ctx = Context(app, args)
+    available = scenarios(ctx)
+    selected = args.scenarios.split(",") if args.scenarios else list(available)
+    unknown = set(selected) - set(available)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    results = {
+        "meta": {
+            "label": args.label,
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "database": app.config["SQLALCHEMY_DATABASE_URI"].split(":", 1)[0],
+            "dataset": dataset_sizes(app),
+            "llm": {key: app.config.get(key) for key in ("LLM_BACKEND", "FAKE_LLM_LATENCY", "SENTIMENT_MODE")},
+            "requests": args.requests,
+            "threads": args.threads,
+        },
+        "scenarios": {}
+    }
+
+    for name in selected:
+        if name == "vote_poll" and not ctx.votes:
+            print(f"{name:24s} skipped (no polls in the dataset)")
+            continue
+        stats = run_scenario(app, name, available[name], ctx, args)
+        results["scenarios"][name] = stats
+        print(f"{name:24s} {stats['throughput_rps']:9.1f} req/s  p50 {stats['p50_ms']:8.2f}  "
+              f"p95 {stats['p95_ms']:8.2f}  p99 {stats['p99_ms']:8.2f} ms  errors {stats['errors']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        from compare import compare, print_report
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report = compare(baseline, results, args.threshold)
+        print_report(report)
+        return 1 if report["regressions"] else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
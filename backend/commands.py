@@ -0,0 +1,164 @@
+# commands.py - Flask CLI commands (run with: flask --app app <group> <command>)
+
+import time
+
+import click
+from flask import current_app
+from flask.cli import AppGroup, with_appcontext
+
+from models import Post, Topic, User
+from services import archive, bulk_io, read_replica, resource_catalog, retention, schema
+
+MODELS = {"topics": Topic, "posts": Post}
+
+data_cli = AppGroup("data", help="Bulk import/export, recomputation, archival and retention of topics and posts.")
+
+
+def _author_id(email):
+    if not email:
+        return None
+    user = User.query.filter_by(email=email).first()
+    if user is None:
+        raise click.BadParameter(f"no user with email {email}", param_hint="--author-email")
+    return user.id
+
+
+@data_cli.command("import")
+@click.argument("kind", type=click.Choice(list(MODELS)))
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(["csv", "jsonl"]),
+              help="Input format (default: from the file extension).")
+@click.option("--batch-size", default=bulk_io.DEFAULT_IMPORT_BATCH, show_default=True,
+              help="Rows per INSERT/commit.")
+@click.option("--author-email", help="User credited for rows without created_by/author_id.")
+def import_command(kind, path, fmt, batch_size, author_email):
+    """Import topics or posts from a CSV or JSONL file.
+
+    Posts without a sentiment are stored pending; run `data analyze` and then
+    `data recompute` once all files are in.
+    """
+    def report(line_number, message):
+        click.echo(f"  line {line_number}: skipped ({message})", err=True)
+
+    stats = bulk_io.import_records(
+        MODELS[kind],
+        bulk_io.read_records(path, fmt),
+        default_author_id=_author_id(author_email),
+        batch_size=batch_size,
+        on_error=report
+    )
+    click.echo(f"Imported {stats['inserted']} {kind}, skipped {stats['skipped']}")
+
+
+@data_cli.command("analyze")
+@click.option("--batch-size", default=bulk_io.DEFAULT_ANALYZE_BATCH, show_default=True,
+              help="Posts per LLM request.")
+@click.option("--limit", type=int, help="Stop after this many posts.")
+def analyze_command(batch_size, limit):
+    """Run sentiment analysis on imported posts that have none yet (local model first)."""
+    def progress(stats):
+        click.echo(f"  analyzed {stats['analyzed']}, failed {stats['failed']}")
+
+    stats = bulk_io.analyze_pending_posts(batch_size=batch_size, limit=limit, on_batch=progress)
+    click.echo(f"Analyzed {stats['analyzed']} posts, {stats['local']} locally "
+               f"({stats['failed']} left pending)")
+
+
+@data_cli.command("train-sentiment")
+@click.option("--output", type=click.Path(dir_okay=False),
+              help="Where to write the model (default: LOCAL_SENTIMENT_MODEL_PATH).")
+@click.option("--min-samples", default=200, show_default=True)
+def train_sentiment_command(output, min_samples):
+    """Train the local sentiment model on already-labeled posts."""
+    from ai.local_sentiment import local_sentiment
+
+    model, samples = bulk_io.train_local_sentiment(min_samples=min_samples)
+    if model is None:
+        raise click.ClickException(
+            f"Need at least {min_samples} labeled posts with two or more sentiments (found {samples})"
+        )
+    output = output or current_app.config["LOCAL_SENTIMENT_MODEL_PATH"]
+    local_sentiment.save(output)
+    click.echo(f"Trained on {samples} posts, saved to {output}")
+
+
+@data_cli.command("recompute")
+@click.option("--topic-id", "topic_ids", type=int, multiple=True,
+              help="Only recompute these topics (repeatable).")
+def recompute_command(topic_ids):
+    """Rebuild topic sentiment counters and distilled points from their posts."""
+    updated = bulk_io.recompute_topic_aggregates(list(topic_ids) or None)
+    click.echo(f"Recomputed aggregates for {updated} topics")
+
+
+@data_cli.command("export")
+@click.argument("kind", type=click.Choice(list(MODELS)))
+@click.argument("output", type=click.File("w", encoding="utf-8"), default="-")
+def export_command(kind, output):
+    """Stream every topic or post to OUTPUT (default: stdout) as JSONL."""
+    count = bulk_io.export_records(MODELS[kind], output)
+    if output.name != "<stdout>":
+        click.echo(f"Exported {count} {kind}")
+
+
+@data_cli.command("archive")
+@click.option("--batch-size", type=int, help="Topics moved per transaction (default: ARCHIVE_BATCH_SIZE).")
+@click.option("--limit", type=int, help="Stop after this many topics.")
+@click.option("--dry-run", is_flag=True, help="Only count the topics that would be archived.")
+def archive_command(batch_size, limit, dry_run):
+    """Move cold resolved/archived topics and their data to the archive tables."""
+    if dry_run:
+        count = len(archive.cold_topic_ids(limit or 1_000_000))
+        click.echo(f"{count} topics would be archived")
+        return
+    moved = archive.run_archival(batch_size=batch_size, limit=limit)
+    click.echo(f"Archived {moved} topics")
+
+
+@data_cli.command("retention")
+@click.option("--batch-size", type=int, help="Rows deleted per transaction (default: RETENTION_BATCH_SIZE).")
+@click.option("--limit", type=int, help="Stop after deleting this many rows per table.")
+@click.option("--rescan", is_flag=True, help="Downsample all sentiment history again, not just newly aged points.")
+def retention_command(batch_size, limit, rescan):
+    """Prune old AI summaries and downsample old sentiment history."""
+    if rescan:
+        retention.reset_checkpoints()
+    removed = retention.run_retention(batch_size=batch_size, limit=limit)
+    click.echo(f"Deleted {removed['ai_summaries']} summaries and "
+               f"{removed['sentiment_history']} sentiment history points")
+
+
+@click.command("init-db")
+@with_appcontext
+def init_db_command():
+    """Create missing tables, upgrade existing ones and seed the resource catalog
+    (run once per deploy when CREATE_SCHEMA is off)."""
+    added = schema.upgrade_schema()
+    resource_catalog.seed_default_catalog()
+    for table, column in sorted(added):
+        click.echo(f"  added {table}.{column}")
+    click.echo("Database tables created")
+
+
+@click.command("replica-sync")
+@click.option("--interval", type=float, help="Keep syncing every INTERVAL seconds.")
+@with_appcontext
+def replica_sync_command(interval):
+    """Refresh a SQLite read replica (DATABASE_REPLICA_URL) from the primary."""
+    if not read_replica.replica_enabled():
+        raise click.ClickException("DATABASE_REPLICA_URL is not set")
+    while True:
+        try:
+            read_replica.sync_sqlite_replica()
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        click.echo(f"Replica synced at {time.strftime('%H:%M:%S')}")
+        if not interval:
+            break
+        time.sleep(interval)
+
+
+def init_app(app):
+    app.cli.add_command(data_cli)
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(replica_sync_command)
@@ -1,20 +1,235 @@
 import os
 
+SQLITE_BUSY_TIMEOUT = float(os.getenv("SQLITE_BUSY_TIMEOUT", 30))
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", 16))
+
+
+def engine_options(uri):
+    """Pool settings for a database URL"""
+    if uri in ("sqlite://", "sqlite:///:memory:"):
+        # In-memory SQLite gets a single shared connection (StaticPool)
+        return {}
+    if uri.startswith("sqlite"):
+        # Connections are cheap local file handles: no overflow churn,
+        # recycling or liveness pings
+        return {
+            "pool_size": SQLITE_POOL_SIZE,
+            "max_overflow": 0,
+            "pool_timeout": SQLITE_BUSY_TIMEOUT,
+            "connect_args": {"timeout": SQLITE_BUSY_TIMEOUT, "check_same_thread": False}
+        }
+    return {
+        "pool_size": 10,
+        "max_overflow": 20,
+        "pool_timeout": 30,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True
+    }
+
+
+def database_binds(primary, replica=None, archive=None):
+    """SQLALCHEMY_BINDS: the optional read replica, and the archive tables'
+    database (the primary itself unless a separate one is given)"""
+    binds = {"archive": {"url": archive or primary, **engine_options(archive or primary)}}
+    if replica:
+        binds["replica"] = {"url": replica, **engine_options(replica)}
+    return binds
+
+
 class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret")
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "jwt-secret")
+    JWT_TOKEN_LOCATION = ["headers"]
+    # Recently verified tokens kept per process to skip re-verification (0 = off)
+    JWT_VERIFIED_CACHE_SIZE = int(os.getenv("JWT_VERIFIED_CACHE_SIZE", 4096))
 
     SQLALCHEMY_DATABASE_URI = os.getenv(
         "DATABASE_URL",
         "sqlite:///redressal.db"
     )
 
-    SQLALCHEMY_ENGINE_OPTIONS = {
-        "pool_size": 10,
-        "max_overflow": 20,
-        "pool_timeout": 30,
-        "pool_recycle": 1800,
-        "pool_pre_ping": True
-    }
+    # SQLite file databases (services/sqlite_profile.py): WAL journaling,
+    # pragmas applied per connection, and writes serialized through one
+    # writer per process (BEGIN IMMEDIATE, waiting up to the busy timeout)
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+    SQLITE_BUSY_TIMEOUT = SQLITE_BUSY_TIMEOUT
+    SQLITE_POOL_SIZE = SQLITE_POOL_SIZE
+    SQLITE_SERIALIZE_WRITES = os.getenv("SQLITE_SERIALIZE_WRITES", "true").lower() == "true"
+
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+
+    # Read replica for the heavy read-only AI/analytics endpoints
+    # (services/read_replica.py). After a user writes, their reads stay on
+    # the primary for REPLICA_STICKY_SECONDS.
+    DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+    REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", 10))
+
+    # Cold topics (ARCHIVE_STATUSES, no activity for ARCHIVE_AFTER_DAYS) are
+    # moved to the archive tables, in ARCHIVE_DATABASE_URL when set; run
+    # `flask data archive`, or every ARCHIVE_INTERVAL seconds (0 = never)
+    ARCHIVE_DATABASE_URL = os.getenv("ARCHIVE_DATABASE_URL")
+    ARCHIVE_STATUSES = os.getenv("ARCHIVE_STATUSES", "resolved,archived").split(",")
+    ARCHIVE_AFTER_DAYS = float(os.getenv("ARCHIVE_AFTER_DAYS", 30))
+    ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", 200))
+    ARCHIVE_INTERVAL = float(os.getenv("ARCHIVE_INTERVAL", 0))
+
+    SQLALCHEMY_BINDS = database_binds(SQLALCHEMY_DATABASE_URI, DATABASE_REPLICA_URL, ARCHIVE_DATABASE_URL)
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Create missing tables when the app starts; production runs
+    # `flask --app app init-db` once per deploy instead
+    CREATE_SCHEMA = os.getenv("CREATE_SCHEMA", "true").lower() == "true"
+
+    # Topic aggregate counters: "atomic" (in-place SQL increments) or
+    # "sharded" (spread across shard rows, folded in the background)
+    COUNTER_MODE = os.getenv("COUNTER_MODE", "atomic")
+    COUNTER_SHARDS = int(os.getenv("COUNTER_SHARDS", 16))
+    COUNTER_FOLD_INTERVAL = float(os.getenv("COUNTER_FOLD_INTERVAL", 5))
+
+    # Trending topics: activity halves in weight every TRENDING_HALF_LIFE_HOURS
+    # (run `flask data recompute` after changing the half-life or weights)
+    TRENDING_HALF_LIFE_HOURS = float(os.getenv("TRENDING_HALF_LIFE_HOURS", 24))
+    TRENDING_TOPIC_WEIGHT = float(os.getenv("TRENDING_TOPIC_WEIGHT", 1.0))
+    TRENDING_POST_WEIGHT = float(os.getenv("TRENDING_POST_WEIGHT", 1.0))
+    TRENDING_VOTE_WEIGHT = float(os.getenv("TRENDING_VOTE_WEIGHT", 0.25))
+
+    # Retention: newest SUMMARY_KEEP_PER_TOPIC AI summaries per topic;
+    # sentiment history thinned to hourly points after SENTIMENT_HISTORY_RAW_DAYS
+    # and daily after SENTIMENT_HISTORY_HOURLY_DAYS (0 = keep). Runs every
+    # RETENTION_INTERVAL seconds (0 = only via `flask data retention`),
+    # deleting at most RETENTION_LIMIT rows per run in RETENTION_BATCH_SIZE batches.
+    SUMMARY_KEEP_PER_TOPIC = int(os.getenv("SUMMARY_KEEP_PER_TOPIC", 5))
+    SENTIMENT_HISTORY_RAW_DAYS = float(os.getenv("SENTIMENT_HISTORY_RAW_DAYS", 7))
+    SENTIMENT_HISTORY_HOURLY_DAYS = float(os.getenv("SENTIMENT_HISTORY_HOURLY_DAYS", 90))
+    RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", 500))
+    RETENTION_LIMIT = int(os.getenv("RETENTION_LIMIT", 20000))
+    RETENTION_INTERVAL = float(os.getenv("RETENTION_INTERVAL", 600))
+
+    # Poll tallies: buffered vote_count increments and cached results
+    POLL_TALLY_FLUSH_INTERVAL = float(os.getenv("POLL_TALLY_FLUSH_INTERVAL", 1))
+    POLL_TALLY_CACHE_TTL = float(os.getenv("POLL_TALLY_CACHE_TTL", 5))
+
+    # Live topic updates: in-process pub/sub unless a broker is configured
+    # (e.g. tcp://127.0.0.1:7071, see services/events.py)
+    EVENT_BROKER_URL = os.getenv("EVENT_BROKER_URL")
+    SSE_HEARTBEAT_INTERVAL = float(os.getenv("SSE_HEARTBEAT_INTERVAL", 15))
+
+    # Response compression (gzip, or brotli when installed) above this size
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", 1024))
+    COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", 6))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", 4))
+
+    # Password hashing runs on a process pool (0 workers = inline). Changing
+    # the method re-hashes each user's password on their next login.
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    PASSWORD_SALT_LENGTH = int(os.getenv("PASSWORD_SALT_LENGTH", 16))
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+    PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", 32))
+    PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", 10))
+
+    # LLM backend: "gemini", or "fake" for load tests without network access
+    LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+    GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-flash-lite-latest")
+    LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 0)) or None
+    # Fake backend: latency spec in ms (fixed:200, uniform:50:400, normal:300:80,
+    # lognormal:300:0.5, exp:300), error rate 0-1, optional replay file and seed
+    FAKE_LLM_LATENCY = os.getenv("FAKE_LLM_LATENCY", "lognormal:400:0.4")
+    FAKE_LLM_ERROR_RATE = float(os.getenv("FAKE_LLM_ERROR_RATE", 0))
+    FAKE_LLM_RESPONSES = os.getenv("FAKE_LLM_RESPONSES")
+    FAKE_LLM_SEED = int(os.getenv("FAKE_LLM_SEED")) if os.getenv("FAKE_LLM_SEED") else None
+    # Append every real prompt/response pair here (JSONL) for later replay
+    LLM_RECORD_PATH = os.getenv("LLM_RECORD_PATH")
+
+    # ASGI mode (asgi.py): LLM calls in flight per worker, threads for
+    # DB/CPU work (including every request served by the Flask app), and
+    # threads for event streams (one per open stream while it waits)
+    LLM_ASYNC_CONCURRENCY = int(os.getenv("LLM_ASYNC_CONCURRENCY", 256))
+    ASGI_DB_THREADS = int(os.getenv("ASGI_DB_THREADS", 16))
+    ASGI_SSE_THREADS = int(os.getenv("ASGI_SSE_THREADS", 64))
+
+    # Sentiment: "tiered" scores locally and escalates to Gemini below the
+    # confidence threshold; "local" never escalates, "llm" always does
+    SENTIMENT_MODE = os.getenv("SENTIMENT_MODE", "tiered")
+    SENTIMENT_CONFIDENCE_THRESHOLD = float(os.getenv("SENTIMENT_CONFIDENCE_THRESHOLD", 0.75))
+    # Trained model from `flask data train-sentiment` (lexicon used if missing)
+    LOCAL_SENTIMENT_MODEL_PATH = os.getenv(
+        "LOCAL_SENTIMENT_MODEL_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "sentiment_model.pkl")
+    )
+
+    # Stakeholder groups and their keywords, counted per post at write time
+    # (JSON file shaped like services/stakeholders.py DEFAULT_LEXICON; run
+    # `flask data recompute` after changing it)
+    STAKEHOLDER_LEXICON_PATH = os.getenv("STAKEHOLDER_LEXICON_PATH")
+
+    # Topic embeddings (similar topics, duplicates, search): TF-IDF fitted on
+    # topics plus the latest EMBEDDING_MAX_POSTS posts, reduced to
+    # EMBEDDING_DIMENSIONS with truncated SVD (0 = sparse TF-IDF), refitted
+    # every EMBEDDING_REFIT_INTERVAL seconds (0 = only on first use)
+    EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", 128))
+    EMBEDDING_MAX_FEATURES = int(os.getenv("EMBEDDING_MAX_FEATURES", 50000))
+    EMBEDDING_MIN_DF = int(os.getenv("EMBEDDING_MIN_DF", 2))
+    EMBEDDING_MAX_POSTS = int(os.getenv("EMBEDDING_MAX_POSTS", 50000))
+    EMBEDDING_REFIT_INTERVAL = float(os.getenv("EMBEDDING_REFIT_INTERVAL", 3600))
+
+    # Resource catalog: each worker caches the tag/title -> category router
+    # and rebuilds it after its own catalog edits or at most this often
+    RESOURCE_CATALOG_TTL = float(os.getenv("RESOURCE_CATALOG_TTL", 300))
+
+    # Prometheus metrics at /metrics (per process); with METRICS_TOKEN set,
+    # scrapers must send "Authorization: Bearer <token>"
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+    # Per-request SQL profiling for a sampled share of requests (0-1), or
+    # requests sending "X-Query-Profile: <QUERY_PROFILER_TOKEN>" (any value
+    # in debug mode when no token is set)
+    QUERY_PROFILER_SAMPLE_RATE = float(os.getenv("QUERY_PROFILER_SAMPLE_RATE", 0))
+    QUERY_PROFILER_TOKEN = os.getenv("QUERY_PROFILER_TOKEN")
+    QUERY_PROFILER_SLOW_MS = float(os.getenv("QUERY_PROFILER_SLOW_MS", 100))
+    QUERY_PROFILER_REPEAT_THRESHOLD = int(os.getenv("QUERY_PROFILER_REPEAT_THRESHOLD", 5))
+    QUERY_PROFILER_EXPLAIN = os.getenv("QUERY_PROFILER_EXPLAIN", "true").lower() == "true"
+
+
+class DevelopmentConfig(Config):
+    pass
+
+
+class ProductionConfig(Config):
+    CREATE_SCHEMA = os.getenv("CREATE_SCHEMA", "false").lower() == "true"
+
+
+class TestingConfig(Config):
+    TESTING = True
+    # In-memory SQLite (a single shared connection) unless overridden
+    SQLALCHEMY_DATABASE_URI = os.getenv("TEST_DATABASE_URL", "sqlite://")
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    SQLALCHEMY_BINDS = database_binds(SQLALCHEMY_DATABASE_URI)
+    LLM_BACKEND = "fake"
+    FAKE_LLM_LATENCY = "fixed:0"
+    FAKE_LLM_SEED = 0
+    LLM_RECORD_PATH = None
+    PASSWORD_HASH_METHOD = "pbkdf2:sha256:1000"
+    PASSWORD_HASH_WORKERS = 0
+    SENTIMENT_MODE = "local"
+    LOCAL_SENTIMENT_MODEL_PATH = None
+    RETENTION_INTERVAL = 0
+    EMBEDDING_REFIT_INTERVAL = 0
+
+
+CONFIGS = {
+    "development": DevelopmentConfig,
+    "production": ProductionConfig,
+    "testing": TestingConfig,
+}
+
+
+def get_config(name=None):
+    """Config class for a profile name (default: APP_CONFIG, else development)"""
+    name = name or os.getenv("APP_CONFIG", "development")
+    try:
+        return CONFIGS[name]
+    except KeyError:
+        raise ValueError(f"unknown APP_CONFIG {name!r} (expected one of {', '.join(CONFIGS)})")
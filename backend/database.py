@@ -1,3 +1,38 @@
+from flask import g, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
 
-db = SQLAlchemy()
+# Bind key of the optional read replica (DATABASE_REPLICA_URL)
+REPLICA_BIND = "replica"
+
+
+class RoutingSession(Session):
+    """Sends plain SELECTs on primary-database tables to the replica bind
+    while the app context asks for replica reads (services/read_replica.py).
+    Writes, locking reads, raw SQL and every query after this session's
+    first write use the primary."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper, clause, bind, **kwargs)
+        if bind is None and clause is not None and not self._flushing:
+            if getattr(clause, "is_dml", False):
+                _note_write(self)
+            elif (getattr(clause, "is_select", False)
+                    and getattr(clause, "_for_update_arg", None) is None
+                    and not self.info.get("wrote")
+                    and has_app_context() and g.get("read_replica")
+                    and engine is self._db.engines.get(None)):
+                return self._db.engines[REPLICA_BIND]
+        return engine
+
+
+def _note_write(session):
+    session.info["wrote"] = True
+    if has_app_context():
+        g.db_wrote = True
+
+
+event.listen(RoutingSession, "after_flush", lambda session, flush_context: _note_write(session))
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
@@ -36,22 +36,50 @@ class Topic(db.Model):
     status = db.Column(db.String(20), default='active')
     priority = db.Column(db.String(20), default='normal')
     
+    # Bumped on every UPDATE (including SQL-side counter increments); drives
+    # the ETag/Last-Modified validators in services/http_cache.py
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    
+    # Moderation queue ordering (kept current on writes, see services/moderation_queue.py)
+    priority_rank = db.Column(db.Integer, default=1)
+    risk_score = db.Column(db.Float, default=0.0)
+    
+    # Trending (kept current on posts and votes, see services/trending.py)
+    post_count = db.Column(db.Integer, default=0, index=True)
+    last_activity_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    hot_score = db.Column(db.Float)
+    
     # Relationships
     posts = db.relationship('Post', backref='topic', lazy=True, cascade='all, delete-orphan')
     poll_options = db.relationship('PollOption', backref='topic', lazy=True, cascade='all, delete-orphan')
     sentiment_history = db.relationship('SentimentHistory', backref='topic', lazy=True, cascade='all, delete-orphan')
     summaries = db.relationship('AISummary', backref='topic', lazy=True, cascade='all, delete-orphan')
+    
+    __table_args__ = (
+        db.Index('ix_topics_queue', 'status', 'priority_rank', 'risk_score', 'created_at', 'id'),
+        db.Index('ix_topics_queue_all', 'priority_rank', 'risk_score', 'created_at', 'id'),
+        db.Index('ix_topics_trending', 'status', 'hot_score'),
+    )
 
 class Post(db.Model):
     __tablename__ = 'posts'
     
     id = db.Column(db.Integer, primary_key=True)
-    topic_id = db.Column(db.Integer, db.ForeignKey('topics.id'), nullable=False)
+    topic_id = db.Column(db.Integer, db.ForeignKey('topics.id'), nullable=False, index=True)
     author_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     content = db.Column(db.Text, nullable=False)
     key_points = db.Column(db.Text)
     sentiment = db.Column(db.String(20))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Enrichment stored at write time (see ai/gemini.py:enrich_post)
+    sentiment_score = db.Column(db.Float)  # -1 to 1
+    sentiment_confidence = db.Column(db.Float)  # 0 to 1
+    emotion = db.Column(db.String(20))
+    tags = db.Column(db.String(255))  # comma-separated, like Topic.tags
+    # Who labeled the sentiment: "llm" or "local" (NULL if unknown, e.g. rows
+    # labeled before this column existed); only LLM labels train the local model
+    sentiment_source = db.Column(db.String(10))
 
 class PollOption(db.Model):
     __tablename__ = 'poll_options'
@@ -68,13 +96,40 @@ class PollVote(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     option_id = db.Column(db.Integer, db.ForeignKey('poll_options.id'), nullable=False)
+    topic_id = db.Column(db.Integer, db.ForeignKey('topics.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     __table_args__ = (
         db.UniqueConstraint('option_id', 'user_id', name='unique_vote'),
+        # One vote per user per poll, enforced by the database
+        db.UniqueConstraint('topic_id', 'user_id', name='unique_topic_vote'),
     )
 
+class TopicCounterShard(db.Model):
+    """Pending counter deltas for hot topics, folded into Topic periodically"""
+    __tablename__ = 'topic_counter_shards'
+    
+    topic_id = db.Column(db.Integer, db.ForeignKey('topics.id'), primary_key=True)
+    shard = db.Column(db.Integer, primary_key=True)
+    sentiment_score = db.Column(db.Integer, default=0, nullable=False)
+    sentiment_count = db.Column(db.Integer, default=0, nullable=False)
+    positive_count = db.Column(db.Integer, default=0, nullable=False)
+    negative_count = db.Column(db.Integer, default=0, nullable=False)
+    post_count = db.Column(db.Integer, default=0, nullable=False)
+    pending_points = db.Column(db.Text, default="", nullable=False)
+    # Activity not yet folded: log-space hot score and latest event time
+    hot_score = db.Column(db.Float)
+    last_activity_at = db.Column(db.DateTime)
+
+class TopicStakeholderCount(db.Model):
+    """Posts per topic that mention each stakeholder group (services/stakeholders.py)"""
+    __tablename__ = 'topic_stakeholder_counts'
+    
+    topic_id = db.Column(db.Integer, db.ForeignKey('topics.id'), primary_key=True)
+    stakeholder = db.Column(db.String(50), primary_key=True)
+    post_count = db.Column(db.Integer, default=0, nullable=False)
+
 # ==================== AI-RELATED MODELS ====================
 
 class SentimentHistory(db.Model):
@@ -85,6 +140,10 @@ class SentimentHistory(db.Model):
     topic_id = db.Column(db.Integer, db.ForeignKey('topics.id'), nullable=False)
     sentiment_score = db.Column(db.Float, nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    
+    __table_args__ = (
+        db.Index('ix_sentiment_history_topic_time', 'topic_id', 'timestamp'),
+    )
 
 class AISummary(db.Model):
     """Store AI-generated summaries"""
@@ -94,6 +153,10 @@ class AISummary(db.Model):
     topic_id = db.Column(db.Integer, db.ForeignKey('topics.id'), nullable=False)
     summary = db.Column(db.Text, nullable=False)
     generated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_ai_summaries_topic_time', 'topic_id', 'generated_at'),
+    )
 
 class TopicCluster(db.Model):
     """Store topic clusters for visualization"""
@@ -161,4 +224,67 @@ class ActionPlan(db.Model):
     completed_at = db.Column(db.DateTime)
     
     topic = db.relationship('Topic', backref='action_plans')
-    assignee = db.relationship('User', foreign_keys=[assigned_to])
\ No newline at end of file
+    assignee = db.relationship('User', foreign_keys=[assigned_to])
+
+class RetentionCheckpoint(db.Model):
+    """How far an incremental retention pass has got (services/retention.py)"""
+    __tablename__ = 'retention_checkpoints'
+    
+    name = db.Column(db.String(64), primary_key=True)
+    watermark = db.Column(db.DateTime, nullable=False)
+
+
+# ==================== RESOURCE CATALOG ====================
+# Who and what moderators can call on, per issue category; topics are routed
+# to categories by keyword (services/resource_catalog.py)
+
+class ResourceCategory(db.Model):
+    __tablename__ = 'resource_categories'
+    
+    key = db.Column(db.String(50), primary_key=True)
+    keywords = db.Column(db.String(500), default="")  # comma-separated, matched in tags and title
+    availability = db.Column(db.String(100))
+
+class Resource(db.Model):
+    __tablename__ = 'resources'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    category = db.Column(db.String(50), db.ForeignKey('resource_categories.key'), nullable=False, index=True)
+    name = db.Column(db.String(255), nullable=False)
+    type = db.Column(db.String(50))
+    availability = db.Column(db.String(100))
+    contact_info = db.Column(db.String(255))
+
+class ResourceContact(db.Model):
+    __tablename__ = 'resource_contacts'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    category = db.Column(db.String(50), db.ForeignKey('resource_categories.key'), nullable=False, index=True)
+    name = db.Column(db.String(255), nullable=False)
+    extension = db.Column(db.String(20))
+    email = db.Column(db.String(120))
+
+
+# ==================== ARCHIVE ====================
+# Cold (resolved/archived, inactive) topics and everything hanging off them
+# are moved here by services/archive.py. Same columns as the hot tables, no
+# foreign keys, on the "archive" bind (ARCHIVE_DATABASE_URL, or the primary
+# database when unset).
+
+def _archive_table(model, *extra):
+    columns = [
+        db.Column(c.name, c.type, primary_key=c.primary_key, nullable=c.nullable,
+                  autoincrement=False, index=c.name == "topic_id" and not c.primary_key)
+        for c in model.__table__.columns
+    ]
+    return db.Table(f"archived_{model.__tablename__}", *columns, *extra, bind_key="archive")
+
+
+archived_topics = _archive_table(Topic, db.Column("archived_at", db.DateTime, nullable=False))
+archived_posts = _archive_table(Post)
+archived_poll_options = _archive_table(PollOption)
+archived_poll_votes = _archive_table(PollVote)
+archived_sentiment_history = _archive_table(SentimentHistory)
+archived_ai_summaries = _archive_table(AISummary)
+archived_decision_support = _archive_table(DecisionSupport)
+archived_action_plans = _archive_table(ActionPlan)
\ No newline at end of file
@@ -0,0 +1,133 @@
+# routes/ai_async.py - Native async versions of the LLM-bound routes (ASGI mode)
+#
+# Same URLs, auth and responses as the Flask views in ai_endpoints.py and
+# moderation.py. Under asgi.py these handlers take over: database work runs
+# on the bounded pool (bridge.in_request) and the LLM call is awaited, so
+# waiting on the model doesn't tie up a thread. Under plain WSGI they are
+# unused.
+
+from datetime import datetime
+
+from flask import Response, jsonify, request
+from flask_jwt_extended import get_jwt, verify_jwt_in_request
+
+from ai.gemini import enrich_post_async, moderator_reasoning_async
+from database import db
+from models import Post, Topic
+from services.ai_service import ai_service
+from services import retention
+from services.asgi import AsyncRoute
+from services.sentiment import tiered_sentiment
+
+
+async def get_ai_summary(bridge, environ, topic_id):
+    """Generate AI summary of topic discussion"""
+    def load():
+        verify_jwt_in_request()
+        topic = Topic.query.get_or_404(topic_id)
+        posts = Post.query.filter_by(topic_id=topic_id)
+        return {
+            "title": topic.title,
+            "post_count": posts.count(),
+            "post_texts": [row.content for row in posts.with_entities(Post.content)
+                           .order_by(Post.created_at.desc()).limit(50)]
+        }
+
+    loaded = await bridge.in_request(environ, load)
+    if isinstance(loaded, Response):
+        return loaded
+
+    summary = await ai_service.summarize_discussion_async(
+        loaded["title"], loaded["post_texts"], loaded["post_count"])
+
+    def store():
+        # Store summary in database (unchanged text refreshes the latest row)
+        retention.record_summary(topic_id, summary)
+        db.session.commit()
+        return jsonify({
+            "topic_id": topic_id,
+            "summary": summary,
+            "post_count": loaded["post_count"],
+            "generated_at": datetime.utcnow().isoformat()
+        }), 200
+
+    return await bridge.in_request(environ, store)
+
+
+async def auto_tag(bridge, environ):
+    """Generate AI-powered tag suggestions"""
+    def load():
+        verify_jwt_in_request()
+        data = request.json
+        return {"title": data.get('title', ''), "content": data.get('content', '')}
+
+    loaded = await bridge.in_request(environ, load)
+    if isinstance(loaded, Response):
+        return loaded
+
+    tags = (await enrich_post_async(loaded["content"], title=loaded["title"]))['tags']
+    return await bridge.in_request(environ, lambda: (jsonify({"suggested_tags": tags}), 200))
+
+
+async def analyze_text(bridge, environ):
+    """Analyze sentiment of arbitrary text in real-time"""
+    def load():
+        verify_jwt_in_request()
+        text = request.json.get('text', '')
+        if not text:
+            return jsonify({"error": "Text is required"}), 400
+        return {"text": text}
+
+    loaded = await bridge.in_request(environ, load)
+    if isinstance(loaded, Response):
+        return loaded
+
+    text = loaded["text"]
+    analysis = await tiered_sentiment.analyze_sentiment_async(text)
+    return await bridge.in_request(environ, lambda: (jsonify({
+        "text": text[:100] + "..." if len(text) > 100 else text,
+        "analysis": analysis
+    }), 200))
+
+
+async def moderate(bridge, environ, topic_id):
+    """Get AI moderation insights for a topic"""
+    def load():
+        verify_jwt_in_request()
+        claims = get_jwt()
+        user_role = claims.get("role", "user")
+
+        if user_role not in ["moderator", "admin"]:
+            return jsonify({"error": "forbidden"}), 403
+
+        topic = Topic.query.get_or_404(topic_id)
+        return {
+            "topic": topic.title,
+            "distilled_points": topic.distilled_points,
+            "sentiment_score": topic.sentiment_score,
+            "tags": topic.tags,
+            "negative_posts": topic.negative_count,
+            "positive_posts": topic.positive_count
+        }
+
+    loaded = await bridge.in_request(environ, load)
+    if isinstance(loaded, Response):
+        return loaded
+
+    ai_view = await moderator_reasoning_async(
+        loaded["distilled_points"], loaded["sentiment_score"], loaded["tags"])
+    return await bridge.in_request(environ, lambda: jsonify({
+        "topic": loaded["topic"],
+        "sentiment_score": loaded["sentiment_score"],
+        "negative_posts": loaded["negative_posts"],
+        "positive_posts": loaded["positive_posts"],
+        "ai_suggestions": ai_view
+    }))
+
+
+async_routes = [
+    AsyncRoute("/api/ai/summary/<int:topic_id>", get_ai_summary, blueprint="ai"),
+    AsyncRoute("/api/ai/auto-tag", auto_tag, methods=("POST",), blueprint="ai"),
+    AsyncRoute("/api/ai/analyze-text", analyze_text, methods=("POST",), blueprint="ai"),
+    AsyncRoute("/api/moderation/topic/<int:topic_id>", moderate, blueprint="moderation"),
+]
@@ -1,10 +1,15 @@
 # routes/ai_endpoints.py - AI-powered API endpoints
 
 from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from models import Topic, Post, SentimentHistory
 from database import db
 from services.ai_service import ai_service
+from services.sentiment import tiered_sentiment
+from services.http_cache import conditional, topic_list_validator, sentiment_timeline_validator
+from services.read_replica import use_replica
+from services.archive import load_archived_topic
+from services import resource_catalog, retention, stakeholders
 from datetime import datetime
 
 ai_routes = Blueprint("ai", __name__)
@@ -13,11 +18,21 @@ ai_routes = Blueprint("ai", __name__)
 
 @ai_routes.route("/ai/sentiment-timeline/<int:topic_id>")
 @jwt_required()
+@use_replica
+@conditional(sentiment_timeline_validator)
 def get_sentiment_timeline(topic_id):
     """Get sentiment history over time for a topic"""
     try:
-        topic = Topic.query.get_or_404(topic_id)
-        timeline = ai_service.get_sentiment_timeline(topic_id)
+        topic = db.session.get(Topic, topic_id)
+        if topic is not None:
+            timeline = ai_service.get_sentiment_timeline(topic_id)
+        else:
+            # Archived topics keep their history in the archive tables
+            loaded = load_archived_topic(topic_id)
+            if loaded is None:
+                return jsonify({"error": "topic not found"}), 404
+            topic, history = loaded[0], loaded[3]
+            timeline = ai_service.get_sentiment_timeline(topic_id, history=history)
         
         return jsonify({
             "topic_id": topic_id,
@@ -43,13 +58,8 @@ def get_ai_summary(topic_id):
         
         summary = ai_service.summarize_discussion(topic.title, posts)
         
-        # Store summary in database
-        from models import AISummary
-        ai_summary = AISummary(
-            topic_id=topic_id,
-            summary=summary
-        )
-        db.session.add(ai_summary)
+        # Store summary in database (unchanged text refreshes the latest row)
+        retention.record_summary(topic_id, summary)
         db.session.commit()
         
         return jsonify({
@@ -67,6 +77,7 @@ def get_ai_summary(topic_id):
 
 @ai_routes.route("/ai/similar/<int:topic_id>")
 @jwt_required()
+@use_replica
 def get_similar_topics(topic_id):
     """Find topics similar to the given topic"""
     try:
@@ -86,6 +97,7 @@ def get_similar_topics(topic_id):
 
 @ai_routes.route("/ai/duplicates/<int:topic_id>")
 @jwt_required()
+@use_replica
 def detect_duplicates(topic_id):
     """Detect potential duplicate topics"""
     try:
@@ -127,6 +139,7 @@ def auto_tag():
 
 @ai_routes.route("/ai/predictions/<int:topic_id>")
 @jwt_required()
+@use_replica
 def get_predictions(topic_id):
     """Get AI predictions for topic escalation"""
     try:
@@ -146,6 +159,7 @@ def get_predictions(topic_id):
 
 @ai_routes.route("/ai/search", methods=["POST"])
 @jwt_required()
+@use_replica
 def semantic_search():
     """Perform AI-powered semantic search"""
     try:
@@ -156,9 +170,7 @@ def semantic_search():
         if not query:
             return jsonify({"error": "Query is required"}), 400
         
-        # Get all topics
-        all_topics = Topic.query.all()
-        results = ai_service.semantic_search(query, all_topics, limit=limit)
+        results = ai_service.semantic_search(query, limit=limit)
         
         topics_data = [{
             "id": t.id,
@@ -182,6 +194,7 @@ def semantic_search():
 
 @ai_routes.route("/ai/analytics/overview")
 @jwt_required()
+@use_replica
 def get_analytics_overview():
     """Get platform-wide AI-powered analytics"""
     try:
@@ -201,6 +214,8 @@ def get_analytics_overview():
 
 @ai_routes.route("/ai/clusters")
 @jwt_required()
+@use_replica
+@conditional(topic_list_validator)
 def get_topic_clusters():
     """Get clustered topics for visualization"""
     try:
@@ -250,7 +265,7 @@ def analyze_text():
         if not text:
             return jsonify({"error": "Text is required"}), 400
         
-        analysis = ai_service.analyze_sentiment(text)
+        analysis = tiered_sentiment.analyze_sentiment(text)
         
         return jsonify({
             "text": text[:100] + "..." if len(text) > 100 else text,
@@ -261,6 +276,19 @@ def analyze_text():
         return jsonify({"error": str(e)}), 500
 
 
+@ai_routes.route("/ai/sentiment-stats")
+@jwt_required()
+def sentiment_stats():
+    """Local vs escalated sentiment analyses in this worker (moderators only)"""
+    claims = get_jwt()
+    user_role = claims.get("role", "user")
+    
+    if user_role not in ["moderator", "admin"]:
+        return jsonify({"error": "forbidden"}), 403
+    
+    return jsonify(tiered_sentiment.stats()), 200
+
+
 # Add these endpoints to your ai_endpoints.py file
 
 # ==================== DECISION SUPPORT ENDPOINTS ====================
@@ -277,9 +305,8 @@ def get_decision_support(topic_id):
         resources = ai_service.analyze_resource_availability(topic)
         timeline = ai_service.generate_decision_timeline(topic)
         
-        # Get stakeholder analysis
-        posts = Post.query.filter_by(topic_id=topic_id).all()
-        stakeholder_analysis = analyze_stakeholders(posts)
+        # Stakeholder mentions, counted as posts were written
+        stakeholder_analysis = stakeholders.stakeholder_analysis(topic_id)
         
         return jsonify({
             "topic_id": topic_id,
@@ -362,9 +389,9 @@ def get_resource_map(topic_id):
         topic = Topic.query.get_or_404(topic_id)
         resources = ai_service.analyze_resource_availability(topic)
         
-        # Enhance with real database data if available
-        from models import Resource
-        db_resources = Resource.query.filter_by(category=topic.tags.split(',')[0] if topic.tags else 'general').all()
+        # Enhance with the catalog rows behind the matched categories
+        db_resources = resource_catalog.catalog_resources(
+            [entry["category"] for entry in resources["available_resources"]])
         
         enhanced_resources = {
             **resources,
@@ -388,32 +415,6 @@ def get_resource_map(topic_id):
         print(f"Error getting resource map: {e}")
         return jsonify({"error": str(e)}), 500
 
-def analyze_stakeholders(posts):
-    """Analyze stakeholders from posts"""
-    # Simplified stakeholder analysis
-    stakeholders = {
-        "students": {
-            "count": len([p for p in posts if "student" in p.content.lower()]),
-            "sentiment": "mixed",
-            "key_concerns": ["quality", "availability", "cost"],
-            "representation": "Student council"
-        },
-        "faculty": {
-            "count": len([p for p in posts if any(word in p.content.lower() for word in ["professor", "faculty", "teacher"])]),
-            "sentiment": "neutral",
-            "key_concerns": ["standards", "consistency"],
-            "representation": "Faculty association"
-        },
-        "staff": {
-            "count": len([p for p in posts if "staff" in p.content.lower()]),
-            "sentiment": "concerned",
-            "key_concerns": ["implementation", "workload"],
-            "representation": "Staff union"
-        }
-    }
-    
-    return stakeholders
-
 # ==================== ACTION PLAN ENDPOINTS ====================
 
 @ai_routes.route("/ai/action-plan/<int:topic_id>", methods=["POST"])
@@ -1,8 +1,8 @@
 from flask import Blueprint, request, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from models import User
 from database import db
+from services.passwords import password_hasher, HashingBusy
 
 auth = Blueprint("auth", __name__)
 
@@ -14,9 +14,14 @@ def register():
     if User.query.filter_by(email=data["email"]).first():
         return jsonify({"error": "User already exists"}), 400
     
+    try:
+        password_hash = password_hasher.hash(data["password"])
+    except HashingBusy as e:
+        return jsonify({"error": str(e)}), 503, {"Retry-After": "1"}
+    
     user = User(
         email=data["email"],
-        password=generate_password_hash(data["password"]),
+        password=password_hash,
         role=data.get("role", "user")
     )
     db.session.add(user)
@@ -29,8 +34,21 @@ def login():
     data = request.json
     user = User.query.filter_by(email=data["email"]).first()
 
-    if not user or not check_password_hash(user.password, data["password"]):
+    if not user:
         return jsonify({"error": "invalid credentials"}), 401
+    
+    try:
+        valid, new_hash = password_hasher.verify(user.password, data["password"])
+    except HashingBusy as e:
+        return jsonify({"error": str(e)}), 503, {"Retry-After": "1"}
+    
+    if not valid:
+        return jsonify({"error": "invalid credentials"}), 401
+    
+    # Hash parameters changed since this password was stored: upgrade it
+    if new_hash:
+        user.password = new_hash
+        db.session.commit()
 
     # Simplified - just use user_id as string
     # Store additional claims separately
@@ -1,10 +1,11 @@
 # routes/moderation.py - Complete with action endpoints
 
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 from models import Topic
 from database import db
 from ai.gemini import moderator_reasoning
+from services.moderation_queue import get_queue_page, apply_bulk_action
 
 moderation = Blueprint("moderation", __name__)
 
@@ -42,6 +43,118 @@ def moderate(topic_id):
         return jsonify({"error": str(e)}), 500
 
 
+@moderation.route("/moderation/queue")
+@jwt_required()
+def moderation_queue():
+    """Moderation queue ordered by priority, risk and recency (cursor paginated)"""
+    try:
+        claims = get_jwt()
+        user_role = claims.get("role", "user")
+        
+        if user_role not in ["moderator", "admin"]:
+            return jsonify({"error": "forbidden"}), 403
+        
+        filters = {
+            "status": request.args.get("status", "active"),
+            "priority": request.args.get("priority"),
+            "tag": request.args.get("tag"),
+            "min_risk": request.args.get("min_risk", type=float)
+        }
+        limit = request.args.get("limit", 50, type=int)
+        
+        try:
+            topics_page, next_cursor = get_queue_page(
+                filters,
+                cursor=request.args.get("cursor"),
+                limit=limit
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        return jsonify({
+            "items": [{
+                "id": t.id,
+                "title": t.title,
+                "tags": t.tags.split(",") if t.tags else [],
+                "sentiment_score": t.sentiment_score,
+                "positive_count": t.positive_count,
+                "negative_count": t.negative_count,
+                "status": t.status,
+                "priority": t.priority,
+                "risk_score": t.risk_score,
+                "created_at": t.created_at.isoformat()
+            } for t in topics_page],
+            "next_cursor": next_cursor
+        }), 200
+    except Exception as e:
+        print(f"Error loading moderation queue: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+def _bulk_target_error(topic_ids, filters):
+    """Reject malformed bulk targets before anything touches the database;
+    e.g. a string topic_ids would otherwise be iterated character by character"""
+    if topic_ids is not None:
+        if not isinstance(topic_ids, list) or \
+                not all(isinstance(i, int) and not isinstance(i, bool) for i in topic_ids):
+            return "topic_ids must be a list of integers"
+        return None
+    if not isinstance(filters, dict):
+        return "filter must be an object"
+    for key in ("status", "priority", "tag"):
+        if filters.get(key) is not None and not isinstance(filters[key], str):
+            return f"filter.{key} must be a string"
+    min_risk = filters.get("min_risk")
+    if min_risk is not None and (not isinstance(min_risk, (int, float)) or isinstance(min_risk, bool)):
+        return "filter.min_risk must be a number"
+    return None
+
+
+@moderation.route("/moderation/bulk", methods=["POST"])
+@jwt_required()
+def bulk_action():
+    """Apply priority/resolve/escalate/archive to many topics in one transaction"""
+    try:
+        claims = get_jwt()
+        user_role = claims.get("role", "user")
+        
+        if user_role not in ["moderator", "admin"]:
+            return jsonify({"error": "forbidden"}), 403
+        
+        data = request.json or {}
+        topic_ids = data.get("topic_ids")
+        filters = data.get("filter")
+        
+        if (topic_ids is None) == (filters is None):
+            return jsonify({"error": "provide exactly one of topic_ids or filter"}), 400
+
+        error = _bulk_target_error(topic_ids, filters)
+        if error:
+            return jsonify({"error": error}), 400
+
+        try:
+            outcomes = apply_bulk_action(data.get("action"), topic_ids=topic_ids, filters=filters)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        db.session.commit()
+        
+        summary = {}
+        for outcome in outcomes.values():
+            summary[outcome] = summary.get(outcome, 0) + 1
+        
+        return jsonify({
+            "action": data.get("action"),
+            "summary": summary,
+            "results": [{"topic_id": topic_id, "outcome": outcome}
+                        for topic_id, outcome in outcomes.items()]
+        }), 200
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error applying bulk action: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
 @moderation.route("/moderation/topic/<int:topic_id>/priority", methods=["POST"])
 @jwt_required()
 def set_priority(topic_id):
@@ -1,23 +1,61 @@
 from flask import Blueprint, request, jsonify
+from datetime import datetime
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import Topic, Post, PollOption, PollVote
+from sqlalchemy.exc import IntegrityError
+from models import Topic, Post, SentimentHistory
 from database import db
-from ai.gemini import analyze_post
+from services.sentiment import tiered_sentiment, post_enrichment_values
+from services.counters import increment_topic_counters, sentiment_deltas, exact_counters, sentiment_score_expr
+from services.poll_tally import insert_vote, poll_tally
+from services.events import event_bus
+from services.trending import activity_score
+from services.stakeholders import record_post_stakeholders
 
 posts = Blueprint("posts", __name__)
 
 def update_topic(topic, analysis):
-    key_points = analysis.get('key_points', '')
-    if key_points:
-        topic.distilled_points += f"\n  {key_points}"
-    topic.sentiment_count += 1
-    
-    if analysis["sentiment"] == "negative":
-        topic.sentiment_score -= 1
-        topic.negative_count += 1
-    elif analysis["sentiment"] == "positive":
-        topic.sentiment_score += 1
-        topic.positive_count += 1
+    """Apply a post's analysis to its topic's aggregates (SQL-side increments)"""
+    increment_topic_counters(
+        topic.id,
+        sentiment_deltas(analysis.get("sentiment")),
+        analysis.get('key_points', ''),
+        activity=activity_score("post")
+    )
+    # Snapshot the updated score (with unfolded shard deltas) for the
+    # sentiment timeline in the same statement
+    db.session.execute(
+        db.insert(SentimentHistory).from_select(
+            ["topic_id", "sentiment_score", "timestamp"],
+            db.select(Topic.id, sentiment_score_expr(), db.literal(datetime.utcnow()))
+              .where(Topic.id == topic.id)
+        )
+    )
+
+
+def publish_post_events(topic, post, analysis):
+    """Push new-post, analysis and sentiment events to live topic listeners"""
+    event_bus.publish_topic(topic.id, "post_created", {
+        "id": post.id,
+        "content": post.content,
+        "sentiment": post.sentiment,
+        "emotion": post.emotion,
+        "tags": post.tags.split(",") if post.tags else [],
+        "created_at": post.created_at.isoformat()
+    })
+    event_bus.publish_topic(topic.id, "analysis_completed", {
+        "post_id": post.id,
+        "sentiment": analysis.get("sentiment"),
+        "score": analysis.get("score"),
+        "emotion": analysis.get("emotion"),
+        "tags": analysis.get("tags", []),
+        "key_points": analysis.get("key_points", "")
+    })
+    counters = exact_counters(topic)
+    event_bus.publish_topic(topic.id, "sentiment_changed", {
+        "sentiment_score": counters["sentiment_score"],
+        "positive_count": counters["positive_count"],
+        "negative_count": counters["negative_count"]
+    })
 
 @posts.route("/posts", methods=["POST"])
 @jwt_required()
@@ -30,24 +68,31 @@ def add_post():
         
         topic = Topic.query.get_or_404(data["topic_id"])
         
-        analysis = analyze_post(data["content"])
+        # One enrichment pass (local model first, Gemini only when it is unsure);
+        # the results are stored so later features don't re-analyze the text
+        analysis = tiered_sentiment.enrich_post(data["content"], title=topic.title)
         
         post = Post(
             topic_id=topic.id,
             author_id=user_id,
             content=data["content"],
-            key_points=analysis.get("key_points", ""),
-            sentiment=analysis.get("sentiment", "neutral")
+            **post_enrichment_values(analysis)
         )
         
         update_topic(topic, analysis)
+        record_post_stakeholders(topic.id, post.content)
         
         db.session.add(post)
         db.session.commit()
         
+        publish_post_events(topic, post, analysis)
+        
         return jsonify({
             "message": "post analyzed and stored",
             "sentiment": analysis.get("sentiment"),
+            "score": analysis.get("score"),
+            "emotion": analysis.get("emotion"),
+            "tags": analysis.get("tags", []),
             "post_id": post.id
         }), 201
     except Exception as e:
@@ -66,23 +111,26 @@ def vote_poll():
         user_id = int(get_jwt_identity())
         
         data = request.json
+        option_id = int(data["option_id"])
         
-        option = PollOption.query.get_or_404(data["option_id"])
-        
-        # Check if user already voted on this topic
-        existing_vote = PollVote.query.join(PollOption).filter(
-            PollOption.topic_id == option.topic_id,
-            PollVote.user_id == user_id
-        ).first()
-        
-        if existing_vote:
+        # One statement: resolves the topic and relies on the
+        # unique (topic_id, user_id) constraint instead of a pre-check
+        try:
+            inserted = insert_vote(option_id, user_id)
+        except IntegrityError:
+            db.session.rollback()
             return jsonify({"error": "already voted"}), 400
         
-        vote = PollVote(option_id=option.id, user_id=user_id)
-        option.vote_count += 1
+        if not inserted:
+            return jsonify({"error": "poll option not found"}), 404
         
-        db.session.add(vote)
-        db.session.commit()
+        # Buffered with the tally, including the vote's trending activity
+        topic_id = poll_tally.topic_for_option(option_id)
+        poll_tally.record_vote(option_id, topic_id, activity_score("vote"))
+        
+        event_bus.publish_topic(topic_id, "poll_tally", {
+            "options": poll_tally.get_tally(topic_id)
+        })
         
         return jsonify({"message": "vote recorded"}), 200
     except Exception as e:
@@ -90,4 +138,4 @@ def vote_poll():
         print(f"Error voting: {e}")
         import traceback
         traceback.print_exc()
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
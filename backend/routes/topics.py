@@ -1,7 +1,14 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import Topic, PollOption, Post
 from database import db
+from services.counters import exact_counters
+from services.poll_tally import poll_tally
+from services.events import event_bus, topic_channel, format_sse
+from services.http_cache import conditional, topic_list_validator, topic_validator
+from services.responses import stream_json_array
+from services.trending import trending_topics, heat
+from services.archive import is_archived, load_archived_topic
 
 topics = Blueprint("topics", __name__)
 
@@ -44,14 +51,16 @@ def create_topic():
 
 @topics.route("/topics", methods=["GET"])
 @jwt_required()
+@conditional(topic_list_validator)
 def list_topics():
     try:
         # Just verify token is valid
         get_jwt_identity()
         
-        topics_list = Topic.query.order_by(Topic.created_at.desc()).all()
+        # Streamed in batches so memory stays flat as the table grows
+        topics_query = Topic.query.order_by(Topic.created_at.desc()).yield_per(500)
         
-        return jsonify([{
+        return stream_json_array(topics_query, lambda t: {
             "id": t.id,
             "title": t.title,
             "tags": t.tags.split(",") if t.tags else [],
@@ -62,7 +71,7 @@ def list_topics():
             "status": t.status,
             "priority": t.priority,
             "created_at": t.created_at.isoformat()
-        } for t in topics_list]), 200
+        }), 200
     except Exception as e:
         print(f"Error listing topics: {e}")
         import traceback
@@ -70,41 +79,78 @@ def list_topics():
         return jsonify({"error": str(e)}), 500
 
 
+@topics.route("/topics/trending", methods=["GET"])
+@jwt_required()
+def list_trending():
+    """Hottest topics by time-decayed post and vote activity"""
+    try:
+        limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+        
+        return jsonify({
+            "topics": [{
+                "id": t.id,
+                "title": t.title,
+                "tags": t.tags.split(",") if t.tags else [],
+                "sentiment_score": t.sentiment_score,
+                "post_count": t.post_count or 0,
+                "heat": round(heat(t.hot_score), 4),
+                "last_activity_at": t.last_activity_at.isoformat() if t.last_activity_at else None,
+                "status": t.status,
+                "created_at": t.created_at.isoformat()
+            } for t in trending_topics(limit=limit)]
+        }), 200
+    except Exception as e:
+        print(f"Error listing trending topics: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
 @topics.route("/topics/<int:topic_id>", methods=["GET"])
 @jwt_required()
+@conditional(topic_validator)
 def get_topic(topic_id):
     try:
         # Just verify token is valid
         get_jwt_identity()
         
-        topic = Topic.query.get_or_404(topic_id)
-        posts = Post.query.filter_by(topic_id=topic_id).order_by(Post.created_at.desc()).all()
+        topic = db.session.get(Topic, topic_id)
+        archived = topic is None
+        if not archived:
+            posts = Post.query.filter_by(topic_id=topic_id).order_by(Post.created_at.desc()).all()
+            poll_options = poll_tally.get_tally(topic_id) if topic.has_poll else None
+        else:
+            # Moved to the archive tables (services/archive.py)
+            loaded = load_archived_topic(topic_id)
+            if loaded is None:
+                return jsonify({"error": "topic not found"}), 404
+            topic, posts, poll_options, _ = loaded
         
         poll_data = None
         if topic.has_poll:
-            options = PollOption.query.filter_by(topic_id=topic_id).all()
             poll_data = {
                 "question": topic.poll_question,
-                "options": [{
-                    "id": opt.id,
-                    "text": opt.option_text,
-                    "votes": opt.vote_count
-                } for opt in options]
+                "options": poll_options
             }
         
+        counters = exact_counters(topic)
+        
         return jsonify({
             "id": topic.id,
             "title": topic.title,
             "tags": topic.tags.split(",") if topic.tags else [],
-            "sentiment_score": topic.sentiment_score,
-            "positive_count": topic.positive_count,
-            "negative_count": topic.negative_count,
+            "status": topic.status,
+            "archived": archived,
+            "sentiment_score": counters["sentiment_score"],
+            "positive_count": counters["positive_count"],
+            "negative_count": counters["negative_count"],
             "distilled_points": topic.distilled_points,
             "poll": poll_data,
             "posts": [{
                 "id": p.id,
                 "content": p.content,
                 "sentiment": p.sentiment,
+                "score": p.sentiment_score,
+                "emotion": p.emotion,
+                "tags": p.tags.split(",") if p.tags else [],
                 "created_at": p.created_at.isoformat()
             } for p in posts]
         }), 200
@@ -112,4 +158,41 @@ def get_topic(topic_id):
         print(f"Error getting topic: {e}")
         import traceback
         traceback.print_exc()
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
+
+
+@topics.route("/topics/<int:topic_id>/events")
+# EventSource cannot send headers, so only this stream also takes ?jwt=<token>
+@jwt_required(locations=["headers", "query_string"])
+def topic_events(topic_id):
+    """Server-sent events for a topic: new posts, analysis, sentiment and poll tallies.
+
+    The stream only waits on the in-process subscription, so an idle
+    dashboard costs no database queries after the existence check.
+    """
+    # Archived topics never get events, but their pages still open a stream
+    if db.session.get(Topic, topic_id) is None and not is_archived(topic_id):
+        return jsonify({"error": "topic not found"}), 404
+    
+    heartbeat = current_app.config.get("SSE_HEARTBEAT_INTERVAL", 15)
+    subscription = event_bus.subscribe(topic_channel(topic_id))
+    # Under the ASGI front (services/asgi.py), a disconnect releases the
+    # stream's thread at once instead of at the next heartbeat
+    request.environ.get("asgi.on_disconnect", []).append(subscription.wake)
+    
+    def stream():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                event = subscription.get(timeout=heartbeat)
+                if event is None:
+                    yield ": keepalive\n\n"
+                else:
+                    yield format_sse(event)
+        finally:
+            subscription.close()
+    
+    return Response(stream(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
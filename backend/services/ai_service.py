@@ -1,69 +1,46 @@
 # services/ai_service.py - Main AI orchestration service
 
-import google.generativeai as genai
-import os
+from collections import Counter
 from datetime import datetime, timedelta
 import json
-import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 
-# Configure Gemini
-genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-model = genai.GenerativeModel('gemini-flash-lite-latest')
+# Model calls go through the configured backend (Gemini or the local fake)
+from ai.llm import llm
+from services import resource_catalog
+
+# Topic embeddings are fitted on our own corpus (services/embeddings.py);
+# NumPy and scikit-learn load on first use, not at startup
+from services.embeddings import topic_index
 
 class AIService:
     """Comprehensive AI service for the platform"""
     
     def __init__(self):
-        self.embedding_cache = {}
         self.summary_cache = {}
+        self.cache_counts = Counter()  # (cache, "hit"|"miss") -> lookups
     
     # ==================== SENTIMENT ANALYSIS ====================
     
     def analyze_sentiment(self, text):
-        """Analyze sentiment of a single text"""
-        prompt = f"""Analyze the sentiment of this text. Respond with ONLY a JSON object:
-{{
-  "sentiment": "positive" | "negative" | "neutral",
-  "score": <number from -1 to 1>,
-  "confidence": <number from 0 to 1>,
-  "key_emotion": "angry" | "sad" | "happy" | "frustrated" | "satisfied" | "neutral"
-}}
-
-Text: "{text}"
-
-Respond with ONLY the JSON, no other text."""
-
-        try:
-            response = model.generate_content(prompt)
-            text = response.text.strip()
-            
-            # Clean response
-            text = text.replace('```json', '').replace('```', '').strip()
-            
-            data = json.loads(text)
-            return {
-                'sentiment': data.get('sentiment', 'neutral'),
-                'score': float(data.get('score', 0)),
-                'confidence': float(data.get('confidence', 0.5)),
-                'emotion': data.get('key_emotion', 'neutral')
-            }
-        except Exception as e:
-            print(f"Sentiment analysis error: {e}")
-            return {
-                'sentiment': 'neutral',
-                'score': 0,
-                'confidence': 0,
-                'emotion': 'neutral'
-            }
+        """Analyze sentiment of a single text (shares the post enrichment call)"""
+        from ai.gemini import enrich_post
+        
+        enrichment = enrich_post(text)
+        return {
+            'sentiment': enrichment['sentiment'],
+            'score': enrichment['score'],
+            'confidence': enrichment['confidence'],
+            'emotion': enrichment['emotion']
+        }
     
-    def get_sentiment_timeline(self, topic_id):
-        """Get sentiment history for a topic"""
+    def get_sentiment_timeline(self, topic_id, history=None):
+        """Get sentiment history for a topic (or from the given history rows)"""
         from models import SentimentHistory
         from database import db
         
-        history = SentimentHistory.query.filter_by(topic_id=topic_id)\
-            .order_by(SentimentHistory.timestamp.asc()).all()
+        if history is None:
+            history = SentimentHistory.query.filter_by(topic_id=topic_id)\
+                .order_by(SentimentHistory.timestamp.asc()).all()
         
         return [{
             'timestamp': h.timestamp.isoformat(),
@@ -82,101 +59,73 @@ Respond with ONLY the JSON, no other text."""
     
     def summarize_discussion(self, topic_title, posts):
         """Generate AI summary of a topic discussion"""
-        cache_key = f"summary_{hash(topic_title + str(len(posts)))}"
-        
-        if cache_key in self.summary_cache:
-            return self.summary_cache[cache_key]
+        cache_key, cached = self._cached_summary(topic_title, len(posts))
+        if cached is not None:
+            return cached
         
         # Limit to most recent/relevant posts
-        post_texts = [p.content for p in posts[:50]]  # Latest 50 posts
-        combined = "\n".join(post_texts)
-        
-        prompt = f"""Summarize this discussion thread in 3-4 concise sentences.
-Topic: {topic_title}
-
-Posts:
-{combined}
+        prompt = self._summary_prompt(topic_title, [p.content for p in posts[:50]])  # Latest 50 posts
 
-Summary:"""
+        try:
+            summary = llm.generate(prompt)
+            self.summary_cache[cache_key] = summary
+            return summary
+        except Exception as e:
+            print(f"Summarization error: {e}")
+            return "Unable to generate summary at this time."
+    
+    async def summarize_discussion_async(self, topic_title, post_texts, post_count):
+        """summarize_discussion() for the ASGI routes; takes the newest post texts"""
+        cache_key, cached = self._cached_summary(topic_title, post_count)
+        if cached is not None:
+            return cached
 
         try:
-            response = model.generate_content(prompt)
-            summary = response.text.strip()
+            summary = await llm.agenerate(self._summary_prompt(topic_title, post_texts[:50]))
             self.summary_cache[cache_key] = summary
             return summary
         except Exception as e:
             print(f"Summarization error: {e}")
             return "Unable to generate summary at this time."
     
+    def _cached_summary(self, topic_title, post_count):
+        cache_key = f"summary_{hash(topic_title + str(post_count))}"
+        if cache_key in self.summary_cache:
+            self.cache_counts["summary", "hit"] += 1
+            return cache_key, self.summary_cache[cache_key]
+        self.cache_counts["summary", "miss"] += 1
+        return cache_key, None
+    
+    def _summary_prompt(self, topic_title, post_texts):
+        combined = "\n".join(post_texts)
+        return f"""Summarize this discussion thread in 3-4 concise sentences.
+Topic: {topic_title}
+
+Posts:
+{combined}
+
+Summary:"""
+    
     # ==================== TOPIC CLUSTERING ====================
     
     def get_topic_embedding(self, text):
-        """Get embedding vector for text"""
-        cache_key = hash(text)
-        
-        if cache_key in self.embedding_cache:
-            return self.embedding_cache[cache_key]
-        
-        try:
-            # Use Gemini's embedding API or a simpler approach
-            # For now, we'll use a simple hashing approach
-            # In production, use proper embeddings
-            embedding = self._simple_embedding(text)
-            self.embedding_cache[cache_key] = embedding
-            return embedding
-        except Exception as e:
-            print(f"Embedding error: {e}")
-            return None
-    
-    def _simple_embedding(self, text):
-        """Simple text embedding (replace with proper embeddings in production)"""
-        # This is a placeholder - use sentence-transformers or OpenAI embeddings
-        words = text.lower().split()
-        # Create a simple frequency-based embedding
-        vocab_size = 1000
-        embedding = np.zeros(vocab_size)
-        for word in words:
-            idx = hash(word) % vocab_size
-            embedding[idx] += 1
-        return embedding / (np.linalg.norm(embedding) + 1e-10)
+        """Embedding vector for text (None before the first fit or when no
+        term in it is known to the model)"""
+        return topic_index.embed(text)
     
     def find_similar_topics(self, topic_id, limit=5):
         """Find topics similar to the given topic"""
         from models import Topic
         
-        target_topic = Topic.query.get(topic_id)
-        if not target_topic:
-            return []
-        
-        target_text = f"{target_topic.title} {target_topic.distilled_points}"
-        target_embedding = self.get_topic_embedding(target_text)
-        
-        if target_embedding is None:
-            return []
-        
-        # Get all other topics
-        all_topics = Topic.query.filter(Topic.id != topic_id).all()
-        similarities = []
-        
-        for topic in all_topics:
-            topic_text = f"{topic.title} {topic.distilled_points}"
-            embedding = self.get_topic_embedding(topic_text)
-            
-            if embedding is not None:
-                similarity = cosine_similarity(
-                    target_embedding.reshape(1, -1),
-                    embedding.reshape(1, -1)
-                )[0][0]
-                
-                similarities.append({
-                    'topic_id': topic.id,
-                    'title': topic.title,
-                    'similarity': float(similarity),
-                    'tags': topic.tags.split(',') if topic.tags else []
-                })
-        
-        # Sort by similarity and return top N
-        similarities.sort(key=lambda x: x['similarity'], reverse=True)
+        # A few spare candidates in case some were deleted or archived since the last fit
+        nearest = topic_index.similar_to_topic(topic_id, limit + 5)
+        topics = {t.id: t for t in Topic.query.filter(Topic.id.in_([i for i, _ in nearest]))}
+        similarities = [{
+            'topic_id': i,
+            'title': topics[i].title,
+            'similarity': similarity,
+            'tags': topics[i].tags.split(',') if topics[i].tags else []
+        } for i, similarity in nearest if i in topics]
         return similarities[:limit]
     
     # ==================== DUPLICATE DETECTION ====================
@@ -190,23 +139,10 @@ Summary:"""
     # ==================== AUTO-TAGGING ====================
     
     def suggest_tags(self, title, content):
-        """AI-powered tag suggestions"""
-        prompt = f"""Based on this topic, suggest 3-5 relevant tags.
-Title: {title}
-Content: {content}
-
-Respond with ONLY a JSON array of tags: ["tag1", "tag2", "tag3"]
-Tags should be single words or short phrases, lowercase."""
-
-        try:
-            response = model.generate_content(prompt)
-            text = response.text.strip()
-            text = text.replace('```json', '').replace('```', '').strip()
-            tags = json.loads(text)
-            return tags[:5]  # Max 5 tags
-        except Exception as e:
-            print(f"Tag suggestion error: {e}")
-            return []
+        """AI-powered tag suggestions (shares the post enrichment call)"""
+        from ai.gemini import enrich_post
+        
+        return enrich_post(content, title=title)['tags']
     
     # ==================== PREDICTIVE ANALYTICS ====================
     
@@ -260,32 +196,18 @@ Tags should be single words or short phrases, lowercase."""
     
     # ==================== SEARCH ====================
     
-    def semantic_search(self, query, topics, limit=10):
+    def semantic_search(self, query, limit=10):
         """Semantic search across topics"""
-        query_embedding = self.get_topic_embedding(query)
+        from models import Topic
         
-        if query_embedding is None:
-            # Fallback to keyword search
-            return [t for t in topics if query.lower() in t.title.lower()][:limit]
+        nearest = topic_index.search(query, limit + 5)
         
-        results = []
-        for topic in topics:
-            topic_text = f"{topic.title} {topic.distilled_points}"
-            embedding = self.get_topic_embedding(topic_text)
-            
-            if embedding is not None:
-                similarity = cosine_similarity(
-                    query_embedding.reshape(1, -1),
-                    embedding.reshape(1, -1)
-                )[0][0]
-                
-                results.append({
-                    'topic': topic,
-                    'relevance': float(similarity)
-                })
+        if nearest is None:
+            # Fallback to keyword search
+            return Topic.query.filter(Topic.title.ilike(f"%{query}%")).limit(limit).all()
         
-        results.sort(key=lambda x: x['relevance'], reverse=True)
-        return [r['topic'] for r in results[:limit]]
+        topics = {t.id: t for t in Topic.query.filter(Topic.id.in_([i for i, _ in nearest]))}
+        return [topics[i] for i, _ in nearest if i in topics][:limit]
     
     # ==================== ANALYTICS ====================
     
@@ -326,13 +248,11 @@ Tags should be single words or short phrases, lowercase."""
             'active_discussions': total_topics - resolved_count
         }
 
-# Add these methods to your AIService class in services/ai_service.py
+    # ==================== DECISION SUPPORT FEATURES ====================
 
-# ==================== DECISION SUPPORT FEATURES ====================
-
-def generate_action_recommendations(self, topic):
-    """Generate actionable recommendations for moderators"""
-    prompt = f"""As a moderator for a college community platform, analyze this issue and provide SPECIFIC, ACTIONABLE recommendations.
+    def generate_action_recommendations(self, topic):
+        """Generate actionable recommendations for moderators"""
+        prompt = f"""As a moderator for a college community platform, analyze this issue and provide SPECIFIC, ACTIONABLE recommendations.
 
 ISSUE: "{topic.title}"
 
@@ -368,228 +288,163 @@ Provide recommendations in this EXACT JSON format:
 
 Make it practical, specific, and actionable for a college moderator."""
 
-    try:
-        response = model.generate_content(prompt)
-        text = response.text.strip()
-        text = text.replace('```json', '').replace('```', '').strip()
+        try:
+            text = llm.generate(prompt)
+            text = text.replace('```json', '').replace('```', '').strip()
         
-        # Parse the JSON response
-        data = json.loads(text)
+            # Parse the JSON response
+            data = json.loads(text)
         
-        # Add AI confidence score
-        data['ai_confidence'] = 0.85
-        data['generated_at'] = datetime.utcnow().isoformat()
+            # Add AI confidence score
+            data['ai_confidence'] = 0.85
+            data['generated_at'] = datetime.utcnow().isoformat()
         
-        return data
-    except Exception as e:
-        print(f"Error generating action recommendations: {e}")
-        # Return default recommendations
-        return self._get_default_recommendations(topic)
-
-def _get_default_recommendations(self, topic):
-    """Default fallback recommendations"""
-    return {
-        "resources_needed": ["Department contact", "Meeting room", "Feedback form"],
-        "stakeholders": [
-            {
-                "name": "Department Head",
-                "role": "Responsible authority",
-                "contact": "Check college directory",
-                "impact": "high"
-            }
-        ],
-        "action_plan": [
-            {
-                "step": "Identify responsible department",
-                "time_estimate": "30 minutes",
-                "priority": "high",
-                "resources": ["College directory", "Organizational chart"],
-                "expected_outcome": "Clear ownership of issue"
-            }
-        ],
-        "quick_actions": [
-            "Escalate to relevant department",
-            "Schedule follow-up meeting",
-            "Create feedback collection form"
-        ],
-        "budget_implications": "Minimal budget impact expected",
-        "timeline": "1-2 weeks for initial resolution",
-        "ai_confidence": 0.7,
-        "generated_at": datetime.utcnow().isoformat()
-    }
-
-def analyze_resource_availability(self, topic):
-    """Analyze what resources are available to solve the issue"""
-    from models import Topic, Post
-    
-    # Get similar past issues and their resolutions
-    similar_topics = self.find_similar_topics(topic.id, limit=3)
-    
-    # Extract tags to determine resource type
-    tags = topic.tags.split(',') if topic.tags else []
-    
-    # Determine resource categories based on tags
-    resource_categories = self._categorize_resources(tags, topic.title)
-    
-    return {
-        "available_resources": resource_categories,
-        "similar_past_issues": [
-            {
-                "id": t["topic_id"],
-                "title": t["title"],
-                "similarity": f"{t['similarity']*100:.1f}%",
-                "resolution": "Check resolution history"  # Would come from DB in real implementation
-            }
-            for t in similar_topics
-        ],
-        "recommended_contacts": self._get_recommended_contacts(tags),
-        "budget_status": self._estimate_budget_requirements(topic)
-    }
-
-def _categorize_resources(self, tags, title):
-    """Categorize available resources based on issue type"""
-    resource_map = {
-        "facilities": ["Maintenance staff", "Repair budget", "Inspection team"],
-        "food": ["Cafeteria manager", "Food committee", "Health inspector"],
-        "it": ["IT support desk", "Network team", "Hardware inventory"],
-        "academic": ["Department head", "Faculty committee", "Academic council"],
-        "transport": ["Transport office", "Bus schedule", "Parking management"],
-        "hr": ["HR department", "Student affairs", "Counseling services"]
-    }
-    
-    categories = []
-    for tag in tags:
-        tag_lower = tag.strip().lower()
-        for key, resources in resource_map.items():
-            if key in tag_lower or key in title.lower():
-                categories.append({
-                    "category": key,
-                    "resources": resources,
-                    "availability": "Available during college hours"
-                })
-    
-    # Default resources if no specific category found
-    if not categories:
-        categories.append({
-            "category": "general",
-            "resources": ["Student affairs office", "College administration", "Help desk"],
-            "availability": "9 AM - 5 PM"
-        })
-    
-    return categories
-
-def _get_recommended_contacts(self, tags):
-    """Get recommended contacts based on issue tags"""
-    contact_map = {
-        "facilities": [
-            {"name": "Facilities Manager", "extension": "123", "email": "facilities@college.edu"},
-            {"name": "Maintenance Head", "extension": "124", "email": "maintenance@college.edu"}
-        ],
-        "food": [
-            {"name": "Cafeteria Manager", "extension": "200", "email": "cafeteria@college.edu"},
-            {"name": "Food Committee Head", "extension": "201", "email": "foodcom@college.edu"}
-        ],
-        "it": [
-            {"name": "IT Support", "extension": "300", "email": "itsupport@college.edu"},
-            {"name": "Network Administrator", "extension": "301", "email": "network@college.edu"}
-        ]
-    }
-    
-    contacts = []
-    for tag in tags:
-        tag_lower = tag.strip().lower()
-        if tag_lower in contact_map:
-            contacts.extend(contact_map[tag_lower])
-    
-    # Add default contacts
-    if not contacts:
-        contacts = [
-            {"name": "Student Affairs", "extension": "100", "email": "studentaffairs@college.edu"},
-            {"name": "Help Desk", "extension": "0", "email": "help@college.edu"}
-        ]
-    
-    return contacts
-
-def _estimate_budget_requirements(self, topic):
-    """Estimate budget requirements for resolution"""
-    # Simple heuristic based on sentiment and activity
-    severity = abs(topic.sentiment_score)
-    activity = topic.positive_count + topic.negative_count
-    
-    if severity > 0.7 or activity > 20:
-        budget_level = "High ($1,000-$5,000)"
-    elif severity > 0.3 or activity > 10:
-        budget_level = "Medium ($100-$1,000)"
-    else:
-        budget_level = "Low (< $100)"
-    
-    return {
-        "estimated_budget": budget_level,
-        "funding_sources": ["Department budget", "Student welfare fund", "Emergency fund"],
-        "approval_required": "Department head approval" if "High" in budget_level else "Supervisor approval"
-    }
+            return data
+        except Exception as e:
+            print(f"Error generating action recommendations: {e}")
+            # Return default recommendations
+            return self._get_default_recommendations(topic)
 
-def generate_decision_timeline(self, topic):
-    """Generate decision timeline with past, present, future insights"""
-    from datetime import datetime, timedelta
-    
-    similar_topics = self.find_similar_topics(topic.id, limit=2)
-    
-    timeline = {
-        "past": {
-            "similar_issues": [
+    def _get_default_recommendations(self, topic):
+        """Default fallback recommendations"""
+        return {
+            "resources_needed": ["Department contact", "Meeting room", "Feedback form"],
+            "stakeholders": [
                 {
-                    "title": t["title"],
-                    "when": "1 month ago",
-                    "resolution": "Resolved via committee meeting",
-                    "outcome": "85% satisfaction improvement"
+                    "name": "Department Head",
+                    "role": "Responsible authority",
+                    "contact": "Check college directory",
+                    "impact": "high"
                 }
-                for t in similar_topics[:2]
             ],
-            "lessons_learned": [
-                "Quick response prevents escalation",
-                "Involving stakeholders improves satisfaction"
-            ]
-        },
-        "present": {
-            "options": [
-                {
-                    "option": "Immediate action",
-                    "pros": ["Quick resolution", "Shows responsiveness"],
-                    "cons": ["May not address root cause", "Limited consultation"],
-                    "time": "1-2 days",
-                    "resources": ["On-call staff", "Emergency budget"]
-                },
+            "action_plan": [
                 {
-                    "option": "Committee approach",
-                    "pros": ["Thorough analysis", "Stakeholder buy-in"],
-                    "cons": ["Slower", "More resource intensive"],
-                    "time": "1-2 weeks",
-                    "resources": ["Meeting coordination", "Committee members"]
+                    "step": "Identify responsible department",
+                    "time_estimate": "30 minutes",
+                    "priority": "high",
+                    "resources": ["College directory", "Organizational chart"],
+                    "expected_outcome": "Clear ownership of issue"
                 }
             ],
-            "ai_recommendation": "Start with immediate action while forming committee for long-term solution"
-        },
-        "future": {
-            "predictions": [
-                {
-                    "scenario": "If resolved within 48 hours",
-                    "outcome": "High satisfaction, low escalation risk"
-                },
+            "quick_actions": [
+                "Escalate to relevant department",
+                "Schedule follow-up meeting",
+                "Create feedback collection form"
+            ],
+            "budget_implications": "Minimal budget impact expected",
+            "timeline": "1-2 weeks for initial resolution",
+            "ai_confidence": 0.7,
+            "generated_at": datetime.utcnow().isoformat()
+        }
+
+    def analyze_resource_availability(self, topic):
+        """Analyze what resources are available to solve the issue"""
+        from models import Topic, Post
+    
+        # Get similar past issues and their resolutions
+        similar_topics = self.find_similar_topics(topic.id, limit=3)
+    
+        # Extract tags to determine resource type
+        tags = topic.tags.split(',') if topic.tags else []
+    
+        # Route the issue to resource catalog categories (tags and title)
+        categories = resource_catalog.router.route(tags, topic.title)
+    
+        return {
+            "available_resources": resource_catalog.available_resources(categories),
+            "similar_past_issues": [
                 {
-                    "scenario": "If delayed beyond 1 week",
-                    "outcome": "Moderate dissatisfaction, medium escalation risk"
+                    "id": t["topic_id"],
+                    "title": t["title"],
+                    "similarity": f"{t['similarity']*100:.1f}%",
+                    "resolution": "Check resolution history"  # Would come from DB in real implementation
                 }
+                for t in similar_topics
             ],
-            "success_metrics": [
-                "Reduction in similar complaints",
-                "Improvement in sentiment score",
-                "Resolution time under 72 hours"
-            ]
+            "recommended_contacts": resource_catalog.recommended_contacts(categories),
+            "budget_status": self._estimate_budget_requirements(topic)
+        }
+
+    def _estimate_budget_requirements(self, topic):
+        """Estimate budget requirements for resolution"""
+        # Simple heuristic based on sentiment and activity
+        severity = abs(topic.sentiment_score)
+        activity = topic.positive_count + topic.negative_count
+    
+        if severity > 0.7 or activity > 20:
+            budget_level = "High ($1,000-$5,000)"
+        elif severity > 0.3 or activity > 10:
+            budget_level = "Medium ($100-$1,000)"
+        else:
+            budget_level = "Low (< $100)"
+    
+        return {
+            "estimated_budget": budget_level,
+            "funding_sources": ["Department budget", "Student welfare fund", "Emergency fund"],
+            "approval_required": "Department head approval" if "High" in budget_level else "Supervisor approval"
+        }
+
+    def generate_decision_timeline(self, topic):
+        """Generate decision timeline with past, present, future insights"""
+        from datetime import datetime, timedelta
+    
+        similar_topics = self.find_similar_topics(topic.id, limit=2)
+    
+        timeline = {
+            "past": {
+                "similar_issues": [
+                    {
+                        "title": t["title"],
+                        "when": "1 month ago",
+                        "resolution": "Resolved via committee meeting",
+                        "outcome": "85% satisfaction improvement"
+                    }
+                    for t in similar_topics[:2]
+                ],
+                "lessons_learned": [
+                    "Quick response prevents escalation",
+                    "Involving stakeholders improves satisfaction"
+                ]
+            },
+            "present": {
+                "options": [
+                    {
+                        "option": "Immediate action",
+                        "pros": ["Quick resolution", "Shows responsiveness"],
+                        "cons": ["May not address root cause", "Limited consultation"],
+                        "time": "1-2 days",
+                        "resources": ["On-call staff", "Emergency budget"]
+                    },
+                    {
+                        "option": "Committee approach",
+                        "pros": ["Thorough analysis", "Stakeholder buy-in"],
+                        "cons": ["Slower", "More resource intensive"],
+                        "time": "1-2 weeks",
+                        "resources": ["Meeting coordination", "Committee members"]
+                    }
+                ],
+                "ai_recommendation": "Start with immediate action while forming committee for long-term solution"
+            },
+            "future": {
+                "predictions": [
+                    {
+                        "scenario": "If resolved within 48 hours",
+                        "outcome": "High satisfaction, low escalation risk"
+                    },
+                    {
+                        "scenario": "If delayed beyond 1 week",
+                        "outcome": "Moderate dissatisfaction, medium escalation risk"
+                    }
+                ],
+                "success_metrics": [
+                    "Reduction in similar complaints",
+                    "Improvement in sentiment score",
+                    "Resolution time under 72 hours"
+                ]
+            }
         }
-    }
     
-    return timeline
+        return timeline
 
 # Global instance
 ai_service = AIService()
\ No newline at end of file
@@ -0,0 +1,182 @@
+# services/archive.py - Hot/cold split for finished topics
+#
+# Topics whose status is in ARCHIVE_STATUSES and that have had no activity
+# for ARCHIVE_AFTER_DAYS are moved, with their posts, poll, sentiment
+# history, summaries and moderator records, into the archived_* tables
+# (models.py) on the "archive" bind. The hot tables and their indexes only
+# hold live topics, so every scan-based feature stops paying for old ones.
+# Derived data (counter shards, stakeholder counts, clusters, duplicate and
+# prediction caches) is dropped rather than archived.
+#
+# A batch is copied into the archive (replacing any earlier partial copy)
+# and committed before anything is deleted from the hot tables, so the move
+# works across two databases and a failed run can simply be repeated. Rows
+# that appear after the copy (a late vote or post) stay hot along with
+# their topic until the next run.
+#
+# Reads: load_archived_topic() returns the same shape the hot tables would,
+# so detail endpoints fall back to it transparently when a topic id is not
+# hot any more.
+
+from collections import Counter
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, exists, insert, or_, select
+
+from database import db
+from models import (
+    ActionPlan, AISummary, ClusterTopic, DecisionSupport, DuplicateCandidate, PollOption,
+    PollVote, Post, PredictionScore, SentimentHistory, Topic, TopicCounterShard,
+    TopicStakeholderCount,
+    archived_action_plans, archived_ai_summaries, archived_decision_support,
+    archived_poll_options, archived_poll_votes, archived_posts, archived_sentiment_history,
+    archived_topics
+)
+from services.background import PeriodicJob
+from services.counters import COUNTER_FIELDS
+
+# Hot model -> archive table, children before the topics they point at
+ARCHIVED = [
+    (PollVote, archived_poll_votes),
+    (PollOption, archived_poll_options),
+    (Post, archived_posts),
+    (SentimentHistory, archived_sentiment_history),
+    (AISummary, archived_ai_summaries),
+    (DecisionSupport, archived_decision_support),
+    (ActionPlan, archived_action_plans),
+]
+
+
+def cold_topic_ids(limit):
+    """Ids of finished topics with no recent activity and no unfolded counters"""
+    cutoff = datetime.utcnow() - timedelta(days=current_app.config.get("ARCHIVE_AFTER_DAYS", 30))
+    pending = select(TopicCounterShard.topic_id).where(
+        TopicCounterShard.topic_id == Topic.id,
+        or_(*[getattr(TopicCounterShard, field) != 0 for field in COUNTER_FIELDS],
+            TopicCounterShard.pending_points != "", TopicCounterShard.hot_score.isnot(None))
+    )
+    return db.session.scalars(
+        select(Topic.id)
+        .where(Topic.status.in_(current_app.config.get("ARCHIVE_STATUSES", ["resolved", "archived"])))
+        .where(db.func.coalesce(Topic.last_activity_at, Topic.updated_at, Topic.created_at) < cutoff)
+        .where(~exists(pending))
+        .order_by(Topic.id)
+        .limit(limit)
+    ).all()
+
+
+def _archive_select(statement):
+    # Flask-SQLAlchemy only routes DML and mapped classes by bind key; plain
+    # SELECTs on the archive tables need the engine named
+    return db.session.execute(statement, bind_arguments={"bind": db.engines["archive"]})
+
+
+def _rows(table, topic_column, topic_ids):
+    return [dict(row._mapping) for row in db.session.execute(
+        select(table).where(topic_column.in_(topic_ids)))]
+
+
+def archive_topics(topic_ids):
+    """Move these topics and their data to the archive; returns topics moved"""
+    if not topic_ids:
+        return 0
+    archived_at = datetime.utcnow()
+
+    # 1. Copy into the archive (a rerun replaces the previous copy)
+    topics = _rows(Topic.__table__, Topic.id, topic_ids)
+    copied = {}
+    for model, table in ARCHIVED:
+        copied[model] = _rows(model.__table__, model.topic_id, topic_ids)
+        if model is PollOption:
+            # Freeze tallies from the votes themselves (vote_count is
+            # updated in buffered batches)
+            votes = Counter(vote["option_id"] for vote in copied[PollVote])
+            for option in copied[model]:
+                option["vote_count"] = votes[option["id"]]
+        db.session.execute(delete(table).where(table.c.topic_id.in_(topic_ids)))
+        if copied[model]:
+            db.session.execute(insert(table), copied[model])
+    db.session.execute(delete(archived_topics).where(archived_topics.c.id.in_(topic_ids)))
+    db.session.execute(insert(archived_topics), [dict(row, archived_at=archived_at) for row in topics])
+    db.session.commit()
+
+    # 2. Remove what was copied from the hot tables
+    for model, _ in ARCHIVED:
+        ids = [row["id"] for row in copied[model]]
+        for start in range(0, len(ids), 500):
+            db.session.execute(delete(model).where(model.id.in_(ids[start:start + 500])))
+    db.session.execute(delete(TopicCounterShard).where(TopicCounterShard.topic_id.in_(topic_ids)))
+    db.session.execute(delete(ClusterTopic).where(ClusterTopic.topic_id.in_(topic_ids)))
+    db.session.execute(delete(TopicStakeholderCount).where(TopicStakeholderCount.topic_id.in_(topic_ids)))
+    db.session.execute(delete(PredictionScore).where(PredictionScore.topic_id.in_(topic_ids)))
+    db.session.execute(delete(DuplicateCandidate).where(or_(
+        DuplicateCandidate.topic_id.in_(topic_ids), DuplicateCandidate.duplicate_of.in_(topic_ids))))
+    # Topics that gained rows since the copy stay hot for the next run
+    leftovers = [exists().where(model.topic_id == Topic.id) for model, _ in ARCHIVED]
+    moved = db.session.execute(
+        delete(Topic).where(Topic.id.in_(topic_ids), *[~leftover for leftover in leftovers])
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    return moved
+
+
+def run_archival(batch_size=None, limit=None):
+    """Archive cold topics in batches; returns topics moved"""
+    batch_size = batch_size or current_app.config.get("ARCHIVE_BATCH_SIZE", 200)
+    moved = 0
+    while limit is None or moved < limit:
+        topic_ids = cold_topic_ids(batch_size if limit is None else min(batch_size, limit - moved))
+        if not topic_ids:
+            break
+        count = archive_topics(topic_ids)
+        moved += count
+        if count == 0:
+            # Everything in this batch picked up new rows; try again next run
+            break
+    return moved
+
+
+def is_archived(topic_id):
+    """Whether the topic lives in the archive tables"""
+    return _archive_select(
+        select(archived_topics.c.id).where(archived_topics.c.id == topic_id)
+    ).first() is not None
+
+
+def load_archived_topic(topic_id):
+    """(topic, posts newest first, poll options, sentiment history) for an
+    archived topic, as attribute-access rows, or None if it isn't archived"""
+    topic = _archive_select(select(archived_topics).where(archived_topics.c.id == topic_id)).first()
+    if topic is None:
+        return None
+
+    posts = _archive_select(
+        select(archived_posts).where(archived_posts.c.topic_id == topic_id)
+        .order_by(archived_posts.c.created_at.desc())
+    ).all()
+    options = [{
+        "id": option.id,
+        "text": option.option_text,
+        "votes": option.vote_count or 0
+    } for option in _archive_select(
+        select(archived_poll_options).where(archived_poll_options.c.topic_id == topic_id)
+        .order_by(archived_poll_options.c.id)
+    )]
+    history = _archive_select(
+        select(archived_sentiment_history).where(archived_sentiment_history.c.topic_id == topic_id)
+        .order_by(archived_sentiment_history.c.timestamp.asc())
+    ).all()
+    return topic, posts, options, history
+
+
+archive_job = PeriodicJob("archive-cold-topics", 3600, run_archival)
+
+
+def init_app(app):
+    """Start the archival job when ARCHIVE_INTERVAL is set"""
+    interval = app.config.get("ARCHIVE_INTERVAL", 0)
+    if interval:
+        archive_job.interval = interval
+        archive_job.start(app)
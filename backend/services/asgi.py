@@ -0,0 +1,238 @@
+# services/asgi.py - ASGI front for the Flask app
+#
+# Routes registered as async handlers (routes/ai_async.py) run natively on
+# the event loop, so a request waiting on the LLM holds no thread; their
+# database work is handed to a bounded thread pool. Every other request goes
+# to the Flask app through a WSGI bridge on the same pool, so the pool size
+# (ASGI_DB_THREADS) bounds concurrent DB/CPU work per worker while LLM-bound
+# requests are limited only by LLM_ASYNC_CONCURRENCY. Event streams block a
+# thread while they wait for the next event, so they get a pool of their own
+# (ASGI_SSE_THREADS, about the number of streams a worker keeps open).
+
+import asyncio
+import contextvars
+import io
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Response
+from werkzeug.exceptions import HTTPException
+from werkzeug.routing import Map, Rule
+
+from services import metrics
+
+_END = object()
+
+
+def build_environ(scope, body):
+    """WSGI environ for an ASGI http scope and its (fully read) body"""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for raw_name, raw_value in scope.get("headers", []):
+        name, value = raw_name.decode("latin-1").lower(), raw_value.decode("latin-1")
+        if name == "content-type":
+            key = "CONTENT_TYPE"
+        elif name == "content-length":
+            key = "CONTENT_LENGTH"
+        else:
+            key = "HTTP_" + name.upper().replace("-", "_")
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    # The body is already complete (possibly de-chunked by the server)
+    environ["CONTENT_LENGTH"] = str(len(body))
+    environ.pop("HTTP_TRANSFER_ENCODING", None)
+    return environ
+
+
+class AsyncRoute:
+    """An async handler: ``await handler(bridge, environ, **view_args)`` returns a Response"""
+
+    def __init__(self, rule, handler, methods=("GET",), blueprint="app"):
+        self.rule = rule
+        self.handler = handler
+        self.methods = methods
+        self.blueprint = blueprint
+
+
+class AsgiApp:
+    def __init__(self, flask_app, routes=(), db_threads=None, sse_threads=None):
+        self.flask_app = flask_app
+        self.executor = ThreadPoolExecutor(
+            max_workers=db_threads or flask_app.config.get("ASGI_DB_THREADS", 16),
+            thread_name_prefix="asgi-db"
+        )
+        self.stream_executor = ThreadPoolExecutor(
+            max_workers=sse_threads or flask_app.config.get("ASGI_SSE_THREADS", 64),
+            thread_name_prefix="asgi-sse"
+        )
+        self.url_map = Map([Rule(route.rule, endpoint=route, methods=route.methods) for route in routes])
+        self.metrics_enabled = flask_app.config.get("METRICS_ENABLED", True)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+        else:
+            raise RuntimeError(f"unsupported ASGI scope type {scope['type']!r}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.executor.shutdown(wait=False)
+                self.stream_executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    # ==================== HELPERS FOR ASYNC HANDLERS ====================
+
+    async def run_sync(self, func, *args):
+        """Run blocking work (DB access) on the bounded pool"""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def in_request(self, environ, func):
+        """Run ``func()`` on the pool inside a Flask request context.
+
+        Plain return values come back as-is. A response (Response object or
+        view-style tuple) or an exception - JWT errors, abort(404) - is
+        finished like a Flask view's would be (error handlers, after_request
+        hooks) and returned as a Response.
+        """
+        def call():
+            app = self.flask_app
+            with app.request_context(environ):
+                try:
+                    rv = func()
+                    if not isinstance(rv, (Response, tuple)):
+                        return rv
+                except Exception as e:
+                    rv = app.handle_user_exception(e)
+                return app.process_response(app.make_response(rv))
+        return await self.run_sync(call)
+
+    # ==================== HTTP ====================
+
+    async def _read_body(self, receive):
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return None
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                return b"".join(chunks)
+
+    async def _http(self, scope, receive, send):
+        body = await self._read_body(receive)
+        if body is None:
+            return
+        environ = build_environ(scope, body)
+
+        try:
+            route, view_args = self.url_map.bind_to_environ(environ).match()
+        except HTTPException:
+            route = None
+        if route is None:
+            await self._call_wsgi(environ, receive, send)
+            return
+
+        started = time.perf_counter()
+        if self.metrics_enabled:
+            metrics.http_in_flight.inc()
+        try:
+            response = await route.handler(self, environ, **view_args)
+        finally:
+            if self.metrics_enabled:
+                metrics.http_in_flight.dec()
+        if self.metrics_enabled:
+            labels = {"blueprint": route.blueprint, "route": route.rule, "method": scope["method"]}
+            metrics.http_requests.inc(status=response.status_code, **labels)
+            metrics.http_duration.observe(time.perf_counter() - started, **labels)
+
+        await send({"type": "http.response.start", "status": response.status_code,
+                    "headers": [(k.lower().encode("latin-1"), v.encode("latin-1"))
+                                for k, v in response.headers.to_wsgi_list()]})
+        await send({"type": "http.response.body", "body": response.get_data()})
+
+    async def _call_wsgi(self, environ, receive, send):
+        """Run the Flask app on the pool and relay its (possibly streamed) body"""
+        loop = asyncio.get_running_loop()
+        status_headers = []
+
+        def start_response(status, headers, exc_info=None):
+            status_headers[:] = [int(status.split(" ", 1)[0]), headers]
+            return lambda data: None
+
+        disconnected = asyncio.Event()
+        # Streaming views register callbacks here that wake their blocked
+        # thread when the client goes away
+        on_disconnect = environ["asgi.on_disconnect"] = []
+
+        async def watch_disconnect():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+            for callback in on_disconnect:
+                callback()
+
+        # One context for the whole response: stream_with_context pushes the
+        # request context on the first chunk and pops it on the last, which
+        # may run on different pool threads
+        context = contextvars.copy_context()
+        watcher = asyncio.ensure_future(watch_disconnect())
+        iterable = await loop.run_in_executor(
+            self.executor, context.run, self.flask_app.wsgi_app, environ, start_response)
+        pending = None
+        try:
+            iterator = iter(iterable)
+            first = await loop.run_in_executor(self.executor, context.run, next, iterator, _END)
+            status, headers = status_headers
+            # Event streams mostly wait on the event bus between chunks; keep
+            # them off the DB pool so open streams can't starve it
+            content_type = next((v for k, v in headers if k.lower() == "content-type"), "")
+            streaming = content_type.startswith("text/event-stream")
+            executor = self.stream_executor if streaming else self.executor
+            await send({"type": "http.response.start", "status": status,
+                        "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers]})
+            chunk = first
+            # Streams (SSE) end when the client goes away, not only when exhausted
+            while chunk is not _END and not disconnected.is_set():
+                if chunk:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                pending = loop.run_in_executor(executor, context.run, next, iterator, _END)
+                if streaming:
+                    # Stop relaying as soon as the client leaves, not at the next event
+                    await asyncio.wait([pending, watcher], return_when=asyncio.FIRST_COMPLETED)
+                    if not pending.done():
+                        break
+                chunk = await pending
+                pending = None
+            if not disconnected.is_set():
+                await send({"type": "http.response.body", "body": b""})
+        finally:
+            watcher.cancel()
+            if pending is not None:
+                # A generator cannot be closed mid-step; let the woken wait finish
+                await asyncio.wait([pending])
+            if hasattr(iterable, "close"):
+                await loop.run_in_executor(self.executor, context.run, iterable.close)
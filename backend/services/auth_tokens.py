@@ -0,0 +1,56 @@
+# services/auth_tokens.py - JWT verification with a cache of verified tokens
+#
+# flask_jwt_extended decodes every request's token three times (claims,
+# header, then the signature check), and pyjwt validates each base64url
+# segment character by character in Python: about 0.3 ms per request, a
+# third of what a poll vote costs. A token's signature and claims never
+# change, so the manager below remembers the claims of recently verified
+# tokens and only re-checks expiry on a hit. Everything flask_jwt_extended
+# does after decoding (blocklist, user lookup, token type) still runs on
+# every request.
+
+import threading
+import time
+
+from flask_jwt_extended import JWTManager
+from flask_jwt_extended.config import config
+
+
+class CachingJWTManager(JWTManager):
+    """JWTManager that skips re-verifying tokens it verified recently.
+
+    Holds up to JWT_VERIFIED_CACHE_SIZE tokens per process (0 disables the
+    cache), evicting the oldest first. Overrides the manager's decode hook,
+    which is why flask-jwt-extended is pinned in requirements.txt.
+    """
+
+    def __init__(self, app=None, add_context_processor=False):
+        self.cache_size = 4096
+        self._verified = {}     # encoded token -> decoded claims
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        super().__init__(app, add_context_processor)
+
+    def init_app(self, app, add_context_processor=False):
+        self.cache_size = app.config.get("JWT_VERIFIED_CACHE_SIZE", self.cache_size)
+        super().init_app(app, add_context_processor)
+
+    def _decode_jwt_from_config(self, encoded_token, csrf_value=None, allow_expired=False):
+        if not self.cache_size or csrf_value is not None or allow_expired:
+            return super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+
+        claims = self._verified.get(encoded_token)
+        if claims is not None and ("exp" not in claims or time.time() < claims["exp"] + config.leeway):
+            self.hits += 1
+            return dict(claims)
+
+        # Expired or unknown: the full decode raises the usual errors
+        self.misses += 1
+        claims = super()._decode_jwt_from_config(encoded_token)
+        with self._lock:
+            self._verified.pop(encoded_token, None)
+            while len(self._verified) >= self.cache_size:
+                del self._verified[next(iter(self._verified))]
+            self._verified[encoded_token] = claims
+        return dict(claims)
@@ -0,0 +1,57 @@
+# services/background.py - Periodic in-process background jobs
+
+import threading
+import time
+import traceback
+
+from database import db
+
+
+class PeriodicJob:
+    """Run a function every ``interval`` seconds on a daemon thread.
+
+    The function runs inside an application context and gets a fresh
+    scoped session each tick. Each worker process runs its own copy, so
+    jobs must be safe to run concurrently from several workers.
+    """
+
+    def __init__(self, name, interval, func):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, app):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(app,), name=f"job-{self.name}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run_once(self, app):
+        """Run one tick synchronously (used on shutdown and from CLI commands)"""
+        with app.app_context():
+            try:
+                return self.func()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error in background job {self.name}: {e}")
+                traceback.print_exc()
+            finally:
+                db.session.remove()
+
+    def _run(self, app):
+        while not self._stop.wait(self.interval):
+            started = time.monotonic()
+            self.run_once(app)
+            elapsed = time.monotonic() - started
+            if elapsed > self.interval:
+                print(f"Background job {self.name} took {elapsed:.1f}s (interval {self.interval}s)")
@@ -0,0 +1,381 @@
+# services/bulk_io.py - Bulk import/export of historical topics and posts
+#
+# Imports skip the per-post request path entirely: rows go in with batched
+# multi-row INSERTs, sentiment is filled in afterwards by a batched offline
+# pass, and topic aggregates are rebuilt from the posts in one statement.
+
+import csv
+import json
+from datetime import datetime
+
+from sqlalchemy import func, literal, select, text
+
+from database import db
+from models import Post, SentimentHistory, Topic, TopicCounterShard
+from services.moderation_queue import priority_rank, risk_score_expr
+from services.stakeholders import recompute_stakeholder_counts
+from services.trending import recompute_trending
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib encoder
+    orjson = None
+
+DEFAULT_IMPORT_BATCH = 5000
+DEFAULT_ANALYZE_BATCH = 20
+EXPORT_FETCH_SIZE = 1000
+
+SENTIMENTS = ("positive", "negative", "neutral")
+
+
+# ==================== READING ====================
+
+def detect_format(path, fmt=None):
+    if fmt:
+        return fmt
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def read_records(path, fmt=None):
+    """Yield (line_number, record) from a CSV or JSONL file, one row at a time.
+
+    JSONL records are yielded as the raw line; import_records parses them,
+    so a malformed line is skipped like any other invalid row.
+    """
+    fmt = detect_format(path, fmt)
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            for line_number, record in enumerate(csv.DictReader(f), 2):
+                yield line_number, record
+        else:
+            for line_number, line in enumerate(f, 1):
+                if line.strip():
+                    yield line_number, line
+
+
+def parse_record(record):
+    """A record as a dict; raw JSONL lines are decoded (ValueError if invalid)"""
+    if isinstance(record, str):
+        record = json.loads(record)
+    if not isinstance(record, dict):
+        raise ValueError("record must be a JSON object")
+    return record
+
+
+def _parse_datetime(value):
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00")).replace(tzinfo=None)
+
+
+def _parse_int(value):
+    return int(value) if value not in (None, "") else None
+
+
+def _parse_float(value):
+    return float(value) if value not in (None, "") else None
+
+
+def _parse_tags(value):
+    if isinstance(value, list):
+        return ",".join(str(tag).strip() for tag in value)
+    return value or None
+
+
+def topic_row(record, default_author_id):
+    """Column values for one imported topic; raises ValueError on bad input"""
+    title = (record.get("title") or "").strip()
+    if not title:
+        raise ValueError("title is required")
+    priority = record.get("priority") or "normal"
+    row = {
+        "title": title[:255],
+        "tags": _parse_tags(record.get("tags")),
+        "created_by": _parse_int(record.get("created_by")) or default_author_id,
+        "created_at": _parse_datetime(record.get("created_at")) or datetime.utcnow(),
+        "status": record.get("status") or "active",
+        "priority": priority,
+        # Core INSERTs bypass the ORM hook that normally fills this
+        "priority_rank": priority_rank(priority),
+        "risk_score": 0.0
+    }
+    if row["created_by"] is None:
+        raise ValueError("created_by is required (or pass a default author)")
+    if _parse_int(record.get("id")) is not None:
+        row["id"] = _parse_int(record.get("id"))
+    return row
+
+
+def _parse_sentiment_source(record, sentiment):
+    """Keep an exported label's origin so re-imported LLM labels still train
+    the local model; labels of unknown origin stay NULL"""
+    source = (record.get("sentiment_source") or "").strip().lower()
+    return source if sentiment in SENTIMENTS and source in ("llm", "local") else None
+
+
+def post_row(record, default_author_id):
+    """Column values for one imported post; raises ValueError on bad input"""
+    content = (record.get("content") or "").strip()
+    if not content:
+        raise ValueError("content is required")
+    topic_id = _parse_int(record.get("topic_id"))
+    if topic_id is None:
+        raise ValueError("topic_id is required")
+    sentiment = (record.get("sentiment") or "").strip().lower()
+    row = {
+        "topic_id": topic_id,
+        "author_id": _parse_int(record.get("author_id")) or default_author_id,
+        "content": content,
+        # Posts without a known sentiment stay NULL until analyze_pending_posts
+        "sentiment": sentiment if sentiment in SENTIMENTS else None,
+        "sentiment_source": _parse_sentiment_source(record, sentiment),
+        "key_points": record.get("key_points") or "",
+        "sentiment_score": _parse_float(record.get("sentiment_score")),
+        "sentiment_confidence": _parse_float(record.get("sentiment_confidence")),
+        "emotion": record.get("emotion") or None,
+        "tags": _parse_tags(record.get("tags")),
+        "created_at": _parse_datetime(record.get("created_at")) or datetime.utcnow()
+    }
+    if row["author_id"] is None:
+        raise ValueError("author_id is required (or pass a default author)")
+    if _parse_int(record.get("id")) is not None:
+        row["id"] = _parse_int(record.get("id"))
+    return row
+
+
+# ==================== IMPORT ====================
+
+def _insert_batch(model, rows):
+    # Rows with and without explicit ids need separate executemany calls
+    with_id = [row for row in rows if "id" in row]
+    without_id = [row for row in rows if "id" not in row]
+    for group in (with_id, without_id):
+        if group:
+            db.session.execute(db.insert(model), group)
+    db.session.commit()
+
+
+def _sync_id_sequence(model):
+    """After inserting explicit ids, move the PostgreSQL sequence past them"""
+    if db.engine.dialect.name != "postgresql":
+        return
+    table = model.__tablename__
+    db.session.execute(text(
+        f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+        f"COALESCE((SELECT MAX(id) FROM {table}), 1))"
+    ))
+    db.session.commit()
+
+
+def import_records(model, records, default_author_id=None,
+                   batch_size=DEFAULT_IMPORT_BATCH, on_error=None):
+    """Insert topics or posts from (line_number, record) pairs in batches
+    (records are dicts or raw JSONL lines, as read_records yields them).
+
+    Each batch is one multi-row INSERT and one commit, so memory stays flat
+    and an interrupted import keeps every batch it finished. Invalid rows are
+    skipped and reported through ``on_error(line_number, message)``.
+    Returns {"inserted": n, "skipped": n}.
+    """
+    build_row = topic_row if model is Topic else post_row
+    stats = {"inserted": 0, "skipped": 0}
+    batch = []
+
+    for line_number, record in records:
+        try:
+            batch.append(build_row(parse_record(record), default_author_id))
+        except (ValueError, TypeError) as e:
+            stats["skipped"] += 1
+            if on_error:
+                on_error(line_number, str(e))
+            continue
+
+        if len(batch) >= batch_size:
+            _insert_batch(model, batch)
+            stats["inserted"] += len(batch)
+            batch = []
+
+    if batch:
+        _insert_batch(model, batch)
+        stats["inserted"] += len(batch)
+
+    _sync_id_sequence(model)
+    return stats
+
+
+# ==================== OFFLINE ANALYSIS ====================
+
+def analyze_pending_posts(batch_size=DEFAULT_ANALYZE_BATCH, limit=None, on_batch=None):
+    """Enrich imported posts (sentiment, score, emotion, key point, tags), several per LLM call.
+
+    Posts the local analyzer is confident about are settled without an LLM
+    call; the rest are sent in batches. Walks pending posts in id order with
+    a keyset, so posts the model could not answer for are left pending for
+    the next run instead of looping. Returns {"analyzed": n, "failed": n, "local": n}.
+    """
+    from ai.gemini import analyze_posts_batch
+    from services.sentiment import post_enrichment_values, tiered_sentiment
+
+    stats = {"analyzed": 0, "failed": 0, "local": 0}
+    last_id = 0
+
+    while limit is None or stats["analyzed"] + stats["failed"] < limit:
+        size = batch_size if limit is None else min(batch_size, limit - stats["analyzed"] - stats["failed"])
+        pending = db.session.execute(
+            select(Post.id, Post.content)
+            .where(Post.sentiment.is_(None), Post.id > last_id)
+            .order_by(Post.id)
+            .limit(size)
+        ).all()
+        if not pending:
+            break
+        last_id = pending[-1].id
+
+        updates = []
+        escalated = []
+        for row in pending:
+            result = tiered_sentiment.enrich_locally(row.content)
+            if result is None:
+                escalated.append(row)
+            else:
+                updates.append({"id": row.id, **post_enrichment_values(result)})
+        stats["local"] += len(updates)
+
+        if escalated:
+            results = analyze_posts_batch([row.content for row in escalated])
+            updates.extend(
+                {"id": row.id, **post_enrichment_values({**result, "source": "llm"})}
+                for row, result in zip(escalated, results) if result
+            )
+        if updates:
+            # ORM bulk UPDATE by primary key: one executemany per batch
+            db.session.execute(db.update(Post), updates)
+            db.session.commit()
+
+        stats["analyzed"] += len(updates)
+        stats["failed"] += len(pending) - len(updates)
+        if on_batch:
+            on_batch(stats)
+
+    return stats
+
+
+def train_local_sentiment(min_samples=200, max_samples=200000):
+    """Train the local sentiment model on posts the LLM already labeled.
+
+    Labels the local analyzer produced itself (including its fallback when
+    the LLM failed) are left out, so the model never learns its own guesses.
+    Returns (model, sample count); model is None if there is too little data.
+    """
+    from ai.local_sentiment import local_sentiment
+
+    rows = db.session.execute(
+        select(Post.content, Post.sentiment)
+        .where(Post.sentiment.in_(SENTIMENTS), Post.sentiment_source == "llm")
+        .order_by(Post.id.desc())
+        .limit(max_samples)
+    ).all()
+    labels = {row.sentiment for row in rows}
+    if len(rows) < min_samples or len(labels) < 2:
+        return None, len(rows)
+    return local_sentiment.train([row.content for row in rows],
+                                 [row.sentiment for row in rows]), len(rows)
+
+
+# ==================== AGGREGATES ====================
+
+def recompute_topic_aggregates(topic_ids=None):
+    """Rebuild topic counters, distilled points, risk, trending columns and
+    stakeholder counts from their posts (and votes).
+
+    One grouped scan of posts feeds a single UPDATE ... FROM, instead of the
+    per-post increments the request path does. Pending counter shards for
+    the recomputed topics are dropped (their posts are already counted) and
+    one sentiment history point is recorded per topic. Returns topics updated.
+    """
+    positive = func.sum(db.case((Post.sentiment == "positive", 1), else_=0))
+    negative = func.sum(db.case((Post.sentiment == "negative", 1), else_=0))
+    points = func.aggregate_strings(
+        db.case((func.coalesce(Post.key_points, "") != "", literal("\n  ") + Post.key_points), else_=""),
+        ""
+    )
+    totals = (
+        select(
+            Post.topic_id.label("topic_id"),
+            func.count(Post.sentiment).label("analyzed"),
+            func.count(Post.id).label("posts"),
+            positive.label("positive"),
+            negative.label("negative"),
+            points.label("points")
+        )
+        .group_by(Post.topic_id)
+    )
+    if topic_ids:
+        totals = totals.where(Post.topic_id.in_(topic_ids))
+    totals = totals.subquery()
+
+    score = totals.c.positive - totals.c.negative
+    updated = db.session.execute(
+        db.update(Topic)
+        .where(Topic.id == totals.c.topic_id)
+        .values(
+            sentiment_score=score,
+            sentiment_count=totals.c.analyzed,
+            positive_count=totals.c.positive,
+            negative_count=totals.c.negative,
+            post_count=totals.c.posts,
+            distilled_points=func.coalesce(totals.c.points, ""),
+            risk_score=risk_score_expr(score, totals.c.analyzed, totals.c.negative)
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    shards = db.delete(TopicCounterShard)
+    snapshot = select(Topic.id, Topic.sentiment_score, literal(datetime.utcnow()))
+    if topic_ids:
+        shards = shards.where(TopicCounterShard.topic_id.in_(topic_ids))
+        snapshot = snapshot.where(Topic.id.in_(topic_ids))
+    db.session.execute(shards)
+    db.session.execute(
+        db.insert(SentimentHistory).from_select(
+            ["topic_id", "sentiment_score", "timestamp"],
+            snapshot.where(Topic.id.in_(select(Post.topic_id).distinct()))
+        )
+    )
+    recompute_trending(topic_ids)
+    recompute_stakeholder_counts(topic_ids)
+
+    db.session.commit()
+    return updated
+
+
+# ==================== EXPORT ====================
+
+def _dumps(record):
+    if orjson is not None:
+        return orjson.dumps(record).decode()
+    return json.dumps(record, default=str)
+
+
+def _export_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def export_records(model, out, fetch_size=EXPORT_FETCH_SIZE):
+    """Write every row of ``model``'s table to ``out`` as JSONL; returns rows written.
+
+    Rows are streamed with a server-side cursor (yield_per) as plain tuples,
+    so memory use does not grow with the table. The output is accepted by
+    import_records as-is.
+    """
+    table = model.__table__
+    result = db.session.execute(
+        select(table).order_by(table.c.id).execution_options(yield_per=fetch_size)
+    )
+    count = 0
+    for row in result.mappings():
+        out.write(_dumps({key: _export_value(value) for key, value in row.items()}) + "\n")
+        count += 1
+    return count
@@ -0,0 +1,193 @@
+# services/counters.py - Contention-free topic aggregate counters
+
+import random
+from collections import defaultdict
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import case, func, or_, select
+from sqlalchemy.exc import IntegrityError
+
+from database import db
+from models import Topic, TopicCounterShard
+from services.background import PeriodicJob
+from services.moderation_queue import risk_score_expr
+from services.sqlite_profile import begin_write
+from services.trending import combine_scores, hot_score_expr
+
+COUNTER_FIELDS = ("sentiment_score", "sentiment_count", "positive_count", "negative_count", "post_count")
+
+
+def sentiment_deltas(sentiment):
+    """Counter deltas contributed by one analyzed post"""
+    deltas = dict.fromkeys(COUNTER_FIELDS, 0)
+    deltas["sentiment_count"] = 1
+    deltas["post_count"] = 1
+    if sentiment == "negative":
+        deltas["sentiment_score"] = -1
+        deltas["negative_count"] = 1
+    elif sentiment == "positive":
+        deltas["sentiment_score"] = 1
+        deltas["positive_count"] = 1
+    return deltas
+
+
+def _format_points(key_points):
+    return f"\n  {key_points}" if key_points else ""
+
+
+def increment_topic_counters(topic_id, deltas, key_points="", activity=None):
+    """Add deltas to a topic's aggregates inside the current transaction.
+
+    ``activity`` is the event's trending score (services/trending.py
+    activity_score); it is log-added to hot_score and stamps
+    last_activity_at.
+
+    In "atomic" mode this is a single UPDATE that increments in SQL, so no
+    update is lost between concurrent writers. In "sharded" mode the deltas
+    land on one of COUNTER_SHARDS rows picked at random and are folded into
+    the topic by the background job, so writers to a hot topic do not queue
+    on the same row lock.
+    """
+    if current_app.config.get("COUNTER_MODE", "atomic") == "sharded":
+        _increment_shard(topic_id, deltas, _format_points(key_points), activity)
+    else:
+        active_at = datetime.utcnow() if activity is not None else None
+        _apply_to_topic(topic_id, deltas, _format_points(key_points), activity, active_at)
+
+
+def _apply_to_topic(topic_id, deltas, points, activity=None, active_at=None):
+    columns = {field: func.coalesce(getattr(Topic, field), 0) for field in COUNTER_FIELDS}
+    new_values = {field: columns[field] + deltas.get(field, 0) for field in COUNTER_FIELDS}
+
+    values = {getattr(Topic, field): new_values[field] for field in COUNTER_FIELDS}
+    values[Topic.risk_score] = risk_score_expr(
+        new_values["sentiment_score"],
+        new_values["sentiment_count"],
+        new_values["negative_count"]
+    )
+    if points:
+        values[Topic.distilled_points] = func.coalesce(Topic.distilled_points, "") + points
+    if activity is not None:
+        values[Topic.hot_score] = hot_score_expr(Topic.hot_score, activity)
+        values[Topic.last_activity_at] = case(
+            (Topic.last_activity_at > active_at, Topic.last_activity_at), else_=active_at
+        )
+
+    return Topic.query.filter(Topic.id == topic_id).update(values, synchronize_session=False)
+
+
+def _increment_shard(topic_id, deltas, points, activity=None):
+    shard = random.randrange(current_app.config.get("COUNTER_SHARDS", 16))
+    values = {
+        getattr(TopicCounterShard, field): getattr(TopicCounterShard, field) + deltas.get(field, 0)
+        for field in COUNTER_FIELDS
+    }
+    if points:
+        values[TopicCounterShard.pending_points] = TopicCounterShard.pending_points + points
+    active_at = None
+    if activity is not None:
+        active_at = datetime.utcnow()
+        values[TopicCounterShard.hot_score] = hot_score_expr(TopicCounterShard.hot_score, activity)
+        values[TopicCounterShard.last_activity_at] = active_at
+
+    shard_query = TopicCounterShard.query.filter_by(topic_id=topic_id, shard=shard)
+    if shard_query.update(values, synchronize_session=False):
+        return
+
+    # First write to this shard: create it, falling back to the UPDATE if a
+    # concurrent writer created it first
+    try:
+        with db.session.begin_nested():
+            db.session.add(TopicCounterShard(
+                topic_id=topic_id,
+                shard=shard,
+                pending_points=points,
+                hot_score=activity,
+                last_activity_at=active_at,
+                **{field: deltas.get(field, 0) for field in COUNTER_FIELDS}
+            ))
+    except IntegrityError:
+        shard_query.update(values, synchronize_session=False)
+
+
+def fold_counter_shards(batch_size=1000):
+    """Move pending shard deltas into their topics; returns topics folded.
+
+    Subtracts exactly what was read (rather than zeroing), so increments
+    that land on a shard while the fold runs are kept for the next pass.
+    Rows are locked while folding so two workers never fold the same delta
+    (on SQLite, by taking the write lock before reading); that is also what
+    lets the pending trending activity simply be cleared once folded.
+    """
+    begin_write()
+    shards = TopicCounterShard.query.filter(or_(
+        TopicCounterShard.sentiment_count != 0,
+        TopicCounterShard.sentiment_score != 0,
+        TopicCounterShard.pending_points != "",
+        TopicCounterShard.hot_score.isnot(None)
+    )).limit(batch_size).with_for_update(skip_locked=True).all()
+
+    if not shards:
+        return 0
+
+    per_topic = defaultdict(lambda: (dict.fromkeys(COUNTER_FIELDS, 0), [], {"hot": None, "at": None}))
+    for shard in shards:
+        totals, points, activity = per_topic[shard.topic_id]
+        for field in COUNTER_FIELDS:
+            totals[field] += getattr(shard, field)
+        points.append(shard.pending_points)
+        activity["hot"] = combine_scores(activity["hot"], shard.hot_score)
+        if shard.last_activity_at and (activity["at"] is None or shard.last_activity_at > activity["at"]):
+            activity["at"] = shard.last_activity_at
+
+        consumed = len(shard.pending_points)
+        TopicCounterShard.query.filter_by(topic_id=shard.topic_id, shard=shard.shard).update({
+            **{getattr(TopicCounterShard, field): getattr(TopicCounterShard, field) - getattr(shard, field)
+               for field in COUNTER_FIELDS},
+            TopicCounterShard.pending_points: func.substr(TopicCounterShard.pending_points, consumed + 1),
+            TopicCounterShard.hot_score: None,
+            TopicCounterShard.last_activity_at: None
+        }, synchronize_session=False)
+
+    for topic_id, (totals, points, activity) in per_topic.items():
+        _apply_to_topic(topic_id, totals, "".join(points), activity["hot"], activity["at"])
+
+    db.session.commit()
+    return len(per_topic)
+
+
+def exact_counters(topic):
+    """Topic aggregates including deltas not yet folded from shards"""
+    counters = {field: getattr(topic, field) or 0 for field in COUNTER_FIELDS}
+    if current_app.config.get("COUNTER_MODE", "atomic") != "sharded":
+        return counters
+
+    pending = db.session.query(*[
+        func.coalesce(func.sum(getattr(TopicCounterShard, field)), 0) for field in COUNTER_FIELDS
+    ]).filter(TopicCounterShard.topic_id == topic.id).one()
+
+    for field, value in zip(COUNTER_FIELDS, pending):
+        counters[field] += value
+    return counters
+
+
+def sentiment_score_expr():
+    """SQL expression for a topic's current sentiment_score, including
+    unfolded shard deltas in sharded mode (for snapshots taken in SQL)"""
+    if current_app.config.get("COUNTER_MODE", "atomic") != "sharded":
+        return Topic.sentiment_score
+    pending = select(func.coalesce(func.sum(TopicCounterShard.sentiment_score), 0))\
+        .where(TopicCounterShard.topic_id == Topic.id)\
+        .scalar_subquery()
+    return func.coalesce(Topic.sentiment_score, 0) + pending
+
+
+fold_job = PeriodicJob("fold-counter-shards", 5, fold_counter_shards)
+
+
+def init_app(app):
+    """Start the shard folding job when sharded counters are enabled"""
+    if app.config.get("COUNTER_MODE", "atomic") == "sharded":
+        fold_job.interval = app.config.get("COUNTER_FOLD_INTERVAL", 5)
+        fold_job.start(app)
@@ -0,0 +1,239 @@
+# services/embeddings.py - Topic vectors for similarity, duplicates and search
+#
+# The embedding model (ai/embeddings.py) is fitted on topic texts plus up to
+# EMBEDDING_MAX_POSTS recent posts: on the first similarity request, then
+# every EMBEDDING_REFIT_INTERVAL seconds. A fit embeds every topic (title and
+# distilled points) into one float32 matrix. Between fits, each query first
+# re-embeds the topics updated since the last look (Topic.updated_at is
+# indexed) with the current model. Their new vectors go in a small overlay
+# and their rows in the main matrix are masked out. Each worker holds its
+# own index.
+
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import select
+
+from database import db
+from models import Post, Topic
+from services.background import PeriodicJob
+
+
+def topic_text(title, distilled_points):
+    return f"{title} {distilled_points or ''}"
+
+
+class _Vectors:
+    """Topic ids with their vectors (dense array or CSR rows)"""
+
+    def __init__(self, ids, vectors):
+        import numpy as np
+
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.vectors = vectors
+        self.rows = {topic_id: row for row, topic_id in enumerate(ids)}
+        self.live = np.ones(len(ids), dtype=bool)
+
+    def scores(self, vector):
+        import numpy as np
+
+        if not len(self.ids):
+            return np.zeros(0, dtype=np.float32)
+        scores = self.vectors @ vector.T
+        scores = np.asarray(scores.todense() if hasattr(scores, "todense") else scores).ravel()
+        return np.where(self.live, scores, -np.inf)
+
+    def vector(self, topic_id):
+        row = self.rows.get(topic_id)
+        if row is None or not self.live[row]:
+            return None
+        return self.vectors[row:row + 1]
+
+
+class TopicIndex:
+    def __init__(self):
+        self._fit_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self.engine = None
+        self.base = None      # _Vectors from the last fit
+        self.overlay = None   # _Vectors re-embedded since, by topic id
+        self.synced_at = None
+        self.settings = {"dimensions": 128, "max_features": 50000, "min_df": 2, "max_posts": 50000}
+
+    @property
+    def ready(self):
+        return self.engine is not None
+
+    def _embed_topics(self, engine, query):
+        import numpy as np
+        from scipy import sparse
+
+        ids, chunks, texts = [], [], []
+        for topic_id, title, points in db.session.execute(query.execution_options(yield_per=5000)):
+            ids.append(topic_id)
+            texts.append(topic_text(title, points))
+            if len(texts) == 5000:
+                chunks.append(engine.transform(texts))
+                texts = []
+        if texts:
+            chunks.append(engine.transform(texts))
+        if not chunks:
+            return _Vectors([], None)
+        stacked = sparse.vstack(chunks, format="csr") if engine.sparse else np.vstack(chunks)
+        return _Vectors(ids, stacked)
+
+    def refit(self, if_missing=False):
+        """Fit a new model on the current corpus and embed every topic;
+        returns topics indexed"""
+        from ai.embeddings import EmbeddingEngine
+
+        with self._fit_lock:
+            if if_missing and self.ready:
+                return len(self.base.ids)
+            started = datetime.utcnow()
+            topics = select(Topic.id, Topic.title, Topic.distilled_points).order_by(Topic.id)
+            corpus = [topic_text(title, points) for _, title, points in db.session.execute(topics)]
+            corpus.extend(db.session.scalars(
+                select(Post.content).order_by(Post.id.desc()).limit(self.settings["max_posts"])))
+
+            engine = EmbeddingEngine(self.settings["dimensions"], self.settings["max_features"],
+                                     self.settings["min_df"])
+            try:
+                engine.fit(corpus)
+            except ValueError as e:
+                # Empty corpus or no usable terms: keep the previous model
+                print(f"Embedding fit skipped: {e}")
+                return 0
+            base = self._embed_topics(engine, topics)
+            with self._lock:
+                self.engine, self.base, self.overlay, self.synced_at = engine, base, None, started
+            return len(base.ids)
+
+    def refresh(self):
+        """Re-embed topics changed since the last look with the current model"""
+        if not self.ready:
+            self.refit(if_missing=True)
+            if not self.ready:
+                return
+        with self._lock:
+            engine, since = self.engine, self.synced_at
+        started = datetime.utcnow()
+        changed = self._embed_topics(engine, select(Topic.id, Topic.title, Topic.distilled_points)
+                                     .where(Topic.updated_at >= since).order_by(Topic.id))
+        if not len(changed.ids):
+            return
+        with self._lock:
+            if self.engine is not engine:
+                return  # refitted meanwhile; the new fit already covers these
+            overlay = self._merge(self.overlay, changed)
+            for topic_id in changed.rows:
+                row = self.base.rows.get(topic_id)
+                if row is not None:
+                    self.base.live[row] = False
+            self.overlay, self.synced_at = overlay, started
+
+    def _merge(self, overlay, changed):
+        import numpy as np
+        from scipy import sparse
+
+        if overlay is None:
+            return changed
+        keep = [row for row, topic_id in enumerate(overlay.ids) if topic_id not in changed.rows]
+        ids = [int(overlay.ids[row]) for row in keep] + changed.ids.tolist()
+        stack = sparse.vstack if self.engine.sparse else np.vstack
+        return _Vectors(ids, stack([overlay.vectors[keep], changed.vectors]))
+
+    def _snapshot(self):
+        self.refresh()
+        with self._lock:
+            return self.engine, [part for part in (self.base, self.overlay) if part is not None]
+
+    @staticmethod
+    def _nearest(parts, vector, limit, exclude=None):
+        import numpy as np
+
+        if not parts:
+            return []
+        ids = np.concatenate([part.ids for part in parts])
+        scores = np.concatenate([part.scores(vector) for part in parts])
+        if exclude is not None:
+            scores[ids == exclude] = -np.inf
+        count = min(limit, int(np.isfinite(scores).sum()))
+        if count <= 0:
+            return []
+        top = np.argpartition(-scores, count - 1)[:count]
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+    def embed(self, text):
+        """Vector for a free text, or None before the first fit or when the
+        text has no known terms"""
+        engine, _ = self._snapshot()
+        return self._embed_text(engine, text)
+
+    @staticmethod
+    def _embed_text(engine, text):
+        if engine is None:
+            return None
+        vector = engine.transform([text])
+        if (vector.nnz if engine.sparse else abs(vector).sum()) == 0:
+            return None
+        return vector
+
+    def similar_to_topic(self, topic_id, limit):
+        """[(topic_id, cosine)] nearest to an indexed topic, best first"""
+        _, parts = self._snapshot()
+        for part in parts[::-1]:  # the overlay holds the fresher vector
+            vector = part.vector(topic_id)
+            if vector is not None:
+                return self._nearest(parts, vector, limit, exclude=topic_id)
+        return []
+
+    def search(self, text, limit):
+        """[(topic_id, cosine)] nearest to a free text, best first, or None
+        when the text cannot be embedded"""
+        engine, parts = self._snapshot()
+        vector = self._embed_text(engine, text)
+        if vector is None:
+            return None
+        return self._nearest(parts, vector, limit)
+
+    def stats(self):
+        with self._lock:
+            if not self.ready:
+                return {"topics": 0, "dimensions": 0, "bytes": 0}
+            parts = [part for part in (self.base, self.overlay) if part is not None and len(part.ids)]
+            return {
+                "topics": sum(int(part.live.sum()) for part in parts),
+                "dimensions": self.engine.output_dimensions,
+                "bytes": sum(self.engine.nbytes(part.vectors) for part in parts)
+            }
+
+
+topic_index = TopicIndex()
+
+
+def _refit_job():
+    started = time.monotonic()
+    count = topic_index.refit()
+    stats = topic_index.stats()
+    print(f"Refitted topic embeddings: {count} topics, {stats['dimensions']} dimensions, "
+          f"{stats['bytes'] / 1024:.0f} KiB in {time.monotonic() - started:.1f}s")
+
+
+refit_job = PeriodicJob("embedding-refit", 3600, _refit_job)
+
+
+def init_app(app):
+    """Configure the index and schedule refits (EMBEDDING_REFIT_INTERVAL, 0 = first use only)"""
+    topic_index.settings = {
+        "dimensions": app.config.get("EMBEDDING_DIMENSIONS", 128),
+        "max_features": app.config.get("EMBEDDING_MAX_FEATURES", 50000),
+        "min_df": app.config.get("EMBEDDING_MIN_DF", 2),
+        "max_posts": app.config.get("EMBEDDING_MAX_POSTS", 50000),
+    }
+    interval = app.config.get("EMBEDDING_REFIT_INTERVAL", 3600)
+    if interval:
+        refit_job.interval = interval
+        refit_job.start(app)
@@ -0,0 +1,218 @@
+# services/events.py - Topic event pub/sub for live updates (SSE)
+#
+# In-process by default. With several workers, run the local broker
+#   python -m services.events --serve 127.0.0.1:7071
+# and set EVENT_BROKER_URL=tcp://127.0.0.1:7071 so every worker sees every event.
+
+import argparse
+import json
+import queue
+import socket
+import socketserver
+import threading
+import time
+from urllib.parse import urlparse
+
+
+def topic_channel(topic_id):
+    return f"topic:{topic_id}"
+
+
+class Subscription:
+    """Bounded queue of events for one listener; slow listeners drop oldest events"""
+
+    def __init__(self, bus, channel, maxsize=100):
+        self.bus = bus
+        self.channel = channel
+        self._queue = queue.Queue(maxsize=maxsize)
+
+    def put(self, event):
+        while True:
+            try:
+                self._queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        """Next event, or None if nothing arrived within ``timeout`` seconds"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def wake(self):
+        """Make a waiting get() return None now (as if it timed out)"""
+        self.put(None)
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class LocalPubSub:
+    """In-process fan-out: events reach subscribers in this worker only"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}  # channel -> set of Subscription
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            listeners = self._subscribers.get(subscription.channel)
+            if listeners:
+                listeners.discard(subscription)
+                if not listeners:
+                    del self._subscribers[subscription.channel]
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(s) for s in self._subscribers.values())
+
+    def publish(self, channel, event_type, data):
+        self._deliver(channel, {"type": event_type, "data": data, "ts": time.time()})
+
+    def _deliver(self, channel, event):
+        with self._lock:
+            listeners = list(self._subscribers.get(channel, ()))
+        for subscription in listeners:
+            subscription.put(event)
+
+
+class BrokerPubSub(LocalPubSub):
+    """Fan-out through the local TCP broker so events cross worker processes.
+
+    Publishing sends the event to the broker, which relays it to every
+    connected worker (including this one) for local delivery. If the broker
+    is unreachable, events are delivered locally only and the connection is
+    retried in the background.
+    """
+
+    def __init__(self, host, port):
+        super().__init__()
+        self.address = (host, port)
+        self._sock = None
+        self._send_lock = threading.Lock()
+        threading.Thread(target=self._reader, name="event-broker-reader", daemon=True).start()
+
+    def publish(self, channel, event_type, data):
+        event = {"type": event_type, "data": data, "ts": time.time()}
+        line = (json.dumps({"channel": channel, "event": event}) + "\n").encode()
+        with self._send_lock:
+            sock = self._sock
+            if sock is not None:
+                try:
+                    sock.sendall(line)
+                    return
+                except OSError:
+                    self._sock = None
+        self._deliver(channel, event)
+
+    def _reader(self):
+        while True:
+            try:
+                sock = socket.create_connection(self.address, timeout=5)
+                sock.settimeout(None)
+            except OSError:
+                time.sleep(1)
+                continue
+            with self._send_lock:
+                self._sock = sock
+            try:
+                for line in sock.makefile("rb"):
+                    message = json.loads(line)
+                    self._deliver(message["channel"], message["event"])
+            except (OSError, ValueError) as e:
+                print(f"Event broker connection lost: {e}")
+            finally:
+                with self._send_lock:
+                    if self._sock is sock:
+                        self._sock = None
+                sock.close()
+            time.sleep(1)
+
+
+class _EventBus:
+    """Process-wide bus; the backend is chosen by init_app"""
+
+    def __init__(self):
+        self.backend = LocalPubSub()
+
+    def subscribe(self, channel):
+        return self.backend.subscribe(channel)
+
+    def publish(self, channel, event_type, data):
+        try:
+            self.backend.publish(channel, event_type, data)
+        except Exception as e:
+            # Live updates are best-effort; never fail the write that triggered them
+            print(f"Error publishing {event_type} on {channel}: {e}")
+
+    def publish_topic(self, topic_id, event_type, data):
+        self.publish(topic_channel(topic_id), event_type, data)
+
+
+event_bus = _EventBus()
+
+
+def init_app(app):
+    broker_url = app.config.get("EVENT_BROKER_URL")
+    if broker_url:
+        parsed = urlparse(broker_url)
+        event_bus.backend = BrokerPubSub(parsed.hostname, parsed.port)
+
+
+def format_sse(event):
+    """Serialize an event in text/event-stream framing"""
+    return f"event: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+# ==================== LOCAL BROKER ====================
+
+class _BrokerHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.server.clients.add(self.wfile)
+        try:
+            for line in self.rfile:
+                with self.server.lock:
+                    for client in list(self.server.clients):
+                        try:
+                            client.write(line)
+                            client.flush()
+                        except OSError:
+                            self.server.clients.discard(client)
+        finally:
+            self.server.clients.discard(self.wfile)
+
+
+class _BrokerServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address):
+        super().__init__(address, _BrokerHandler)
+        self.clients = set()
+        self.lock = threading.Lock()
+
+
+def serve_broker(host="127.0.0.1", port=7071):
+    """Relay every line received from one worker to all connected workers"""
+    with _BrokerServer((host, port)) as server:
+        print(f"Event broker listening on {host}:{port}")
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local event broker for multi-worker SSE")
+    parser.add_argument("--serve", default="127.0.0.1:7071", help="host:port to listen on")
+    args = parser.parse_args()
+    host, _, port = args.serve.rpartition(":")
+    serve_broker(host or "127.0.0.1", int(port))
@@ -0,0 +1,113 @@
+# services/http_cache.py - Conditional GET (ETag / Last-Modified / 304)
+
+import hashlib
+from collections import Counter
+from datetime import timezone
+from functools import wraps
+
+from flask import make_response, request
+from sqlalchemy import func, select
+
+from database import db
+from models import Post, SentimentHistory, Topic
+from services.poll_tally import poll_tally
+
+# "hit" = answered 304, "miss" = full response (exported via /metrics)
+cache_counts = Counter()
+
+
+def conditional(validator):
+    """Answer conditional GETs with 304 before the view loads or serializes anything.
+
+    ``validator`` receives the view's arguments and returns
+    ``(fingerprint, last_modified)`` from a cheap aggregate query, or None to
+    skip validation (e.g. the resource does not exist and the view should
+    produce its own 404). ETags are weak so they survive response compression.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            validators = validator(*args, **kwargs)
+            if validators is None:
+                return view(*args, **kwargs)
+
+            fingerprint, last_modified = validators
+            etag = hashlib.sha1(
+                repr((request.full_path, fingerprint)).encode()
+            ).hexdigest()
+            if last_modified is not None:
+                last_modified = last_modified.replace(tzinfo=timezone.utc, microsecond=0)
+
+            if _not_modified(etag, last_modified):
+                cache_counts["hit"] += 1
+                response = make_response("", 304)
+            else:
+                cache_counts["miss"] += 1
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.headers["Cache-Control"] = "private, no-cache"
+            return response
+        return wrapper
+    return decorator
+
+
+def _not_modified(etag, last_modified):
+    # If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2)
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified is not None:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+# ==================== VALIDATORS ====================
+
+def topic_list_validator(*args, **kwargs):
+    """All topics: row count plus newest updated_at (index-only on topics.updated_at)"""
+    count, latest = db.session.execute(
+        select(func.count(Topic.id), func.max(Topic.updated_at))
+    ).one()
+    return (count, latest and latest.isoformat()), latest
+
+
+def topic_validator(topic_id, *args, **kwargs):
+    """One topic: its updated_at, its posts and its in-memory poll tally"""
+    posts = Post.topic_id == topic_id
+    row = db.session.execute(
+        select(
+            Topic.updated_at,
+            Topic.has_poll,
+            select(func.count(Post.id)).where(posts).scalar_subquery(),
+            select(func.max(Post.id)).where(posts).scalar_subquery()
+        ).where(Topic.id == topic_id)
+    ).first()
+    if row is None:
+        return None
+
+    updated_at, has_poll, post_count, last_post_id = row
+    tally = tuple(opt["votes"] for opt in poll_tally.get_tally(topic_id)) if has_poll else ()
+    return (updated_at and updated_at.isoformat(), post_count, last_post_id, tally), updated_at
+
+
+def sentiment_timeline_validator(topic_id, *args, **kwargs):
+    """A topic's timeline: newest history point plus the topic's own updated_at"""
+    history = SentimentHistory.topic_id == topic_id
+    row = db.session.execute(
+        select(
+            Topic.updated_at,
+            select(func.count(SentimentHistory.id)).where(history).scalar_subquery(),
+            select(func.max(SentimentHistory.timestamp)).where(history).scalar_subquery()
+        ).where(Topic.id == topic_id)
+    ).first()
+    if row is None:
+        return None
+
+    updated_at, points, latest_point = row
+    last_modified = max(filter(None, (updated_at, latest_point)), default=None)
+    return (updated_at and updated_at.isoformat(), points,
+            latest_point and latest_point.isoformat()), last_modified
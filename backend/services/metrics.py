@@ -0,0 +1,351 @@
+# services/metrics.py - Prometheus metrics at /metrics
+#
+# Request latency per blueprint/route, in-flight requests, SQL query counts
+# and time (overall and per request), LLM latency/tokens/errors, cache hit
+# counts and connection-pool checkout waits, in the Prometheus text format.
+# Metrics are kept per process: with several workers, scrape each one (or
+# sum them in the query) - values are not shared between processes.
+
+import hmac
+import threading
+import time
+from collections import Counter as _Tally
+
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+
+from database import db
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def _render_sample(self, key, state):
+        counts, total, count = state
+        labels = lambda extra=(): _format_labels(self.labelnames, key, extra)
+        lines, cumulative = [], 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            lines.append(f"{self.name}_bucket{labels([('le', _format_value(float(bound)))])} {cumulative}")
+        lines.append(f"{self.name}_sum{labels()} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels()} {count}")
+        return lines
+
+
+class Registry:
+    """Metrics owned by this module plus collectors that read state kept
+    elsewhere (e.g. cache hit counts) at scrape time"""
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors = {}
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def set_collector(self, key, collector):
+        """``collector()`` returns [(name, type, help, [(labels_dict, value), ...]), ...];
+        setting a key again replaces its collector (e.g. a second app's engine)"""
+        self.collectors[key] = collector
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collector in self.collectors.values():
+            try:
+                families = collector()
+            except Exception as e:
+                print(f"Error collecting metrics: {e}")
+                continue
+            for name, kind, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels, labels.values())} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# ==================== METRICS ====================
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by blueprint, route, method and status",
+    ("blueprint", "route", "method", "status")))
+http_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency (streamed bodies excluded)",
+    ("blueprint", "route", "method")))
+http_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled"))
+
+db_queries = registry.register(Counter(
+    "db_queries_total", "SQL statements executed", ("operation",)))
+db_query_duration = registry.register(Histogram(
+    "db_query_duration_seconds", "SQL statement execution time", ("operation",), QUERY_BUCKETS))
+db_queries_per_request = registry.register(Histogram(
+    "db_queries_per_request", "SQL statements executed per HTTP request", ("route",), COUNT_BUCKETS))
+db_time_per_request = registry.register(Histogram(
+    "db_time_per_request_seconds", "Time spent in SQL per HTTP request", ("route",)))
+db_pool_checkout = registry.register(Histogram(
+    "db_pool_checkout_seconds", "Time waiting to check a connection out of the pool",
+    buckets=QUERY_BUCKETS + (2.5, 5, 10, 30)))
+
+llm_requests = registry.register(Counter(
+    "llm_requests_total", "LLM calls by backend and outcome (ok, error, timeout)",
+    ("backend", "outcome")))
+llm_duration = registry.register(Histogram(
+    "llm_request_duration_seconds", "LLM call latency", ("backend",), LLM_BUCKETS))
+llm_tokens = registry.register(Counter(
+    "llm_tokens_total", "LLM tokens (reported by the backend, else estimated)",
+    ("backend", "direction")))
+
+
+# ==================== HTTP ====================
+
+def _route_labels():
+    rule = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+    return request.blueprint or "app", rule
+
+
+def _before_request():
+    g._metrics_started = time.perf_counter()
+    g._metrics_db_queries = 0
+    g._metrics_db_seconds = 0.0
+    http_in_flight.inc()
+
+
+def _after_request(response):
+    g._metrics_status = response.status_code
+    g._metrics_streamed = response.is_streamed
+    return response
+
+
+def _teardown_request(error=None):
+    # Teardown runs after every after_request hook (compression included);
+    # a missing status means the request failed before producing a response
+    if "_metrics_started" not in g:
+        return
+    http_in_flight.dec()
+    blueprint, route = _route_labels()
+    status = g.get("_metrics_status", 500)
+    http_requests.inc(blueprint=blueprint, route=route, method=request.method, status=status)
+    # Streams (SSE, streamed JSON) return before the body is produced, so
+    # their handler time says nothing about latency
+    if not g.get("_metrics_streamed", False):
+        http_duration.observe(time.perf_counter() - g._metrics_started,
+                              blueprint=blueprint, route=route, method=request.method)
+    db_queries_per_request.observe(g._metrics_db_queries, route=route)
+    db_time_per_request.observe(g._metrics_db_seconds, route=route)
+
+
+# ==================== DATABASE ====================
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_metrics_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("_metrics_started")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+    db_queries.inc(operation=operation)
+    db_query_duration.observe(elapsed, operation=operation)
+    if has_request_context() and "_metrics_db_queries" in g:
+        g._metrics_db_queries += 1
+        g._metrics_db_seconds += elapsed
+
+
+def _handle_error(exception_context):
+    # The statement failed: drop its start time so the stack stays aligned
+    started = exception_context.connection and exception_context.connection.info.get("_metrics_started")
+    if started:
+        started.pop()
+
+
+def _time_pool_checkout(engine):
+    pool = engine.pool
+    connect = pool.connect
+
+    def timed_connect():
+        started = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            db_pool_checkout.observe(time.perf_counter() - started)
+
+    pool.connect = timed_connect
+
+
+def instrument_engine(engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+    _time_pool_checkout(engine)
+    # dispose() swaps in a fresh pool; time that one too
+    event.listen(engine, "engine_disposed", _time_pool_checkout)
+
+
+def _pool_samples(engine):
+    pool = engine.pool
+    samples = [("db_pool_checked_out", "gauge", "Connections currently checked out",
+                [({}, pool.checkedout())])] if hasattr(pool, "checkedout") else []
+    if hasattr(pool, "size"):
+        samples.append(("db_pool_size", "gauge", "Configured pool size", [({}, pool.size())]))
+    return samples
+
+
+# ==================== LLM ====================
+
+def _record_llm_call(backend, seconds, error, prompt_tokens, output_tokens):
+    from ai.llm import LLMTimeout
+
+    outcome = "ok" if error is None else "timeout" if isinstance(error, LLMTimeout) else "error"
+    llm_requests.inc(backend=backend, outcome=outcome)
+    llm_duration.observe(seconds, backend=backend)
+    if error is None:
+        llm_tokens.inc(prompt_tokens, backend=backend, direction="prompt")
+        llm_tokens.inc(output_tokens, backend=backend, direction="output")
+
+
+# ==================== CACHES ====================
+
+def _cache_samples():
+    from services import http_cache
+    from services.ai_service import ai_service
+    from services.poll_tally import poll_tally
+    from services.sentiment import tiered_sentiment
+
+    counts = _Tally()
+    counts["poll_tally", "hit"] = poll_tally.hits
+    counts["poll_tally", "miss"] = poll_tally.misses
+    counts.update({("http_conditional", result): n for result, n in http_cache.cache_counts.items()})
+    counts.update({(f"ai_{cache}", result): n for (cache, result), n in ai_service.cache_counts.items()})
+    # "Hit" = answered by the local model without an LLM call
+    sentiment = tiered_sentiment.stats()
+    counts["local_sentiment", "hit"] = sentiment["local"]
+    counts["local_sentiment", "miss"] = sentiment["escalated"]
+
+    return [("cache_requests_total", "counter", "Cache lookups by cache and result (hit, miss)",
+             [({"cache": cache, "result": result}, n) for (cache, result), n in sorted(counts.items())])]
+
+
+# ==================== ENDPOINT ====================
+
+def metrics_view():
+    token = current_app.config.get("METRICS_TOKEN")
+    if token:
+        supplied = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if not hmac.compare_digest(supplied.encode(), token.encode()):
+            return Response("forbidden\n", status=403, mimetype="text/plain")
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+
+def init_app(app):
+    """Instrument requests, the engine and LLM calls; serve GET /metrics
+    (call after db.init_app)"""
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+
+    from ai.llm import llm
+
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    app.add_url_rule("/metrics", "metrics", metrics_view)
+
+    with app.app_context():
+        engine = db.engine
+        binds = [bind for bind in db.engines.values() if bind is not engine]
+    for instrumented in [engine] + binds:
+        instrument_engine(instrumented)
+    registry.set_collector("db_pool", lambda: _pool_samples(engine))
+    registry.set_collector("caches", _cache_samples)
+    llm.add_listener(_record_llm_call)
@@ -0,0 +1,204 @@
+# services/moderation_queue.py - Moderation queue ordering and bulk actions
+
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import case, cast, event, func, literal, tuple_
+
+from database import db
+from models import Topic
+
+# Higher rank = handled first
+PRIORITY_RANKS = {
+    "low": 0,
+    "normal": 1,
+    "high": 2,
+    "critical": 3
+}
+
+DEFAULT_QUEUE_LIMIT = 50
+MAX_QUEUE_LIMIT = 200
+
+# Column values applied by each moderation action
+MODERATION_ACTIONS = {
+    "priority": {"priority": "high"},
+    "resolve": {"status": "resolved"},
+    "escalate": {"priority": "critical"},
+    "archive": {"status": "archived"}
+}
+
+MAX_BULK_TOPICS = 10000
+BULK_CHUNK_SIZE = 500
+
+
+def priority_rank(priority):
+    """Map a priority label to its sortable rank"""
+    return PRIORITY_RANKS.get(priority or "normal", PRIORITY_RANKS["normal"])
+
+
+def compute_risk_score(sentiment_score, sentiment_count, negative_count):
+    """Cheap stored risk score (0-1) used to order the queue.
+
+    Mirrors the sentiment and negative-ratio factors of
+    AIService.predict_escalation_risk without the per-topic velocity query,
+    so it can be kept current on every write.
+    """
+    sentiment = min(abs(sentiment_score or 0) / 10, 1.0)
+    negative_ratio = (negative_count or 0) / max(sentiment_count or 0, 1)
+    return 0.5 * sentiment + 0.5 * negative_ratio
+
+
+def risk_score_expr(sentiment_score, sentiment_count, negative_count):
+    """SQL form of compute_risk_score for set-based UPDATEs that bypass ORM hooks"""
+    magnitude = func.abs(sentiment_score)
+    sentiment = case((magnitude >= 10, 1.0), else_=cast(magnitude, db.Float) / 10)
+    negative_ratio = cast(negative_count, db.Float) / case(
+        (sentiment_count > 1, sentiment_count), else_=1
+    )
+    return 0.5 * sentiment + 0.5 * negative_ratio
+
+
+@event.listens_for(Topic, "before_insert")
+def _init_queue_columns(mapper, connection, topic):
+    """Populate the denormalized queue ordering columns for new topics"""
+    topic.priority_rank = priority_rank(topic.priority)
+    topic.risk_score = compute_risk_score(
+        topic.sentiment_score,
+        topic.sentiment_count,
+        topic.negative_count
+    )
+
+
+@event.listens_for(Topic, "before_update")
+def _refresh_priority_rank(mapper, connection, topic):
+    """Keep priority_rank in step with ORM priority changes.
+
+    risk_score is maintained by the SQL-side counter updates in
+    services/counters.py, since counters never change through the ORM.
+    """
+    topic.priority_rank = priority_rank(topic.priority)
+
+
+# ==================== CURSORS ====================
+
+def encode_cursor(topic):
+    """Opaque cursor pointing just after the given topic"""
+    key = [topic.priority_rank, topic.risk_score, topic.created_at.isoformat(), topic.id]
+    raw = json.dumps(key, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Decode a cursor back into its sort key; raises ValueError if malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        rank, risk, created_at, topic_id = json.loads(base64.urlsafe_b64decode(padded))
+        return int(rank), float(risk), datetime.fromisoformat(created_at), int(topic_id)
+    except Exception:
+        raise ValueError("invalid cursor")
+
+
+# ==================== QUERIES ====================
+
+def tag_match(tag):
+    """Topics whose comma-separated tags include ``tag`` as a whole element
+    (spaces around the commas ignored)"""
+    tags = func.replace(func.replace(literal(",") + Topic.tags + ",", ", ", ","), " ,", ",")
+    escaped = tag.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return tags.like(f"%,{escaped},%", escape="\\")
+
+
+def apply_filters(query, filters):
+    """Apply moderation filters (status, priority, tag, min_risk) to a Topic query"""
+    status = filters.get("status", "active")
+    if status and status != "all":
+        query = query.filter(Topic.status == status)
+
+    if filters.get("priority"):
+        query = query.filter(Topic.priority == filters["priority"])
+
+    if filters.get("tag"):
+        query = query.filter(tag_match(filters["tag"]))
+
+    if filters.get("min_risk") is not None:
+        query = query.filter(Topic.risk_score >= float(filters["min_risk"]))
+
+    return query
+
+
+def get_queue_page(filters, cursor=None, limit=DEFAULT_QUEUE_LIMIT):
+    """Fetch one page of the queue ordered by (priority rank, risk, recency).
+
+    Returns (topics, next_cursor). Pages are seeked with a row-value
+    comparison on the composite index, so cost does not grow with depth.
+    """
+    limit = max(1, min(limit or DEFAULT_QUEUE_LIMIT, MAX_QUEUE_LIMIT))
+    sort_key = (Topic.priority_rank, Topic.risk_score, Topic.created_at, Topic.id)
+
+    query = apply_filters(Topic.query, filters)
+
+    if cursor:
+        query = query.filter(tuple_(*sort_key) < tuple_(*decode_cursor(cursor)))
+
+    rows = query.order_by(*[col.desc() for col in sort_key]).limit(limit + 1).all()
+
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+# ==================== BULK ACTIONS ====================
+
+def _chunks(items, size=BULK_CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def apply_bulk_action(action, topic_ids=None, filters=None):
+    """Apply a moderation action to many topics with set-based UPDATEs.
+
+    Targets either an explicit list of topic ids or every topic matching
+    ``filters`` (same keys as the queue). Either way at most
+    MAX_BULK_TOPICS topics; more raises ValueError rather than acting on
+    part of them. Runs inside the caller's transaction; the caller commits
+    or rolls back. Returns a dict of topic id -> "updated" | "unchanged" |
+    "not_found".
+    """
+    if action not in MODERATION_ACTIONS:
+        raise ValueError(f"unknown action: {action}")
+
+    values = dict(MODERATION_ACTIONS[action])
+    if "priority" in values:
+        # Bulk UPDATEs bypass ORM hooks, so keep the queue rank in step here
+        values["priority_rank"] = priority_rank(values["priority"])
+
+    columns = (Topic.id, Topic.status, Topic.priority)
+    if topic_ids is not None:
+        topic_ids = list(dict.fromkeys(int(i) for i in topic_ids))
+        if len(topic_ids) > MAX_BULK_TOPICS:
+            raise ValueError(f"at most {MAX_BULK_TOPICS} topics per request")
+        rows = []
+        for chunk in _chunks(topic_ids):
+            rows.extend(db.session.query(*columns).filter(Topic.id.in_(chunk)).all())
+    else:
+        rows = apply_filters(db.session.query(*columns), filters or {})\
+            .limit(MAX_BULK_TOPICS + 1).all()
+        if len(rows) > MAX_BULK_TOPICS:
+            raise ValueError(f"filter matches more than {MAX_BULK_TOPICS} topics; narrow it down")
+        topic_ids = [row.id for row in rows]
+
+    outcomes = {topic_id: "not_found" for topic_id in topic_ids}
+    to_update = []
+    for row in rows:
+        current = {"status": row.status, "priority": row.priority}
+        if all(current.get(k) == v for k, v in MODERATION_ACTIONS[action].items()):
+            outcomes[row.id] = "unchanged"
+        else:
+            outcomes[row.id] = "updated"
+            to_update.append(row.id)
+
+    for chunk in _chunks(to_update):
+        Topic.query.filter(Topic.id.in_(chunk))\
+            .update(values, synchronize_session=False)
+
+    return outcomes
@@ -0,0 +1,127 @@
+# services/passwords.py - Password hashing off the request threads
+#
+# Hashing is CPU-bound by design. It runs on a small process pool behind a
+# bounded number of slots, so a login surge queues (or is shed with 503)
+# instead of saturating every web worker.
+
+import atexit
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing queue is full or a hash did not finish in time"""
+
+
+# ==================== WORKER-SIDE FUNCTIONS ====================
+
+@lru_cache(maxsize=8)
+def _method_prefix(method):
+    """Canonical method string werkzeug writes for ``method`` (e.g. "scrypt:32768:8:1")"""
+    return generate_password_hash("", method=method).split("$", 1)[0]
+
+
+def _hash(password, method, salt_length):
+    return generate_password_hash(password, method=method, salt_length=salt_length)
+
+
+def _verify(stored_hash, password, method, salt_length):
+    """Check a password; if it matches but uses old parameters, return a fresh hash too"""
+    if not check_password_hash(stored_hash, password):
+        return False, None
+    if stored_hash.split("$", 1)[0] != _method_prefix(method):
+        return True, _hash(password, method, salt_length)
+    return True, None
+
+
+# ==================== POOL ====================
+
+class PasswordHasher:
+    def __init__(self):
+        self.method = "scrypt:32768:8:1"
+        self.salt_length = 16
+        self.workers = 2
+        self.timeout = 10
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(1)
+        self._lock = threading.Lock()
+
+    def configure(self, config):
+        self.method = config.get("PASSWORD_HASH_METHOD", self.method)
+        self.salt_length = config.get("PASSWORD_SALT_LENGTH", self.salt_length)
+        self.workers = config.get("PASSWORD_HASH_WORKERS", self.workers)
+        self.timeout = config.get("PASSWORD_HASH_TIMEOUT", self.timeout)
+        queue_size = config.get("PASSWORD_HASH_QUEUE_SIZE", 32)
+        # Slots cover running plus waiting jobs
+        self._slots = threading.BoundedSemaphore(max(self.workers, 1) + queue_size)
+
+    def start(self):
+        """Fork the pool now, while the process is still single-threaded.
+
+        Workers are forked from the app process rather than spawned, so they
+        never re-import __main__ (which would re-run app.py's setup); forking
+        at startup keeps that safe because no background threads or DB
+        connections exist yet.
+        """
+        if self.workers > 0:
+            for future in [self._get_executor().submit(_method_prefix, self.method)
+                           for _ in range(self.workers)]:
+                future.result()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("fork")
+                )
+            return self._executor
+
+    def _run(self, func, *args):
+        if self.workers <= 0:
+            return func(*args)  # inline mode for development and tests
+
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy("password hashing queue is full")
+        try:
+            future = self._get_executor().submit(func, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise HashingBusy("password hashing timed out")
+        except BrokenProcessPool:
+            # A worker died; replace the pool so later requests recover
+            self.shutdown()
+            raise HashingBusy("password hashing pool restarted")
+
+    def hash(self, password):
+        return self._run(_hash, password, self.method, self.salt_length)
+
+    def verify(self, stored_hash, password):
+        """Returns (matches, new_hash); new_hash is set when parameters changed"""
+        return self._run(_verify, stored_hash, password, self.method, self.salt_length)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+password_hasher = PasswordHasher()
+
+
+def init_app(app):
+    password_hasher.configure(app.config)
+    password_hasher.start()
+    atexit.register(password_hasher.shutdown)
@@ -0,0 +1,234 @@
+# services/poll_tally.py - Buffered poll vote counters and cached results
+
+import atexit
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from flask import g, has_app_context
+from sqlalchemy import bindparam, case, func, insert, select, update
+
+from database import db
+from models import PollOption, PollVote, Topic
+from services.background import PeriodicJob
+from services.trending import combine_scores, hot_score_expr
+
+
+_options = PollOption.__table__
+_votes = PollVote.__table__
+_topics = Topic.__table__
+
+# Built once at import; executions only bind parameters
+_INSERT_VOTE = insert(_votes).from_select(
+    ["option_id", "topic_id", "user_id", "created_at"],
+    select(
+        _options.c.id,
+        _options.c.topic_id,
+        bindparam("user_id"),
+        bindparam("created_at", type_=_votes.c.created_at.type)
+    ).where(_options.c.id == bindparam("option_id"))
+)
+
+
+# Log-adds a batch of buffered vote activity to a topic's hot score
+_APPLY_ACTIVITY = update(_topics).where(_topics.c.id == bindparam("topic_id")).values(
+    hot_score=hot_score_expr(_topics.c.hot_score, bindparam("score")),
+    last_activity_at=case(
+        (_topics.c.last_activity_at > bindparam("at"), _topics.c.last_activity_at),
+        else_=bindparam("at")
+    )
+)
+
+
+def insert_vote(option_id, user_id):
+    """Record a vote with one INSERT ... SELECT statement, committed at once.
+
+    The SELECT resolves the option's topic, and the unique (topic_id,
+    user_id) constraint rejects a second vote on the same poll with an
+    IntegrityError. The statement runs in its own engine transaction rather
+    than the ORM session, whose bookkeeping cost more than the INSERT.
+    Returns the number of rows inserted (0 if the option does not exist).
+    """
+    with db.engine.begin() as connection:
+        inserted = connection.execute(_INSERT_VOTE, {
+            "option_id": option_id,
+            "user_id": user_id,
+            "created_at": datetime.utcnow()
+        }).rowcount
+    if inserted and has_app_context():
+        # Read-your-writes, as the session would note it (database.py)
+        g.db_wrote = True
+    return inserted
+
+
+class PollTally:
+    """Per-process vote tally.
+
+    Votes are counted in memory and flushed to ``poll_options.vote_count``
+    in one batched UPDATE every POLL_TALLY_FLUSH_INTERVAL seconds. Results
+    are served from a per-topic cache (refreshed after POLL_TALLY_CACHE_TTL)
+    plus this process's unflushed votes, so reads do not hit the database.
+    Votes from other workers show up once flushed and the cache expires.
+
+    Votes also count toward their topic's trending score; that activity is
+    buffered the same way and applied in one batched UPDATE per flush, so a
+    vote never writes the topic row on the request path.
+
+    Reloads never wait for a flush. Each flush bumps a generation counter
+    before it writes, and a reload only caches its snapshot if no flush
+    was running or started while it read; otherwise the rows may already
+    include votes the flush is about to fold into the cache, so the reload
+    is retried and, failing that, served once (possibly off by that
+    flush's votes) without being cached.
+    """
+
+    LOAD_ATTEMPTS = 3
+
+    def __init__(self, cache_ttl=5):
+        self.cache_ttl = cache_ttl
+        self._lock = threading.Lock()
+        # Serializes flushes with each other; readers never take it
+        self._flush_lock = threading.Lock()
+        self._generation = 0            # bumped when a flush takes a batch
+        self._flushing = False          # a batch is being written and folded
+        self._pending = Counter()       # option_id -> unflushed votes
+        self._inflight = Counter()      # option_id -> votes being flushed
+        self._activity = {}             # topic_id -> (log-space score, latest vote time)
+        self._option_topic = {}         # option_id -> topic_id
+        self._cache = {}                # topic_id -> (loaded_at, [option dicts])
+        self.hits = 0
+        self.misses = 0
+
+    def record_vote(self, option_id, topic_id=None, activity=None, at=None):
+        """Count a committed vote; ``activity`` is its trending score
+        (services/trending.py activity_score), None when votes carry no weight"""
+        with self._lock:
+            self._pending[option_id] += 1
+            if topic_id is not None and activity is not None:
+                self._add_activity(topic_id, activity, at or datetime.utcnow())
+
+    def _add_activity(self, topic_id, score, at):
+        current, latest = self._activity.get(topic_id, (None, at))
+        self._activity[topic_id] = (combine_scores(current, score), max(latest, at))
+
+    def topic_for_option(self, option_id):
+        """Topic id of an option (immutable, so cached forever)"""
+        topic_id = self._option_topic.get(option_id)
+        if topic_id is None:
+            topic_id = db.session.query(PollOption.topic_id).filter_by(id=option_id).scalar()
+            if topic_id is not None:
+                self._option_topic[option_id] = topic_id
+        return topic_id
+
+    def get_tally(self, topic_id):
+        """Options of a topic's poll with current vote counts"""
+        now = time.monotonic()
+        entry = self._cache.get(topic_id)
+        if entry is None or now - entry[0] > self.cache_ttl:
+            self.misses += 1
+            for _ in range(self.LOAD_ATTEMPTS):
+                options, cached = self._load(topic_id, now)
+                if cached:
+                    break
+        else:
+            self.hits += 1
+            options = entry[1]
+
+        with self._lock:
+            return [{**opt, "votes": opt["votes"] + self._pending.get(opt["id"], 0)
+                     + self._inflight.get(opt["id"], 0)}
+                    for opt in options]
+
+    def _load(self, topic_id, now):
+        """Read a topic's options; cache them if the read saw a stable
+        generation. Returns (options, cached)."""
+        with self._lock:
+            generation, flushing = self._generation, self._flushing
+        options = [{
+            "id": opt.id,
+            "text": opt.option_text,
+            "votes": opt.vote_count or 0
+        } for opt in PollOption.query.filter_by(topic_id=topic_id).order_by(PollOption.id).all()]
+        with self._lock:
+            for opt in options:
+                self._option_topic[opt["id"]] = topic_id
+            if flushing or self._generation != generation:
+                return options, False
+            self._cache[topic_id] = (now, options)
+        return options, True
+
+    def flush(self):
+        """Write buffered votes to poll_options; returns the number of options updated"""
+        with self._flush_lock:
+            return self._flush()
+
+    def _flush(self):
+        with self._lock:
+            if not self._pending and not self._activity:
+                return 0
+            pending, self._pending = self._pending, Counter()
+            activity, self._activity = self._activity, {}
+            self._inflight = pending
+            self._generation += 1
+            self._flushing = True
+
+        stmt = update(_options)\
+            .where(_options.c.id == bindparam("option_id"))\
+            .values(vote_count=func.coalesce(_options.c.vote_count, 0) + bindparam("delta"))
+        try:
+            if pending:
+                db.session.execute(stmt, [
+                    {"option_id": option_id, "delta": delta}
+                    for option_id, delta in pending.items()
+                ])
+            if activity:
+                db.session.execute(_APPLY_ACTIVITY, [
+                    {"topic_id": topic_id, "score": score, "at": at}
+                    for topic_id, (score, at) in activity.items()
+                ])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            with self._lock:
+                self._pending.update(pending)
+                for topic_id, (score, at) in activity.items():
+                    self._add_activity(topic_id, score, at)
+                self._inflight = Counter()
+                self._flushing = False
+            raise
+
+        # Fold flushed votes into cached results so reads stay exact
+        with self._lock:
+            for topic_id, (loaded_at, options) in list(self._cache.items()):
+                self._cache[topic_id] = (loaded_at, [
+                    {**opt, "votes": opt["votes"] + pending.get(opt["id"], 0)}
+                    for opt in options
+                ])
+            self._inflight = Counter()
+            self._flushing = False
+        return len(pending)
+
+
+def recount_vote_tallies():
+    """Rebuild every vote_count from poll_votes in one set-based UPDATE.
+
+    Repairs drift if a worker died with unflushed votes.
+    """
+    votes = select(func.count(PollVote.id))\
+        .where(PollVote.option_id == PollOption.id)\
+        .scalar_subquery()
+    db.session.execute(update(PollOption).values(vote_count=votes))
+    db.session.commit()
+
+
+poll_tally = PollTally()
+flush_job = PeriodicJob("flush-poll-tally", 1, poll_tally.flush)
+
+
+def init_app(app):
+    """Start the periodic flush and make sure buffered votes are flushed on exit"""
+    poll_tally.cache_ttl = app.config.get("POLL_TALLY_CACHE_TTL", 5)
+    flush_job.interval = app.config.get("POLL_TALLY_FLUSH_INTERVAL", 1)
+    flush_job.start(app)
+    atexit.register(flush_job.run_once, app)
@@ -0,0 +1,170 @@
+# services/query_profiler.py - Per-request SQL profiling
+#
+# A sampled share of requests (QUERY_PROFILER_SAMPLE_RATE), or any request
+# carrying the X-Query-Profile header, records every statement it runs:
+#   - repeated statement shapes (same SQL with different literals, the usual
+#     N+1 loop) are logged once they reach QUERY_PROFILER_REPEAT_THRESHOLD
+#   - statements slower than QUERY_PROFILER_SLOW_MS are logged with their
+#     parameters and the database's query plan
+#   - the response gets a Server-Timing "db" entry and an X-Query-Profile
+#     summary header
+# The header must carry QUERY_PROFILER_TOKEN when one is set; without a
+# token it is only honoured in debug mode.
+
+import hmac
+import random
+import re
+import time
+from collections import Counter
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+from database import db
+
+HEADER = "X-Query-Profile"
+
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST_RE = re.compile(r"(\?|%s|%\(\w+\)s|:\w+)(\s*,\s*(\?|%s|%\(\w+\)s|:\w+))+")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def statement_shape(statement):
+    """SQL with literals and placeholder lists collapsed, so the same query
+    issued with different ids (or IN-list lengths) has one shape"""
+    shape = _LITERAL_RE.sub("?", statement)
+    shape = _PLACEHOLDER_LIST_RE.sub("?, ...", shape)
+    return _WHITESPACE_RE.sub(" ", shape).strip()
+
+
+class QueryProfile:
+    """Statements run while handling one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = Counter()
+        self.slow = []
+
+    def record(self, statement, parameters, elapsed, slow_after, plan=None):
+        self.count += 1
+        self.seconds += elapsed
+        self.shapes[statement_shape(statement)] += 1
+        if elapsed >= slow_after:
+            self.slow.append((statement, parameters, elapsed, plan))
+
+    def repeated(self, threshold):
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+def _explain(cursor, dialect, statement, parameters):
+    """Query plan for a read, run on a raw cursor so it is neither profiled nor counted"""
+    if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None
+    prefix = "EXPLAIN QUERY PLAN " if dialect == "sqlite" else "EXPLAIN "
+    try:
+        explain_cursor = cursor.connection.cursor()
+        try:
+            explain_cursor.execute(prefix + statement, parameters)
+            return "\n".join(" ".join(str(col) for col in row) for row in explain_cursor.fetchall())
+        finally:
+            explain_cursor.close()
+    except Exception as e:
+        return f"EXPLAIN failed: {e}"
+
+
+def _format_parameters(parameters, limit=500):
+    text = repr(parameters)
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+# ==================== EVENT HOOKS ====================
+
+def _active_profile():
+    if has_request_context():
+        return g.get("_query_profile")
+    return None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active_profile() is not None:
+        conn.info.setdefault("_profiler_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _active_profile()
+    started = conn.info.get("_profiler_started")
+    if profile is None or not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    config = current_app.config
+    slow_after = config.get("QUERY_PROFILER_SLOW_MS", 100) / 1000
+
+    plan = None
+    if elapsed >= slow_after and not executemany and config.get("QUERY_PROFILER_EXPLAIN", True):
+        plan = _explain(cursor, conn.dialect.name, statement, parameters)
+    profile.record(statement, parameters, elapsed, slow_after, plan)
+
+
+def _handle_error(exception_context):
+    started = exception_context.connection and exception_context.connection.info.get("_profiler_started")
+    if started:
+        started.pop()
+
+
+# ==================== REQUEST HOOKS ====================
+
+def _wants_profile():
+    config = current_app.config
+    supplied = request.headers.get(HEADER)
+    if supplied is not None:
+        token = config.get("QUERY_PROFILER_TOKEN")
+        if token:
+            return hmac.compare_digest(supplied.encode(), token.encode())
+        return current_app.debug
+    rate = config.get("QUERY_PROFILER_SAMPLE_RATE", 0.0)
+    return rate > 0 and random.random() < rate
+
+
+def _before_request():
+    if _wants_profile():
+        g._query_profile = QueryProfile()
+
+
+def _after_request(response):
+    profile = g.pop("_query_profile", None)
+    if profile is None:
+        return response
+
+    config = current_app.config
+    threshold = config.get("QUERY_PROFILER_REPEAT_THRESHOLD", 5)
+    repeated = profile.repeated(threshold)
+    route = request.url_rule.rule if request.url_rule is not None else request.path
+    db_ms = profile.seconds * 1000
+
+    for shape, n in repeated:
+        current_app.logger.warning(f"Repeated query ({n}x, possible N+1) in {request.method} {route}: {shape}")
+    for statement, parameters, elapsed, plan in profile.slow:
+        message = (f"Slow query ({elapsed * 1000:.1f} ms) in {request.method} {route}: "
+                   f"{_WHITESPACE_RE.sub(' ', statement)}\n  parameters: {_format_parameters(parameters)}")
+        if plan:
+            message += "\n  plan:\n    " + plan.replace("\n", "\n    ")
+        current_app.logger.warning(message)
+
+    response.headers.add("Server-Timing", f'db;dur={db_ms:.1f};desc="{profile.count} queries"')
+    response.headers[HEADER] = (f"queries={profile.count}; db_ms={db_ms:.1f}; "
+                                f"repeated={len(repeated)}; slow={len(profile.slow)}")
+    return response
+
+
+def init_app(app):
+    """Hook the engine and requests (call after db.init_app); the engine
+    hooks cost nothing on requests that are not profiled"""
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
@@ -0,0 +1,94 @@
+# services/read_replica.py - Read-only endpoints served from a replica
+#
+# With DATABASE_REPLICA_URL set, the replica is the "replica" bind and views
+# decorated with @use_replica send their SELECTs there (routing lives in
+# database.RoutingSession). Read-your-writes: once a request writes, its
+# session stays on the primary, and for REPLICA_STICKY_SECONDS afterwards
+# that user's requests skip the replica in this worker.
+#
+# Locally, either point DATABASE_REPLICA_URL at a second SQLite file and
+# refresh it with `flask --app app replica-sync [--interval 5]`, or at a
+# second Postgres instance fed by streaming replication from the primary.
+
+import sqlite3
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g
+from flask_jwt_extended import get_jwt_identity
+
+from database import REPLICA_BIND, db
+from services.sqlite_profile import is_sqlite_file
+
+_recent_writers = {}  # identity -> monotonic time their primary stickiness ends
+_lock = threading.Lock()
+
+
+def replica_enabled():
+    return REPLICA_BIND in current_app.config.get("SQLALCHEMY_BINDS", {})
+
+
+def _identity():
+    try:
+        return get_jwt_identity()
+    except RuntimeError:
+        # No JWT verified in this request
+        return None
+
+
+def wrote_recently(identity):
+    if identity is None:
+        return False
+    with _lock:
+        return _recent_writers.get(identity, 0) > time.monotonic()
+
+
+def _after_request(response):
+    if g.get("db_wrote") and response.status_code < 400:
+        identity = _identity()
+        if identity is not None:
+            now = time.monotonic()
+            with _lock:
+                _recent_writers.pop(identity, None)
+                _recent_writers[identity] = now + current_app.config["REPLICA_STICKY_SECONDS"]
+                # Insertion order is expiry order: drop the lapsed ones
+                for key in list(_recent_writers):
+                    if _recent_writers[key] > now:
+                        break
+                    del _recent_writers[key]
+    return response
+
+
+def use_replica(view):
+    """Serve a read-only view's queries from the replica (place it under
+    @jwt_required so the caller's own recent writes can be honoured)"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if replica_enabled() and not wrote_recently(_identity()):
+            g.read_replica = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def sync_sqlite_replica():
+    """Copy the primary SQLite database over the replica file (online
+    backup: primary writers keep going, replica readers wait for the copy)"""
+    primary, replica = db.engines[None], db.engines[REPLICA_BIND]
+    for engine in (primary, replica):
+        if not is_sqlite_file(engine.url.render_as_string(hide_password=False)):
+            raise ValueError(f"{engine.url} is not a SQLite file (replicate Postgres with streaming replication)")
+
+    source = primary.raw_connection()
+    try:
+        target = sqlite3.connect(replica.url.database, timeout=current_app.config.get("SQLITE_BUSY_TIMEOUT", 30))
+        try:
+            source.dbapi_connection.backup(target)
+        finally:
+            target.close()
+    finally:
+        source.close()
+
+
+def init_app(app):
+    app.after_request(_after_request)
@@ -0,0 +1,237 @@
+# services/resource_catalog.py - Resource and contact catalog for decision support
+#
+# Categories, their resources and their contacts live in the
+# resource_categories / resources / resource_contacts tables (models.py),
+# seeded from DEFAULT_CATALOG on first start. A topic is routed to
+# categories by matching every category's keywords, as whole words, against
+# its tags and title in one pass (the Aho-Corasick matcher from
+# services/stakeholders.py), then resources and contacts are read by the
+# indexed category column.
+#
+# The router is built from resource_categories once and cached. Committing
+# a change to any catalog table drops it in this process; other workers
+# rebuild theirs within RESOURCE_CATALOG_TTL seconds.
+
+import threading
+import time
+
+from sqlalchemy import event, select
+
+from database import RoutingSession, db
+from models import Resource, ResourceCategory, ResourceContact
+from services.stakeholders import KeywordMatcher
+
+# Category used when a topic matches none (seeded without keywords)
+FALLBACK_CATEGORY = "general"
+
+DEFAULT_CATALOG = {
+    "facilities": {
+        "keywords": ["facilities", "facility", "maintenance", "repair", "repairs", "leak", "leaking",
+                     "plumbing", "electricity", "power outage", "air conditioning", "ac", "fan", "fans",
+                     "toilet", "toilets", "washroom", "washrooms", "hostel", "building", "classroom",
+                     "classrooms", "furniture", "lights", "elevator", "lift"],
+        "resources": ["Maintenance staff", "Repair budget", "Inspection team"],
+        "contacts": [
+            {"name": "Facilities Manager", "extension": "123", "email": "facilities@college.edu"},
+            {"name": "Maintenance Head", "extension": "124", "email": "maintenance@college.edu"}
+        ]
+    },
+    "food": {
+        "keywords": ["food", "cafeteria", "canteen", "mess", "meal", "meals", "breakfast", "lunch",
+                     "dinner", "menu", "hygiene", "drinking water"],
+        "resources": ["Cafeteria manager", "Food committee", "Health inspector"],
+        "contacts": [
+            {"name": "Cafeteria Manager", "extension": "200", "email": "cafeteria@college.edu"},
+            {"name": "Food Committee Head", "extension": "201", "email": "foodcom@college.edu"}
+        ]
+    },
+    "it": {
+        # Not "it" itself: as a whole word that is mostly the pronoun
+        "keywords": ["wifi", "wi-fi", "internet", "network", "computer", "computers", "laptop",
+                     "laptops", "printer", "printers", "projector", "projectors", "software", "portal",
+                     "login", "password", "email", "server", "it support", "it department", "lms"],
+        "resources": ["IT support desk", "Network team", "Hardware inventory"],
+        "contacts": [
+            {"name": "IT Support", "extension": "300", "email": "itsupport@college.edu"},
+            {"name": "Network Administrator", "extension": "301", "email": "network@college.edu"}
+        ]
+    },
+    "academic": {
+        "keywords": ["academic", "academics", "exam", "exams", "examination", "grade", "grades",
+                     "grading", "course", "courses", "syllabus", "lecture", "lectures", "timetable",
+                     "attendance", "assignment", "assignments", "curriculum"],
+        "resources": ["Department head", "Faculty committee", "Academic council"]
+    },
+    "transport": {
+        "keywords": ["transport", "transportation", "bus", "buses", "shuttle", "parking", "traffic",
+                     "commute"],
+        "resources": ["Transport office", "Bus schedule", "Parking management"]
+    },
+    "hr": {
+        "keywords": ["hr", "harassment", "discrimination", "counseling", "counselling", "mental health",
+                     "grievance", "misconduct"],
+        "resources": ["HR department", "Student affairs", "Counseling services"]
+    },
+    FALLBACK_CATEGORY: {
+        "keywords": [],
+        "availability": "9 AM - 5 PM",
+        "resources": ["Student affairs office", "College administration", "Help desk"],
+        "contacts": [
+            {"name": "Student Affairs", "extension": "100", "email": "studentaffairs@college.edu"},
+            {"name": "Help Desk", "extension": "0", "email": "help@college.edu"}
+        ]
+    }
+}
+
+CATALOG_MODELS = (ResourceCategory, Resource, ResourceContact)
+
+
+class CategoryRouter:
+    """Cached keyword -> category matcher over resource_categories"""
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._matcher = None
+        self._availability = {}
+        self._loaded_at = 0.0
+        self._generation = 0
+
+    def invalidate(self):
+        with self._lock:
+            self._matcher = None
+            self._generation += 1
+
+    def _load(self):
+        with self._lock:
+            if self._matcher is not None and time.monotonic() - self._loaded_at < self.ttl:
+                return self._matcher, self._availability
+            generation = self._generation
+        rows = db.session.execute(
+            select(ResourceCategory.key, ResourceCategory.keywords, ResourceCategory.availability)
+        ).all()
+        keywords = {
+            keyword.strip().lower(): key
+            for key, words, _ in rows for keyword in (words or "").split(",") if keyword.strip()
+        }
+        matcher = KeywordMatcher(keywords, whole_words=True)
+        availability = {key: available for key, _, available in rows}
+        with self._lock:
+            # Keep it unless the catalog changed while it was being built
+            if generation == self._generation:
+                self._matcher, self._availability = matcher, availability
+                self._loaded_at = time.monotonic()
+        return matcher, availability
+
+    def route(self, tags, title):
+        """Categories for a topic, in tag order; the title counts once the
+        topic has tags, as the old per-tag checks did"""
+        matcher, _ = self._load()
+        categories = []
+        texts = [tag.strip() for tag in tags] + ([title] if tags else [])
+        for text in texts:
+            for key in sorted(matcher.match(text)):
+                if key not in categories:
+                    categories.append(key)
+        return categories
+
+    def availability(self, category):
+        return self._load()[1].get(category)
+
+
+router = CategoryRouter()
+
+
+def _by_category(model, categories, columns):
+    grouped = {}
+    for row in db.session.execute(
+        select(model.category, *columns).where(model.category.in_(categories)).order_by(model.id)
+    ):
+        grouped.setdefault(row[0], []).append(row)
+    return grouped
+
+
+def available_resources(categories):
+    """[{category, resources, availability}] for the given categories, or
+    for the fallback category when none of them has resources"""
+    names = _by_category(Resource, categories, [Resource.name])
+    if not names:
+        categories = [FALLBACK_CATEGORY]
+        names = _by_category(Resource, categories, [Resource.name])
+    return [{
+        "category": category,
+        "resources": [row.name for row in names[category]],
+        "availability": router.availability(category)
+    } for category in categories if category in names]
+
+
+def recommended_contacts(categories):
+    """Contacts for the given categories, or the fallback category's"""
+    columns = [ResourceContact.name, ResourceContact.extension, ResourceContact.email]
+    contacts = _by_category(ResourceContact, categories, columns)
+    if not contacts:
+        categories = [FALLBACK_CATEGORY]
+        contacts = _by_category(ResourceContact, categories, columns)
+    return [
+        {"name": row.name, "extension": row.extension, "email": row.email}
+        for category in categories for row in contacts.get(category, [])
+    ]
+
+
+def catalog_resources(categories):
+    """Full resource rows for the given categories"""
+    return Resource.query.filter(Resource.category.in_(categories))\
+        .order_by(Resource.category, Resource.id).all()
+
+
+def seed_default_catalog():
+    """Load DEFAULT_CATALOG into an empty catalog; returns categories added.
+
+    A seeded catalog whose default categories still have only their own key
+    as keyword (the first seed did that) gets the current keyword lists.
+    """
+    if db.session.scalar(select(ResourceCategory.key).limit(1)) is not None:
+        for category in ResourceCategory.query.filter(ResourceCategory.key.in_(DEFAULT_CATALOG)):
+            if category.keywords == category.key:
+                category.keywords = ",".join(DEFAULT_CATALOG[category.key]["keywords"])
+        db.session.commit()
+        return 0
+    for key, entry in DEFAULT_CATALOG.items():
+        db.session.add(ResourceCategory(
+            key=key,
+            keywords=",".join(entry["keywords"]),
+            availability=entry.get("availability", "Available during college hours")
+        ))
+        db.session.add_all(Resource(category=key, name=name) for name in entry["resources"])
+        db.session.add_all(ResourceContact(category=key, **contact) for contact in entry.get("contacts", []))
+    db.session.commit()
+    return len(DEFAULT_CATALOG)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _note_catalog_flush(session, flush_context):
+    if any(isinstance(entity, CATALOG_MODELS) for entity in (*session.new, *session.dirty, *session.deleted)):
+        session.info["resource_catalog_changed"] = True
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _note_catalog_statement(orm_execute_state):
+    mapper = orm_execute_state.bind_mapper
+    if (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete) \
+            and mapper is not None and mapper.class_ in CATALOG_MODELS:
+        orm_execute_state.session.info["resource_catalog_changed"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _invalidate_router(session):
+    if session.info.pop("resource_catalog_changed", False):
+        router.invalidate()
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _forget_catalog_changes(session):
+    session.info.pop("resource_catalog_changed", None)
+
+
+def init_app(app):
+    router.ttl = app.config.get("RESOURCE_CATALOG_TTL", 300)
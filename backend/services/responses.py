@@ -0,0 +1,159 @@
+# services/responses.py - Fast JSON encoding, response compression and streamed arrays
+
+import gzip
+import traceback
+import zlib
+from itertools import islice
+
+from flask import Response, current_app, request, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib encoder
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/html", "text/plain", "text/css", "application/javascript"}
+STREAM_BATCH_SIZE = 200
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson when installed.
+
+    Dates and datetimes are passed through to DefaultJSONProvider.default,
+    so they keep Flask's HTTP-date format, as do other types orjson does not
+    know. Anything orjson rejects outright (e.g. integers wider than 64
+    bits) is encoded by the stdlib encoder instead. One difference remains
+    besides whitespace: NaN and infinities are written as null (valid JSON)
+    where the stdlib writes NaN/Infinity.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._dumpb(obj).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._dumpb(obj) + b"\n", mimetype=self.mimetype)
+
+    def _dumpb(self, obj):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, default=self.default, option=option)
+        except orjson.JSONEncodeError:
+            # Also raises the stdlib's TypeError for values neither can encode
+            return super().dumps(obj).encode()
+
+
+# ==================== COMPRESSION ====================
+
+def negotiate_encoding():
+    """Best encoding the client accepts: "br", "gzip" or None"""
+    offered = ["br", "gzip"] if brotli is not None else ["gzip"]
+    return request.accept_encodings.best_match(offered)
+
+
+def _compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=current_app.config.get("COMPRESS_BROTLI_QUALITY", 4))
+    return gzip.compress(data, compresslevel=current_app.config.get("COMPRESS_LEVEL", 6), mtime=0)
+
+
+def compress_response(response):
+    """after_request hook: compress sizeable text/JSON bodies per Accept-Encoding"""
+    if (response.status_code != 200
+            or response.direct_passthrough
+            or response.is_streamed
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    if response.content_length is None or \
+            response.content_length < current_app.config.get("COMPRESS_MIN_SIZE", 1024):
+        return response
+
+    encoding = negotiate_encoding()
+    if encoding is None:
+        return response
+
+    response.set_data(_compress(response.get_data(), encoding))
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+# ==================== STREAMED ARRAYS ====================
+
+def stream_json_array(items, serialize):
+    """Stream ``[serialize(item), ...]`` without building the whole list.
+
+    ``items`` can be a lazily-iterated query (e.g. ``query.yield_per(500)``).
+    Output is gzip-compressed on the fly when the client accepts it.
+
+    The first batch is serialized before returning, so a failing query or
+    serializer raises in the view and gets its normal error response. Once
+    the 200 is sent, a failure is logged and re-raised: the server then
+    drops the connection and the client sees a failed transfer rather than
+    a short but valid array.
+    """
+    dumps = current_app.json.dumps
+    encoding = "gzip" if request.accept_encodings["gzip"] else None
+    level = current_app.config.get("COMPRESS_LEVEL", 6)
+
+    items = iter(items)
+    first_batch = [dumps(serialize(item)) for item in islice(items, STREAM_BATCH_SIZE)]
+
+    def chunks():
+        yield "[" + ",".join(first_batch)
+        try:
+            # Later items exist only if the first batch was full
+            batch = []
+            for item in items:
+                batch.append(dumps(serialize(item)))
+                if len(batch) >= STREAM_BATCH_SIZE:
+                    yield "," + ",".join(batch)
+                    batch = []
+            if batch:
+                yield "," + ",".join(batch)
+        except Exception as e:
+            print(f"Error streaming {request.path}: {e}")
+            traceback.print_exc()
+            raise
+        yield "]\n"
+
+    def gzipped():
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        for chunk in chunks():
+            data = compressor.compress(chunk.encode())
+            if data:
+                yield data
+        yield compressor.flush()
+
+    response = Response(
+        stream_with_context(gzipped() if encoding else chunks()),
+        mimetype="application/json"
+    )
+    response.vary.add("Accept-Encoding")
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def init_app(app):
+    app.json = FastJSONProvider(app)
+    app.after_request(compress_response)
@@ -0,0 +1,175 @@
+# services/retention.py - Bounded growth for AI summaries and sentiment history
+#
+# Summaries: /ai/summary only stores a row when the text changed since the
+# topic's latest one (record_summary), and the retention pass keeps the
+# newest SUMMARY_KEEP_PER_TOPIC per topic.
+#
+# Sentiment history is downsampled by age: points older than
+# SENTIMENT_HISTORY_RAW_DAYS are thinned to the last point of each hour, and
+# points older than SENTIMENT_HISTORY_HOURLY_DAYS to the last point of each
+# day (0 turns a tier off). Each history row is a snapshot of the running
+# topic score, so the last point of a bucket is the bucket's value and
+# thinning is a pure delete.
+#
+# Every pass walks forward from a stored watermark (RetentionCheckpoint) in
+# bucket-aligned time slices, so a tick only reads history that crossed a
+# tier boundary since the previous one. Deletes go by primary key in
+# batches of RETENTION_BATCH_SIZE, each its own short transaction, and a tick
+# stops after RETENTION_LIMIT rows and resumes on the next. History
+# imported with timestamps behind a watermark is only seen after
+# `flask data retention --rescan`.
+
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, func, select
+
+from database import db
+from models import AISummary, RetentionCheckpoint, SentimentHistory
+from services.background import PeriodicJob
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# Bucket boundaries are whole multiples of the bucket size from here
+_ORIGIN = datetime(1970, 1, 1)
+
+
+def record_summary(topic_id, summary):
+    """Store a generated summary unless it repeats the topic's latest one
+    (then only its generated_at moves); the caller commits"""
+    latest = AISummary.query.filter_by(topic_id=topic_id)\
+        .order_by(AISummary.generated_at.desc(), AISummary.id.desc()).first()
+    if latest is not None and latest.summary == summary:
+        latest.generated_at = datetime.utcnow()
+        return latest
+    ai_summary = AISummary(topic_id=topic_id, summary=summary)
+    db.session.add(ai_summary)
+    return ai_summary
+
+
+def _delete_ids(model, ids, batch_size):
+    for start in range(0, len(ids), batch_size):
+        db.session.execute(
+            delete(model).where(model.id.in_(ids[start:start + batch_size]))
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+
+def prune_summaries(keep, batch_size, limit=None):
+    """Delete all but the newest ``keep`` summaries of each topic; returns rows deleted"""
+    ranked = select(
+        AISummary.id,
+        func.row_number().over(
+            partition_by=AISummary.topic_id,
+            order_by=(AISummary.generated_at.desc(), AISummary.id.desc())
+        ).label("rank")
+    ).subquery()
+
+    deleted = 0
+    while limit is None or deleted < limit:
+        size = batch_size if limit is None else min(batch_size, limit - deleted)
+        ids = db.session.scalars(select(ranked.c.id).where(ranked.c.rank > keep).limit(size)).all()
+        if not ids:
+            break
+        _delete_ids(AISummary, ids, batch_size)
+        deleted += len(ids)
+    return deleted
+
+
+def _bucket_start(moment, seconds):
+    offset = int((moment - _ORIGIN).total_seconds()) // seconds * seconds
+    return _ORIGIN + timedelta(seconds=offset)
+
+
+def _checkpoint_name(bucket_seconds):
+    return f"sentiment_history:{bucket_seconds}"
+
+
+def downsample_history(after_days, bucket_seconds, batch_size, limit=None):
+    """Keep only the last point per topic and bucket among history older
+    than ``after_days``; returns rows deleted"""
+    cutoff = _bucket_start(datetime.utcnow() - timedelta(days=after_days), bucket_seconds)
+    checkpoint = db.session.get(RetentionCheckpoint, _checkpoint_name(bucket_seconds))
+    if checkpoint is None:
+        oldest = db.session.scalar(select(func.min(SentimentHistory.timestamp)))
+        if oldest is None:
+            return 0
+        checkpoint = RetentionCheckpoint(name=_checkpoint_name(bucket_seconds),
+                                         watermark=_bucket_start(oldest, bucket_seconds))
+        db.session.add(checkpoint)
+
+    # One slice holds a day of hourly buckets, or 24 daily ones
+    step = timedelta(seconds=bucket_seconds * 24)
+    deleted = 0
+    while checkpoint.watermark < cutoff and (limit is None or deleted < limit):
+        start, end = checkpoint.watermark, min(checkpoint.watermark + step, cutoff)
+        last = {}  # (topic_id, bucket) -> (timestamp, id) of the point kept
+        doomed = []
+        points = db.session.execute(
+            select(SentimentHistory.id, SentimentHistory.topic_id, SentimentHistory.timestamp)
+            .where(SentimentHistory.timestamp >= start, SentimentHistory.timestamp < end)
+            .execution_options(yield_per=5000)
+        )
+        for point_id, topic_id, timestamp in points:
+            key = (topic_id, _bucket_start(timestamp, bucket_seconds))
+            kept = last.get(key)
+            if kept is None:
+                last[key] = (timestamp, point_id)
+            elif (timestamp, point_id) > kept:
+                doomed.append(kept[1])
+                last[key] = (timestamp, point_id)
+            else:
+                doomed.append(point_id)
+
+        _delete_ids(SentimentHistory, doomed, batch_size)
+        deleted += len(doomed)
+        checkpoint.watermark = end
+        db.session.commit()
+    return deleted
+
+
+def history_tiers(config=None):
+    """(after_days, bucket_seconds) pairs for the enabled tiers, finest first"""
+    config = config or current_app.config
+    tiers = [(config.get("SENTIMENT_HISTORY_RAW_DAYS", 7), HOUR),
+             (config.get("SENTIMENT_HISTORY_HOURLY_DAYS", 90), DAY)]
+    return [(days, seconds) for days, seconds in tiers if days]
+
+
+def reset_checkpoints():
+    """Forget the downsampling watermarks so the next pass rescans all history"""
+    db.session.execute(delete(RetentionCheckpoint).where(
+        RetentionCheckpoint.name.like(_checkpoint_name("%"))))
+    db.session.commit()
+
+
+def run_retention(batch_size=None, limit=None):
+    """One retention pass; returns rows deleted per table"""
+    config = current_app.config
+    batch_size = batch_size or config.get("RETENTION_BATCH_SIZE", 500)
+    removed = {"ai_summaries": 0, "sentiment_history": 0}
+
+    keep = config.get("SUMMARY_KEEP_PER_TOPIC", 5)
+    if keep:
+        removed["ai_summaries"] = prune_summaries(keep, batch_size, limit)
+
+    for after_days, bucket_seconds in history_tiers(config):
+        remaining = None if limit is None else limit - removed["sentiment_history"]
+        if remaining is not None and remaining <= 0:
+            break
+        removed["sentiment_history"] += downsample_history(after_days, bucket_seconds, batch_size, remaining)
+    return removed
+
+
+retention_job = PeriodicJob("retention", 600, lambda: run_retention(
+    limit=current_app.config.get("RETENTION_LIMIT") or None))
+
+
+def init_app(app):
+    """Start the retention job unless RETENTION_INTERVAL is 0"""
+    interval = app.config.get("RETENTION_INTERVAL", 600)
+    if interval:
+        retention_job.interval = interval
+        retention_job.start(app)
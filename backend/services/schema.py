@@ -0,0 +1,135 @@
+# services/schema.py - Schema setup and in-place upgrades
+#
+# db.create_all() creates missing tables but never alters an existing one,
+# so a database created by an earlier release lacks the columns added to
+# its tables since. upgrade_schema() runs create_all, then adds each model
+# column the live table is missing (nullable, as ALTER TABLE ADD COLUMN
+# requires on SQLite), backfills the columns it just added from the data
+# already there, and creates any missing indexes. Every step checks the live
+# schema first, so it is idempotent: create_app runs it when CREATE_SCHEMA is
+# on, and `flask init-db` runs it once per deploy otherwise.
+#
+# poll_votes gained topic_id and a one-vote-per-poll unique constraint. Older
+# databases only had one vote per option, so a user may hold several votes
+# in one poll: the upgrade keeps each user's first vote per poll, deletes the
+# rest, recounts the option tallies and then adds the constraint.
+
+from sqlalchemy import Index, case, delete, func, inspect, select, text, update
+
+from database import db
+from models import PollOption, PollVote, Post, Topic
+from services.moderation_queue import PRIORITY_RANKS, risk_score_expr
+from services.poll_tally import recount_vote_tallies
+from services.trending import recompute_trending
+
+UNIQUE_TOPIC_VOTE = "unique_topic_vote"
+
+
+def _add_missing_columns(engine, metadata):
+    """ALTER TABLE ADD COLUMN for model columns missing from existing
+    tables; returns {(table, column), ...} added"""
+    added = set()
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    quote = engine.dialect.identifier_preparer
+    with engine.begin() as connection:
+        for table in metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            present = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in present:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(text(
+                    f"ALTER TABLE {quote.format_table(table)} "
+                    f"ADD COLUMN {quote.format_column(column)} {column_type}"
+                ))
+                added.add((table.name, column.name))
+    return added
+
+
+def _create_missing_indexes(engine, metadata):
+    with engine.begin() as connection:
+        for table in metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+
+
+def _backfill_topics(added):
+    """Derive the topic columns an upgrade just added from existing data"""
+    table = Topic.__table__
+    values = {}
+    if ("topics", "updated_at") in added:
+        values["updated_at"] = func.coalesce(table.c.created_at, func.current_timestamp())
+    if ("topics", "priority_rank") in added:
+        values["priority_rank"] = case(
+            *[(table.c.priority == label, rank) for label, rank in PRIORITY_RANKS.items()],
+            else_=PRIORITY_RANKS["normal"]
+        )
+    if ("topics", "risk_score") in added:
+        values["risk_score"] = risk_score_expr(
+            func.coalesce(table.c.sentiment_score, 0),
+            func.coalesce(table.c.sentiment_count, 0),
+            func.coalesce(table.c.negative_count, 0)
+        )
+    if ("topics", "post_count") in added:
+        values["post_count"] = select(func.count(Post.id))\
+            .where(Post.topic_id == table.c.id).scalar_subquery()
+    if values:
+        if "updated_at" not in values:
+            # Keep the column's onupdate from stamping every topic as changed
+            values["updated_at"] = table.c.updated_at
+        db.session.execute(update(table).values(values))
+
+
+def _has_unique_topic_vote(engine):
+    inspector = inspect(engine)
+    names = {c["name"] for c in inspector.get_unique_constraints(PollVote.__tablename__)}
+    names |= {i["name"] for i in inspector.get_indexes(PollVote.__tablename__) if i["unique"]}
+    return UNIQUE_TOPIC_VOTE in names
+
+
+def _upgrade_poll_votes(engine):
+    """Backfill poll_votes.topic_id, drop votes the one-vote-per-poll rule
+    forbids and add its constraint; returns duplicate votes deleted"""
+    if _has_unique_topic_vote(engine):
+        return 0
+    votes = PollVote.__table__
+    db.session.execute(update(votes).where(votes.c.topic_id.is_(None)).values(
+        topic_id=select(PollOption.topic_id).where(PollOption.id == votes.c.option_id).scalar_subquery()
+    ))
+    # Votes for options that no longer exist belong to no poll
+    db.session.execute(delete(votes).where(votes.c.topic_id.is_(None)))
+    first_votes = select(func.min(votes.c.id)).group_by(votes.c.topic_id, votes.c.user_id)
+    duplicates = db.session.execute(delete(votes).where(votes.c.id.not_in(first_votes))).rowcount
+    db.session.commit()
+    if duplicates:
+        recount_vote_tallies()
+        print(f"Removed {duplicates} extra votes cast in polls the voter had already voted in")
+
+    with engine.begin() as connection:
+        if engine.dialect.name == "postgresql":
+            connection.execute(text(f"ALTER TABLE {votes.name} ALTER COLUMN topic_id SET NOT NULL"))
+        Index(UNIQUE_TOPIC_VOTE, votes.c.topic_id, votes.c.user_id, unique=True).create(connection)
+    return duplicates
+
+
+def upgrade_schema():
+    """Create missing tables, then add, backfill and index missing columns;
+    returns the (table, column) pairs added"""
+    db.create_all()
+
+    added = set()
+    for bind_key, metadata in db.metadatas.items():
+        added |= _add_missing_columns(db.engines[bind_key], metadata)
+
+    _upgrade_poll_votes(db.engines[None])
+    _backfill_topics(added)
+    if ("topics", "hot_score") in added or ("topics", "last_activity_at") in added:
+        recompute_trending()
+    db.session.commit()
+
+    for bind_key, metadata in db.metadatas.items():
+        _create_missing_indexes(db.engines[bind_key], metadata)
+    return added
@@ -0,0 +1,139 @@
+# services/sentiment.py - Local-first sentiment with LLM escalation
+#
+# Every text is scored locally first (ai/local_sentiment.py). Only texts whose
+# local confidence is below SENTIMENT_CONFIDENCE_THRESHOLD go to Gemini, so
+# the threshold sets the escalation rate. If the LLM call fails, the local
+# result is used rather than a neutral placeholder.
+
+import threading
+
+from ai.local_sentiment import key_point, keyword_tags, local_sentiment
+
+SENTIMENT_MODES = ("tiered", "local", "llm")
+
+
+class TieredSentiment:
+    def __init__(self, analyzer):
+        self.analyzer = analyzer
+        self.mode = "tiered"
+        self.threshold = 0.75
+        self._lock = threading.Lock()
+        self._counts = {"local": 0, "escalated": 0}
+
+    def configure(self, config):
+        self.mode = config.get("SENTIMENT_MODE", self.mode)
+        if self.mode not in SENTIMENT_MODES:
+            raise ValueError(f"SENTIMENT_MODE must be one of {', '.join(SENTIMENT_MODES)}")
+        self.threshold = config.get("SENTIMENT_CONFIDENCE_THRESHOLD", self.threshold)
+
+    def _record(self, escalated):
+        with self._lock:
+            self._counts["escalated" if escalated else "local"] += 1
+
+    def classify(self, text):
+        """Local result plus whether it should be escalated to the LLM"""
+        result = self.analyzer.analyze(text)
+        if self.mode == "llm":
+            escalate = True
+        elif self.mode == "local":
+            escalate = False
+        else:
+            escalate = result["confidence"] < self.threshold
+        self._record(escalate)
+        return result, escalate
+
+    @staticmethod
+    def _local_enrichment(content, result):
+        # Tags come from the post itself, not the topic title it shares
+        # with every other post
+        return {
+            **result,
+            "key_points": key_point(content),
+            "tags": keyword_tags(content),
+            "source": "local"
+        }
+
+    def enrich_locally(self, content):
+        """Local enrichment, or None if the text should go to the LLM"""
+        result, escalate = self.classify(content)
+        if escalate:
+            return None
+        return self._local_enrichment(content, result)
+
+    def enrich_post(self, content, title=None):
+        """Same fields as ai.gemini.enrich_post, computed locally when confident"""
+        result, escalate = self.classify(content)
+        local = self._local_enrichment(content, result)
+        if not escalate:
+            return local
+        from ai.gemini import request_enrichment
+        try:
+            return {**request_enrichment(content, title=title), "source": "llm"}
+        except Exception as e:
+            print(f"Error enriching post, keeping the local result: {e}")
+            return local
+
+    @staticmethod
+    def _sentiment_fields(enrichment, source):
+        return {
+            "sentiment": enrichment["sentiment"],
+            "score": enrichment["score"],
+            "confidence": enrichment["confidence"],
+            "emotion": enrichment["emotion"],
+            "source": source
+        }
+
+    def analyze_sentiment(self, text):
+        """Drop-in for AIService.analyze_sentiment, tagged with its source"""
+        result, escalate = self.classify(text)
+        if escalate:
+            from ai.gemini import request_enrichment
+            try:
+                return self._sentiment_fields(request_enrichment(text), "llm")
+            except Exception as e:
+                print(f"Error analyzing sentiment, keeping the local result: {e}")
+        return {**result, "source": "local"}
+
+    async def analyze_sentiment_async(self, text):
+        """analyze_sentiment() for the ASGI routes"""
+        result, escalate = self.classify(text)
+        if escalate:
+            from ai.gemini import request_enrichment_async
+            try:
+                return self._sentiment_fields(await request_enrichment_async(text), "llm")
+            except Exception as e:
+                print(f"Error analyzing sentiment, keeping the local result: {e}")
+        return {**result, "source": "local"}
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+        total = counts["local"] + counts["escalated"]
+        return {
+            "mode": self.mode,
+            "threshold": self.threshold,
+            "local": counts["local"],
+            "escalated": counts["escalated"],
+            "escalation_rate": round(counts["escalated"] / total, 4) if total else 0.0
+        }
+
+
+tiered_sentiment = TieredSentiment(local_sentiment)
+
+
+def post_enrichment_values(analysis):
+    """Post column values for an enrichment result"""
+    return {
+        "sentiment": analysis.get("sentiment", "neutral"),
+        "key_points": analysis.get("key_points", ""),
+        "sentiment_score": analysis.get("score"),
+        "sentiment_confidence": analysis.get("confidence"),
+        "emotion": analysis.get("emotion"),
+        "tags": ",".join(analysis.get("tags", [])) or None,
+        "sentiment_source": analysis.get("source")
+    }
+
+
+def init_app(app):
+    tiered_sentiment.configure(app.config)
+    local_sentiment.use_model(app.config.get("LOCAL_SENTIMENT_MODEL_PATH"))
@@ -0,0 +1,148 @@
+# services/sqlite_profile.py - SQLite tuned for a small production deployment
+#
+# Applied when DATABASE_URL points at a SQLite file:
+#   - every connection gets WAL journaling, synchronous=NORMAL, memory-mapped
+#     I/O and a busy timeout (SQLITE_* settings)
+#   - reads run outside explicit transactions, so they never hold a
+#     snapshot that a later write would have to upgrade (the upgrade is what
+#     fails with "database is locked" under WAL, whatever the busy timeout)
+#   - the first write of a transaction queues on a per-process writer lock,
+#     then opens BEGIN IMMEDIATE, which waits on the other processes through
+#     the busy timeout; the lock is released on commit or rollback
+# Readers never wait for writers, and writers wait their turn instead of
+# failing. Statements after the first write (including reads) run inside the
+# write transaction, so read-modify-write code that needs a consistent view
+# should call begin_write() before reading.
+
+import sqlite3
+import threading
+
+from sqlalchemy import event
+
+from database import db
+
+# Statements that need the write lock (SAVEPOINT opens a transaction too)
+WRITE_PREFIXES = ("INSERT", "UPDATE", "DELETE", "REPLACE", "CREATE", "DROP", "ALTER", "SAVEPOINT")
+
+
+def is_sqlite_file(uri):
+    if not uri.startswith("sqlite"):
+        return False
+    database = uri.split("///", 1)[1] if "///" in uri else ""
+    return database not in ("", ":memory:") and "mode=memory" not in database
+
+
+class WriterLock:
+    """One writer per process; the holder is the DBAPI connection that owns
+    the open write transaction"""
+
+    def __init__(self, timeout=30):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self.owner = None
+
+    def acquire(self, dbapi_connection):
+        if self.owner is dbapi_connection:
+            return False
+        if not self._lock.acquire(timeout=self.timeout):
+            raise sqlite3.OperationalError(f"database is locked (waited {self.timeout}s for the writer lock)")
+        self.owner = dbapi_connection
+        return True
+
+    def release(self, dbapi_connection):
+        if self.owner is not None and self.owner is dbapi_connection:
+            self.owner = None
+            self._lock.release()
+
+
+writer = WriterLock()
+_enabled = False
+
+
+def _raw(connection):
+    """The sqlite3 connection behind a pool proxy (or the connection itself)"""
+    return getattr(connection, "dbapi_connection", connection)
+
+
+def _begin_immediate(dbapi_connection):
+    """Take the writer lock and open the write transaction on this connection"""
+    if writer.acquire(dbapi_connection):
+        try:
+            dbapi_connection.execute("BEGIN IMMEDIATE")
+        except Exception:
+            writer.release(dbapi_connection)
+            raise
+
+
+def begin_write(session=None):
+    """Open the write transaction now, so the reads that follow see the state
+    the writes will apply to (no-op unless the SQLite profile is active)"""
+    if _enabled:
+        connection = (session or db.session).connection()
+        _begin_immediate(_raw(connection.connection))
+
+
+def install(engine, config):
+    writer.timeout = config.get("SQLITE_BUSY_TIMEOUT", 30)
+    pragmas = [
+        "PRAGMA journal_mode=WAL",
+        f"PRAGMA synchronous={config.get('SQLITE_SYNCHRONOUS', 'NORMAL')}",
+        f"PRAGMA mmap_size={int(config.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))}",
+        f"PRAGMA busy_timeout={int(writer.timeout * 1000)}",
+    ]
+    serialize = config.get("SQLITE_SERIALIZE_WRITES", True)
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        for pragma in pragmas:
+            dbapi_connection.execute(pragma)
+        if serialize:
+            # Driver-level autocommit: transactions are opened explicitly
+            # below, and only for writes
+            dbapi_connection.isolation_level = None
+
+    if not serialize:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def queue_writes(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip()[:9].upper().startswith(WRITE_PREFIXES):
+            _begin_immediate(cursor.connection)
+
+    # Release after the COMMIT/ROLLBACK has run, including the rollback the
+    # pool does when a connection is returned mid-transaction
+    dialect = engine.dialect
+    do_commit, do_rollback = dialect.do_commit, dialect.do_rollback
+
+    def commit_and_release(dbapi_connection):
+        try:
+            do_commit(dbapi_connection)
+        finally:
+            writer.release(_raw(dbapi_connection))
+
+    def rollback_and_release(dbapi_connection):
+        try:
+            do_rollback(dbapi_connection)
+        finally:
+            writer.release(_raw(dbapi_connection))
+
+    dialect.do_commit = commit_and_release
+    dialect.do_rollback = rollback_and_release
+
+    @event.listens_for(engine.pool, "invalidate")
+    def release_invalidated(dbapi_connection, connection_record, exception):
+        writer.release(dbapi_connection)
+
+
+def init_app(app):
+    """Apply the profile to the SQLite file databases among the primary and
+    any binds (call right after db.init_app)"""
+    global _enabled
+    with app.app_context():
+        primary = db.engine
+        engines = list(db.engines.values())
+    for engine in engines:
+        if is_sqlite_file(engine.url.render_as_string(hide_password=False)):
+            install(engine, app.config)
+    _enabled = (is_sqlite_file(primary.url.render_as_string(hide_password=False))
+                and app.config.get("SQLITE_SERIALIZE_WRITES", True))
@@ -0,0 +1,206 @@
+# services/stakeholders.py - Stakeholder mentions counted at write time
+#
+# The lexicon maps each stakeholder group to the keywords that signal it
+# (STAKEHOLDER_LEXICON_PATH, a JSON file shaped like DEFAULT_LEXICON). All
+# keywords are compiled into one Aho-Corasick automaton, so a post is
+# scanned once, case-insensitively, whatever the lexicon size. Keywords
+# match anywhere in a word ("student" also counts "students"), as the old
+# per-keyword substring checks did.
+#
+# Each new post bumps its topic's row per matched group in
+# topic_stakeholder_counts, so decision support reads the counts with one
+# primary-key lookup. After a lexicon change or a bulk import, run
+# `flask data recompute` to rebuild them.
+
+import json
+from collections import Counter, deque
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from database import db
+from models import Post, TopicStakeholderCount
+
+DEFAULT_LEXICON = {
+    "students": {
+        "keywords": ["student"],
+        "sentiment": "mixed",
+        "key_concerns": ["quality", "availability", "cost"],
+        "representation": "Student council"
+    },
+    "faculty": {
+        "keywords": ["professor", "faculty", "teacher"],
+        "sentiment": "neutral",
+        "key_concerns": ["standards", "consistency"],
+        "representation": "Faculty association"
+    },
+    "staff": {
+        "keywords": ["staff"],
+        "sentiment": "concerned",
+        "key_concerns": ["implementation", "workload"],
+        "representation": "Staff union"
+    }
+}
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == "_"
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton: which labels' keywords occur in a text.
+
+    By default a keyword matches anywhere, even inside a longer word. With
+    ``whole_words`` it only counts when neither neighbouring character is a
+    letter, digit or underscore ("it" then matches "IT desk" but not "with").
+    """
+
+    def __init__(self, keywords, whole_words=False):
+        # keywords: {keyword: label}
+        self._goto = [{}]
+        self._fail = [0]
+        self.labels = frozenset(keywords.values())
+        self.whole_words = whole_words
+
+        outputs = [set()]
+        for keyword, label in keywords.items():
+            keyword = keyword.lower()
+            state = 0
+            for char in keyword:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    outputs.append(set())
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            # Whole-word matching needs the keyword length to find its start
+            outputs[state].add((label, len(keyword)) if whole_words else label)
+
+        # Breadth-first: a state's failure target is always shallower, so its
+        # outputs are final by the time they are merged in
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0) if state else 0
+                outputs[child] |= outputs[self._fail[child]]
+                queue.append(child)
+        self._out = [frozenset(labels) for labels in outputs]
+
+    def match(self, text):
+        """Set of labels with at least one keyword in ``text``"""
+        if self.whole_words:
+            return self._match_words((text or "").lower())
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set()
+        state = 0
+        for char in (text or "").lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                found |= out[state]
+                if len(found) == len(self.labels):
+                    break
+        return found
+
+    def _match_words(self, text):
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set()
+        state = 0
+        for end, char in enumerate(text, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not out[state] or (end < len(text) and _is_word_char(text[end])):
+                continue
+            for label, length in out[state]:
+                start = end - length
+                if start == 0 or not _is_word_char(text[start - 1]):
+                    found.add(label)
+            if len(found) == len(self.labels):
+                break
+        return found
+
+
+class StakeholderLexicon:
+    def __init__(self, groups):
+        self.use(groups)
+
+    def use(self, groups):
+        self.groups = groups
+        self.matcher = KeywordMatcher({
+            keyword: name for name, group in groups.items() for keyword in group["keywords"]
+        })
+
+    def load(self, path):
+        with open(path, encoding="utf-8") as f:
+            self.use(json.load(f))
+
+
+lexicon = StakeholderLexicon(DEFAULT_LEXICON)
+
+
+def record_post_stakeholders(topic_id, content):
+    """Count a new post's stakeholder mentions toward its topic inside the
+    current transaction; returns the groups it mentions"""
+    groups = lexicon.matcher.match(content)
+    for name in sorted(groups):
+        row = TopicStakeholderCount.query.filter_by(topic_id=topic_id, stakeholder=name)
+        increment = {TopicStakeholderCount.post_count: TopicStakeholderCount.post_count + 1}
+        if row.update(increment, synchronize_session=False):
+            continue
+        # First mention in this topic, unless a concurrent post got there first
+        try:
+            with db.session.begin_nested():
+                db.session.add(TopicStakeholderCount(topic_id=topic_id, stakeholder=name, post_count=1))
+        except IntegrityError:
+            row.update(increment, synchronize_session=False)
+    return groups
+
+
+def stakeholder_analysis(topic_id):
+    """Per-group mention counts plus the lexicon's description of each group"""
+    counts = dict(db.session.execute(
+        select(TopicStakeholderCount.stakeholder, TopicStakeholderCount.post_count)
+        .where(TopicStakeholderCount.topic_id == topic_id)
+    ).all())
+    return {
+        name: {
+            "count": counts.get(name, 0),
+            **{key: value for key, value in group.items() if key != "keywords"}
+        }
+        for name, group in lexicon.groups.items()
+    }
+
+
+def recompute_stakeholder_counts(topic_ids=None):
+    """Rebuild the counts by re-matching every post (after an import or a
+    lexicon change); the caller commits. Returns rows written."""
+    counts = Counter()
+    posts = select(Post.topic_id, Post.content)
+    if topic_ids:
+        posts = posts.where(Post.topic_id.in_(topic_ids))
+    for topic_id, content in db.session.execute(posts.execution_options(yield_per=5000)):
+        for name in lexicon.matcher.match(content):
+            counts[topic_id, name] += 1
+
+    stale = delete(TopicStakeholderCount)
+    if topic_ids:
+        stale = stale.where(TopicStakeholderCount.topic_id.in_(topic_ids))
+    db.session.execute(stale)
+    if counts:
+        db.session.execute(insert(TopicStakeholderCount), [
+            {"topic_id": topic_id, "stakeholder": name, "post_count": count}
+            for (topic_id, name), count in counts.items()
+        ])
+    return len(counts)
+
+
+def init_app(app):
+    path = app.config.get("STAKEHOLDER_LEXICON_PATH")
+    if path:
+        lexicon.load(path)
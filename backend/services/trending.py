@@ -0,0 +1,143 @@
+# services/trending.py - Time-decayed "hot" ranking for topics
+#
+# Every event (topic created, post, poll vote) adds its weight to the
+# topic's heat, and heat halves every TRENDING_HALF_LIFE_HOURS. Instead of
+# decaying every row as time passes, the score is kept in log space
+# against a fixed epoch:
+#
+#     hot_score = ln(sum(weight * e^((event_time - EPOCH) / tau)))    tau = half-life / ln 2
+#
+# so an event only adds to its own topic's score (a log-add-exp inside the
+# counter UPDATE, see services/counters.py), and ORDER BY hot_score DESC is
+# the order by heat right now. The heat itself is
+# e^(hot_score - (now - EPOCH) / tau). Changing the half-life changes the
+# scale: run `flask data recompute` afterwards.
+
+import math
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import bindparam, case, event, func, select, update
+
+from database import db
+from models import PollVote, Post, Topic
+
+EPOCH = datetime(2024, 1, 1)
+
+
+class TrendingSettings:
+    def __init__(self, half_life_hours=24, topic_weight=1.0, post_weight=1.0, vote_weight=0.25):
+        self.half_life_hours = half_life_hours
+        self.weights = {"topic": topic_weight, "post": post_weight, "vote": vote_weight}
+
+    @property
+    def tau(self):
+        return self.half_life_hours * 3600 / math.log(2)
+
+
+settings = TrendingSettings()
+
+
+def activity_score(kind, at=None):
+    """Log-space contribution of one event ("topic", "post" or "vote"), or
+    None when that kind of event carries no weight"""
+    weight = settings.weights[kind]
+    if weight <= 0:
+        return None
+    at = at or datetime.utcnow()
+    return math.log(weight) + (at - EPOCH).total_seconds() / settings.tau
+
+
+def combine_scores(a, b):
+    """Python log-add-exp of two scores (None means no activity)"""
+    if a is None or b is None:
+        return b if a is None else a
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+def hot_score_expr(current, score):
+    """SQL log-add-exp of a hot_score column and a new event score"""
+    high = case((current > score, current), else_=score)
+    return case(
+        (current.is_(None), score),
+        else_=high + func.ln(1 + func.exp(-func.abs(current - score)))
+    )
+
+
+def heat(hot_score, now=None):
+    """Current decayed activity for a stored hot_score"""
+    if hot_score is None:
+        return 0.0
+    now = now or datetime.utcnow()
+    return math.exp(hot_score - (now - EPOCH).total_seconds() / settings.tau)
+
+
+def trending_topics(limit=20, status="active"):
+    """Hottest topics, read straight off the hot_score index"""
+    query = Topic.query.filter(Topic.hot_score.isnot(None))
+    if status:
+        query = query.filter(Topic.status == status)
+    return query.order_by(Topic.hot_score.desc(), Topic.id.desc()).limit(limit).all()
+
+
+def recompute_trending(topic_ids=None):
+    """Rebuild hot_score and last_activity_at from topic, post and vote
+    timestamps (after an import or a half-life change); returns topics updated"""
+    scores = defaultdict(lambda: None)
+    latest = {}
+    sources = [
+        ("topic", select(Topic.id, Topic.created_at)),
+        ("post", select(Post.topic_id, Post.created_at)),
+        ("vote", select(PollVote.topic_id, PollVote.created_at)),
+    ]
+    for kind, query in sources:
+        if topic_ids:
+            query = query.where(query.selected_columns[0].in_(topic_ids))
+        for topic_id, created_at in db.session.execute(query.execution_options(yield_per=5000)):
+            if created_at is not None:
+                scores[topic_id] = combine_scores(scores[topic_id], activity_score(kind, created_at))
+                latest[topic_id] = max(latest.get(topic_id, created_at), created_at)
+
+    if scores:
+        db.session.execute(
+            update(Topic.__table__)
+            .where(Topic.__table__.c.id == bindparam("topic_id"))
+            .values(hot_score=bindparam("hot_score"), last_activity_at=bindparam("last_activity_at")),
+            [{"topic_id": topic_id, "hot_score": score, "last_activity_at": latest[topic_id]}
+             for topic_id, score in scores.items()]
+        )
+    return len(scores)
+
+
+@event.listens_for(Topic, "before_insert")
+def _init_trending_columns(mapper, connection, topic):
+    """A new topic starts with its own creation as activity"""
+    created_at = topic.created_at = topic.created_at or datetime.utcnow()
+    topic.post_count = topic.post_count or 0
+    topic.last_activity_at = topic.last_activity_at or created_at
+    if topic.hot_score is None:
+        topic.hot_score = activity_score("topic", created_at)
+
+
+def _ensure_math_functions(dbapi_connection, connection_record):
+    # SQLite only has ln()/exp() when built with SQLITE_ENABLE_MATH_FUNCTIONS
+    try:
+        dbapi_connection.execute("SELECT ln(1), exp(0)")
+    except Exception:
+        dbapi_connection.create_function("ln", 1, math.log, deterministic=True)
+        dbapi_connection.create_function("exp", 1, math.exp, deterministic=True)
+
+
+def init_app(app):
+    settings.half_life_hours = app.config.get("TRENDING_HALF_LIFE_HOURS", 24)
+    settings.weights = {
+        "topic": app.config.get("TRENDING_TOPIC_WEIGHT", 1.0),
+        "post": app.config.get("TRENDING_POST_WEIGHT", 1.0),
+        "vote": app.config.get("TRENDING_VOTE_WEIGHT", 0.25),
+    }
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        if engine.dialect.name == "sqlite":
+            event.listen(engine, "connect", _ensure_math_functions)
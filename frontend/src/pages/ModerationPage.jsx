@@ -18,23 +18,45 @@ const ModerationPage = ({ onNavigate }) => {
   const [decisionData, setDecisionData] = useState(null);
   const [loading, setLoading] = useState(true);
   const [loadingDecision, setLoadingDecision] = useState(false);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  // Server-ordered by priority, risk and recency, one page per cursor
+  const fetchQueuePage = async (cursor) => {
+    const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+    const res = await fetch(`${API_BASE}/api/moderation/queue${query}`, {
+      headers: { 'Authorization': `Bearer ${token}` }
+    });
+    return res.json();
+  };
 
   // Load topics (existing code)
   const loadTopics = async () => {
     setLoading(true);
     try {
-      const res = await fetch(`${API_BASE}/api/topics`, {
-        headers: { 'Authorization': `Bearer ${token}` }
-      });
-      const data = await res.json();
-      const sorted = data.sort((a, b) => a.sentiment_score - b.sentiment_score);
-      setTopics(sorted);
+      const data = await fetchQueuePage(null);
+      setTopics(data.items || []);
+      setNextCursor(data.next_cursor || null);
     } catch (error) {
       console.error('Failed to load topics:', error);
     }
     setLoading(false);
   };
 
+  // Append the next page of the queue
+  const loadMoreTopics = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const data = await fetchQueuePage(nextCursor);
+      setTopics(prev => [...prev, ...(data.items || [])]);
+      setNextCursor(data.next_cursor || null);
+    } catch (error) {
+      console.error('Failed to load more topics:', error);
+    }
+    setLoadingMore(false);
+  };
+
   useEffect(() => {
     loadTopics();
   }, [token]);
@@ -97,6 +119,15 @@ const ModerationPage = ({ onNavigate }) => {
                   </div>
                 ))}
               </div>
+              {nextCursor && (
+                <button
+                  className="btn btn-secondary btn-block"
+                  onClick={loadMoreTopics}
+                  disabled={loadingMore}
+                >
+                  {loadingMore ? 'Loading...' : 'Load more'}
+                </button>
+              )}
             </div>
 
             {/* Main content - Decision Support */}
@@ -36,6 +36,29 @@ const TopicDetailPage = ({ topicId, onBack, onNavigate }) => {
     loadTopic();
   }, [topicId]);
 
+  // Live updates pushed by the server (EventSource cannot send headers)
+  useEffect(() => {
+    if (!token) return;
+    const source = new EventSource(
+      `${API_BASE}/api/topics/${topicId}/events?jwt=${encodeURIComponent(token)}`
+    );
+    source.addEventListener('post_created', (e) => {
+      const post = JSON.parse(e.data);
+      setTopic(prev => prev && !prev.posts.some(p => p.id === post.id)
+        ? { ...prev, posts: [post, ...prev.posts] }
+        : prev);
+    });
+    source.addEventListener('sentiment_changed', (e) => {
+      const counts = JSON.parse(e.data);
+      setTopic(prev => prev ? { ...prev, ...counts } : prev);
+    });
+    source.addEventListener('poll_tally', (e) => {
+      const { options } = JSON.parse(e.data);
+      setTopic(prev => prev && prev.poll ? { ...prev, poll: { ...prev.poll, options } } : prev);
+    });
+    return () => source.close();
+  }, [topicId, token]);
+
   const handlePostSubmit = async (e) => {
     e.preventDefault();
     if (!postContent.trim() || submitting) return;